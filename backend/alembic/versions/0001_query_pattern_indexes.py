@@ -0,0 +1,84 @@
+"""Indexes for the hot query patterns
+
+Tables are created by `python -m app.initial_data` (which already declares
+these indexes on a fresh database); this revision adds them to databases
+created before they existed, and skips any that are already present.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# name, table, columns, partial-index predicates per dialect
+INDEXES = [
+    ("ix_documents_user_id_created_at", "documents", ["user_id", "created_at", "id"], None),
+    ("ix_documents_created_at", "documents", ["created_at", "id"], None),
+    ("ix_documents_status_created_at", "documents", ["status", "created_at", "id"], None),
+    (
+        "ix_documents_pending_created_at",
+        "documents",
+        ["created_at", "id"],
+        {"postgresql": "status = 'PENDING'", "sqlite": "status = 'PENDING'"},
+    ),
+    (
+        "ix_resources_active_created_at",
+        "resources",
+        ["created_at", "id"],
+        {"postgresql": "is_active", "sqlite": "is_active = 1"},
+    ),
+    ("ix_user_activities_created_at", "user_activities", ["created_at"], None),
+    (
+        "ix_user_activities_activity_type_created_at",
+        "user_activities",
+        ["activity_type", "created_at"],
+        None,
+    ),
+    ("ix_analytics_events_created_at", "analytics_events", ["created_at"], None),
+    (
+        "ix_analytics_events_event_name_created_at",
+        "analytics_events",
+        ["event_name", "created_at"],
+        None,
+    ),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for name, table, columns, where in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        kwargs = {}
+        if where:
+            kwargs = {
+                "postgresql_where": sa.text(where["postgresql"]),
+                "sqlite_where": sa.text(where["sqlite"]),
+            }
+        if postgres:
+            # Build without holding a write lock on busy tables
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, table, columns, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
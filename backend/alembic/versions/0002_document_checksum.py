@@ -0,0 +1,26 @@
+"""Add documents.checksum
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("documents")}
+    if "checksum" not in columns:
+        op.add_column("documents", sa.Column("checksum", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "checksum")
@@ -0,0 +1,41 @@
+"""Content-addressed document blobs
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "document_blobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "document_blobs",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_document_blobs_unreferenced",
+        "document_blobs",
+        ["updated_at"],
+        postgresql_where=sa.text("ref_count = 0"),
+        sqlite_where=sa.text("ref_count = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_blobs_unreferenced", table_name="document_blobs")
+    op.drop_table("document_blobs")
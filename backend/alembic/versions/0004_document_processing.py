@@ -0,0 +1,42 @@
+"""Document processing pipeline results
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+processing_status = sa.Enum("PENDING", "DONE", "FAILED", name="processingstatus")
+
+COLUMNS = [
+    sa.Column("processing_status", processing_status, nullable=True),
+    sa.Column("detected_mime_type", sa.String(), nullable=True),
+    sa.Column("page_count", sa.Integer(), nullable=True),
+    sa.Column("thumbnail_path", sa.String(), nullable=True),
+    sa.Column("preview_path", sa.String(), nullable=True),
+    sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = {c["name"] for c in sa.inspect(bind).get_columns("documents")}
+    processing_status.create(bind, checkfirst=True)
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("documents", column)
+
+
+def downgrade() -> None:
+    for column in reversed(COLUMNS):
+        op.drop_column("documents", column.name)
+    processing_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,157 @@
+"""Trigger-maintained document counts and document_type index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# The enum types already exist (documents uses them)
+document_status = sa.Enum(
+    "PENDING", "VERIFIED", "REJECTED", name="documentstatus", create_type=False
+)
+document_type = sa.Enum(
+    "ID_PROOF", "ADDRESS_PROOF", "EDUCATIONAL_CERTIFICATE", "MARKSHEET", "OTHER",
+    name="documenttype", create_type=False,
+)
+
+# The counters as they were at this revision (one row per status and type;
+# 0010 shards them). Inlined so this revision does not change with the app.
+BACKFILL_DOCUMENT_COUNTS = """
+    INSERT INTO document_counts (status, document_type, count)
+    SELECT status, document_type, count(*) FROM documents GROUP BY status, document_type
+"""
+DOCUMENT_COUNT_TRIGGERS = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION document_counts_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE document_counts SET count = count - 1
+                WHERE status = OLD.status AND document_type = OLD.document_type;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO document_counts (status, document_type, count)
+                VALUES (NEW.status, NEW.document_type, 1)
+                ON CONFLICT (status, document_type)
+                DO UPDATE SET count = document_counts.count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS documents_count_insert_delete ON documents",
+        """
+        CREATE TRIGGER documents_count_insert_delete
+        AFTER INSERT OR DELETE ON documents
+        FOR EACH ROW EXECUTE FUNCTION document_counts_sync()
+        """,
+        "DROP TRIGGER IF EXISTS documents_count_update ON documents",
+        """
+        CREATE TRIGGER documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        FOR EACH ROW
+        WHEN (OLD.status IS DISTINCT FROM NEW.status
+              OR OLD.document_type IS DISTINCT FROM NEW.document_type)
+        EXECUTE FUNCTION document_counts_sync()
+        """,
+    ],
+    "sqlite": [
+        """
+        CREATE TRIGGER IF NOT EXISTS documents_count_insert AFTER INSERT ON documents
+        BEGIN
+            INSERT INTO document_counts (status, document_type, count)
+            VALUES (NEW.status, NEW.document_type, 1)
+            ON CONFLICT (status, document_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS documents_count_delete AFTER DELETE ON documents
+        BEGIN
+            UPDATE document_counts SET count = count - 1
+            WHERE status = OLD.status AND document_type = OLD.document_type;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        WHEN OLD.status IS NOT NEW.status OR OLD.document_type IS NOT NEW.document_type
+        BEGIN
+            UPDATE document_counts SET count = count - 1
+            WHERE status = OLD.status AND document_type = OLD.document_type;
+            INSERT INTO document_counts (status, document_type, count)
+            VALUES (NEW.status, NEW.document_type, 1)
+            ON CONFLICT (status, document_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+    ],
+}
+DROP_DOCUMENT_COUNT_TRIGGERS = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS documents_count_update ON documents",
+        "DROP TRIGGER IF EXISTS documents_count_insert_delete ON documents",
+        "DROP FUNCTION IF EXISTS document_counts_sync()",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS documents_count_update",
+        "DROP TRIGGER IF EXISTS documents_count_delete",
+        "DROP TRIGGER IF EXISTS documents_count_insert",
+    ],
+}
+
+
+def _has_triggers(bind) -> bool:
+    if bind.dialect.name == "postgresql":
+        query = "SELECT 1 FROM pg_trigger WHERE tgname = 'documents_count_update'"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'documents_count_update'"
+    return bind.exec_driver_sql(query).first() is not None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ix_documents_document_type_created_at" not in {
+        index["name"] for index in inspector.get_indexes("documents")
+    }:
+        op.create_index(
+            "ix_documents_document_type_created_at",
+            "documents",
+            ["document_type", "created_at", "id"],
+        )
+    if "document_counts" not in inspector.get_table_names():
+        op.create_table(
+            "document_counts",
+            sa.Column("status", document_status, primary_key=True),
+            sa.Column("document_type", document_type, primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+    # `create_all` on an existing database creates the table but not the
+    # triggers (those hang off the creation of `documents`)
+    if _has_triggers(bind):
+        return
+    # Backfill and install the triggers in one transaction; on Postgres
+    # lock out writers so no document is counted twice or missed.
+    if bind.dialect.name == "postgresql":
+        op.execute("LOCK TABLE documents IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("DELETE FROM document_counts")
+    op.execute(BACKFILL_DOCUMENT_COUNTS)
+    for statement in DOCUMENT_COUNT_TRIGGERS[bind.dialect.name]:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DROP_DOCUMENT_COUNT_TRIGGERS.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+    op.drop_table("document_counts")
+    op.drop_index("ix_documents_document_type_created_at", table_name="documents")
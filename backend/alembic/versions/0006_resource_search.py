@@ -0,0 +1,65 @@
+"""Full-text search and filter indexes for the resource catalog
+
+On Postgres adding the generated `search_vector` column rewrites
+`resources` under an exclusive lock; on a large catalog run this in a
+maintenance window.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.search import (
+    BACKFILL_RESOURCE_SEARCH,
+    DROP_RESOURCE_SEARCH,
+    has_resource_search,
+    install_resource_search,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_resources_active_resource_type_created_at", ["resource_type", "created_at", "id"]),
+    ("ix_resources_active_source_created_at", ["source", "created_at", "id"]),
+    ("ix_resources_active_location_created_at", ["location", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = {ix["name"] for ix in sa.inspect(bind).get_indexes("resources")}
+    for name, columns in INDEXES:
+        if name in existing:
+            continue
+        kwargs = {
+            "postgresql_where": sa.text("is_active"),
+            "sqlite_where": sa.text("is_active = 1"),
+        }
+        if bind.dialect.name == "postgresql":
+            # Build without holding a write lock on the catalog
+            with op.get_context().autocommit_block():
+                op.create_index(name, "resources", columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, "resources", columns, **kwargs)
+
+    if has_resource_search(bind):
+        return
+    install_resource_search(None, bind)
+    backfill = BACKFILL_RESOURCE_SEARCH.get(bind.dialect.name)
+    if backfill and has_resource_search(bind):
+        op.execute(backfill)
+
+
+def downgrade() -> None:
+    for statement in DROP_RESOURCE_SEARCH.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="resources")
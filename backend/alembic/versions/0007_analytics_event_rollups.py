@@ -0,0 +1,52 @@
+"""Trigger-maintained hourly analytics event rollups
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.rollups import (
+    BACKFILL_EVENT_ROLLUPS,
+    DROP_EVENT_ROLLUP_TRIGGERS,
+    event_rollup_triggers,
+    has_event_rollup_triggers,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "analytics_event_rollups" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "analytics_event_rollups",
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("event_name", sa.String(100), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+    # `create_all` on an existing database creates the table but not the
+    # triggers (those hang off the creation of `analytics_events`)
+    if has_event_rollup_triggers(bind):
+        return
+    # Backfill and install the triggers in one transaction; on Postgres
+    # lock out writers so no event is counted twice or missed.
+    if bind.dialect.name == "postgresql":
+        op.execute("LOCK TABLE analytics_events IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("DELETE FROM analytics_event_rollups")
+    op.execute(BACKFILL_EVENT_ROLLUPS[bind.dialect.name])
+    for statement in event_rollup_triggers(bind.dialect.name):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DROP_EVENT_ROLLUP_TRIGGERS.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+    op.drop_table("analytics_event_rollups")
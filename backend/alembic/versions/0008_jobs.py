@@ -0,0 +1,54 @@
+"""Background jobs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+job_status = sa.Enum("QUEUED", "RUNNING", "SUCCEEDED", "FAILED", "CANCELLED", name="jobstatus")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # `create_all` may have made it already
+    if "jobs" in sa.inspect(bind).get_table_names():
+        return
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("args", sa.JSON(), nullable=True),
+        sa.Column("status", job_status, nullable=False),
+        sa.Column("dedupe_key", sa.String(200), nullable=True, unique=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("progress", sa.Float(), nullable=False),
+        sa.Column("progress_message", sa.String(255), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_status_run_at", "jobs", ["status", "run_at", "id"])
+    op.create_index("ix_jobs_created_at", "jobs", ["created_at", "id"])
+    op.create_index("ix_jobs_name_created_at", "jobs", ["name", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("jobs")
+    job_status.drop(op.get_bind(), checkfirst=True)
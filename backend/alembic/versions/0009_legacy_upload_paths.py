@@ -0,0 +1,46 @@
+"""Index legacy upload paths
+
+Old `/static/<file_name>` links are redirected to the authorised download
+endpoint, looking the document up by `file_path`; only documents without a
+checksum (uploaded before content addressing) can have such links.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_documents_legacy_file_path"
+
+
+def _exists() -> bool:
+    return INDEX in {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("documents")}
+
+
+def upgrade() -> None:
+    if _exists():
+        return
+    kwargs = {
+        "postgresql_where": sa.text("checksum IS NULL"),
+        "sqlite_where": sa.text("checksum IS NULL"),
+    }
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without holding a write lock on documents
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX, "documents", ["file_path"], postgresql_concurrently=True, **kwargs)
+    else:
+        op.create_index(INDEX, "documents", ["file_path"], **kwargs)
+
+
+def downgrade() -> None:
+    if _exists():
+        op.drop_index(INDEX, table_name="documents")
@@ -0,0 +1,227 @@
+"""Shard document counts over slots
+
+Every upload used to increment the same (PENDING, type) row, so concurrent
+uploads queued on its row lock until each transaction committed. Counts
+are now split over `slot` rows (document id modulo 16, DOCUMENT_COUNT_SLOTS
+at this revision; the SQL is inlined so it does not change with the app).
+The table is rebuilt and backfilled with writers to `documents` locked out
+on Postgres; it is small, but the backfill scans `documents`.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+document_status = sa.Enum(
+    "PENDING", "VERIFIED", "REJECTED", name="documentstatus", create_type=False
+)
+document_type = sa.Enum(
+    "ID_PROOF", "ADDRESS_PROOF", "EDUCATIONAL_CERTIFICATE", "MARKSHEET", "OTHER",
+    name="documenttype", create_type=False,
+)
+
+SLOTS = 16
+
+_SHARDED_BACKFILL = f"""
+    INSERT INTO document_counts (status, document_type, slot, count)
+    SELECT status, document_type, id % {SLOTS}, count(*) FROM documents
+    GROUP BY status, document_type, id % {SLOTS}
+"""
+_SQLITE_INCREMENT = f"""
+            INSERT INTO document_counts (status, document_type, slot, count)
+            VALUES (NEW.status, NEW.document_type, NEW.id % {SLOTS}, 1)
+            ON CONFLICT (status, document_type, slot) DO UPDATE SET count = count + 1;
+"""
+_SQLITE_DECREMENT = f"""
+            UPDATE document_counts SET count = count - 1
+            WHERE status = OLD.status AND document_type = OLD.document_type
+              AND slot = OLD.id % {SLOTS};
+"""
+_SHARDED_TRIGGERS = {
+    "postgresql": [
+        f"""
+        CREATE OR REPLACE FUNCTION document_counts_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE document_counts SET count = count - 1
+                WHERE status = OLD.status AND document_type = OLD.document_type
+                  AND slot = OLD.id % {SLOTS};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO document_counts (status, document_type, slot, count)
+                VALUES (NEW.status, NEW.document_type, NEW.id % {SLOTS}, 1)
+                ON CONFLICT (status, document_type, slot)
+                DO UPDATE SET count = document_counts.count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER documents_count_insert_delete
+        AFTER INSERT OR DELETE ON documents
+        FOR EACH ROW EXECUTE FUNCTION document_counts_sync()
+        """,
+        """
+        CREATE TRIGGER documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        FOR EACH ROW
+        WHEN (OLD.status IS DISTINCT FROM NEW.status
+              OR OLD.document_type IS DISTINCT FROM NEW.document_type)
+        EXECUTE FUNCTION document_counts_sync()
+        """,
+    ],
+    "sqlite": [
+        f"""
+        CREATE TRIGGER documents_count_insert AFTER INSERT ON documents
+        BEGIN {_SQLITE_INCREMENT} END
+        """,
+        f"""
+        CREATE TRIGGER documents_count_delete AFTER DELETE ON documents
+        BEGIN {_SQLITE_DECREMENT} END
+        """,
+        f"""
+        CREATE TRIGGER documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        WHEN OLD.status IS NOT NEW.status OR OLD.document_type IS NOT NEW.document_type
+        BEGIN {_SQLITE_DECREMENT} {_SQLITE_INCREMENT} END
+        """,
+    ],
+}
+_DROP_TRIGGERS = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS documents_count_update ON documents",
+        "DROP TRIGGER IF EXISTS documents_count_insert_delete ON documents",
+        "DROP FUNCTION IF EXISTS document_counts_sync()",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS documents_count_update",
+        "DROP TRIGGER IF EXISTS documents_count_delete",
+        "DROP TRIGGER IF EXISTS documents_count_insert",
+    ],
+}
+
+# The 0005 (unsharded) counters, restored on downgrade
+_UNSHARDED_BACKFILL = """
+    INSERT INTO document_counts (status, document_type, count)
+    SELECT status, document_type, count(*) FROM documents GROUP BY status, document_type
+"""
+_UNSHARDED_TRIGGERS = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION document_counts_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE document_counts SET count = count - 1
+                WHERE status = OLD.status AND document_type = OLD.document_type;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO document_counts (status, document_type, count)
+                VALUES (NEW.status, NEW.document_type, 1)
+                ON CONFLICT (status, document_type)
+                DO UPDATE SET count = document_counts.count + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER documents_count_insert_delete
+        AFTER INSERT OR DELETE ON documents
+        FOR EACH ROW EXECUTE FUNCTION document_counts_sync()
+        """,
+        """
+        CREATE TRIGGER documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        FOR EACH ROW
+        WHEN (OLD.status IS DISTINCT FROM NEW.status
+              OR OLD.document_type IS DISTINCT FROM NEW.document_type)
+        EXECUTE FUNCTION document_counts_sync()
+        """,
+    ],
+    "sqlite": [
+        """
+        CREATE TRIGGER documents_count_insert AFTER INSERT ON documents
+        BEGIN
+            INSERT INTO document_counts (status, document_type, count)
+            VALUES (NEW.status, NEW.document_type, 1)
+            ON CONFLICT (status, document_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER documents_count_delete AFTER DELETE ON documents
+        BEGIN
+            UPDATE document_counts SET count = count - 1
+            WHERE status = OLD.status AND document_type = OLD.document_type;
+        END
+        """,
+        """
+        CREATE TRIGGER documents_count_update
+        AFTER UPDATE OF status, document_type ON documents
+        WHEN OLD.status IS NOT NEW.status OR OLD.document_type IS NOT NEW.document_type
+        BEGIN
+            UPDATE document_counts SET count = count - 1
+            WHERE status = OLD.status AND document_type = OLD.document_type;
+            INSERT INTO document_counts (status, document_type, count)
+            VALUES (NEW.status, NEW.document_type, 1)
+            ON CONFLICT (status, document_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+    ],
+}
+
+
+def _has_slot() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("document_counts")
+    return "slot" in {column["name"] for column in columns}
+
+
+def upgrade() -> None:
+    if _has_slot():
+        return
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("LOCK TABLE documents IN SHARE ROW EXCLUSIVE MODE")
+    for statement in _DROP_TRIGGERS.get(bind.dialect.name, []):
+        op.execute(statement)
+    op.drop_table("document_counts")
+    op.create_table(
+        "document_counts",
+        sa.Column("status", document_status, primary_key=True),
+        sa.Column("document_type", document_type, primary_key=True),
+        sa.Column("slot", sa.SmallInteger(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.execute(_SHARDED_BACKFILL)
+    for statement in _SHARDED_TRIGGERS[bind.dialect.name]:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if not _has_slot():
+        return
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("LOCK TABLE documents IN SHARE ROW EXCLUSIVE MODE")
+    for statement in _DROP_TRIGGERS.get(bind.dialect.name, []):
+        op.execute(statement)
+    op.drop_table("document_counts")
+    op.create_table(
+        "document_counts",
+        sa.Column("status", document_status, primary_key=True),
+        sa.Column("document_type", document_type, primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.execute(_UNSHARDED_BACKFILL)
+    for statement in _UNSHARDED_TRIGGERS.get(bind.dialect.name, []):
+        op.execute(statement)
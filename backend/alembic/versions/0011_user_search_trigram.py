@@ -0,0 +1,36 @@
+"""Trigram indexes for the admin listing's owner search
+
+The admin document listing filters owners by case-insensitive substring of
+name or email; on Postgres GIN trigram indexes let ILIKE '%...%' use an
+index instead of scanning `users`. Nothing to do on SQLite.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+
+from app.db.search import DROP_USER_SEARCH, user_search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    statements = user_search_ddl(op.get_bind().dialect.name, concurrently=True)
+    if not statements:
+        return
+    # Build without holding a write lock on users
+    with op.get_context().autocommit_block():
+        for statement in statements:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in DROP_USER_SEARCH.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,63 @@
+"""Server default for updated_at
+
+The models give `updated_at` a server default of now() and read it back
+with the INSERT (eager defaults). Databases created before that keep a
+column without a default, so every new row came back with updated_at NULL;
+set the default and fill the NULLs from `created_at`.
+
+On SQLite changing a default means rebuilding the table, which drops its
+triggers (document counts, resource search); they are recreated as they
+were.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+TABLES = ["users", "educational_details", "documents", "resources", "user_recommendations"]
+
+
+def _has_default(table: str) -> bool:
+    for column in sa.inspect(op.get_bind()).get_columns(table):
+        if column["name"] == "updated_at":
+            return column["default"] is not None
+    return False
+
+
+def _set_default(table: str, default) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        op.alter_column(table, "updated_at", server_default=default, existing_type=sa.DateTime(timezone=True))
+        return
+    triggers = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+    ).scalars().all()
+    with op.batch_alter_table(table, recreate="always") as batch:
+        batch.alter_column("updated_at", server_default=default, existing_type=sa.DateTime(timezone=True))
+    for statement in triggers:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+        )
+        if not _has_default(table):
+            _set_default(table, sa.func.now())
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        if _has_default(table):
+            _set_default(table, None)
@@ -2,19 +2,22 @@ from typing import Generator, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
+from app.db.replicas import read_session
 from app.db.session import SessionLocal
 from app.schemas.token import TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token", auto_error=False
+)
 
 def get_db() -> Generator:
     """
@@ -26,6 +29,27 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def get_read_db(token: Optional[str] = Depends(optional_oauth2)) -> Generator:
+    """
+    Session for endpoints that only read: served by a read replica when one
+    is configured and fresh enough, except right after the caller's own
+    writes.
+    """
+    db = read_session(_token_user_id(token))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _token_user_id(token: Optional[str]) -> Optional[int]:
+    if not token:
+        return None
+    try:
+        payload = security.decode_token(token)
+        return TokenPayload(**payload).sub
+    except (security.InvalidTokenError, ValidationError):
+        return None
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
@@ -33,11 +57,9 @@ def get_current_user(
     Get the currently authenticated user.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = security.decode_token(token)
         token_data = TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+    except (security.InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -49,6 +71,27 @@ def get_current_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    # Writes committed on this session keep the user's reads on the primary
+    db.info["user_id"] = user.id
+    return user
+
+def get_current_user_optional(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2)
+) -> Optional[models.User]:
+    """
+    Get the authenticated user if a valid bearer token was sent, else None.
+    """
+    if not token:
+        return None
+    try:
+        payload = security.decode_token(token)
+        token_data = TokenPayload(**payload)
+    except (security.InvalidTokenError, ValidationError):
+        return None
+    user = crud.user.get(db, id=token_data.sub)
+    if not user or not crud.user.is_active(user):
+        return None
+    db.info["user_id"] = user.id
     return user
 
 def get_current_active_user(
@@ -61,6 +104,19 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_streaming_user(token: str = Depends(reusable_oauth2)) -> models.User:
+    """
+    `get_current_active_user` for streaming responses: its session is closed
+    here rather than held, with a pooled connection, until the stream ends.
+    """
+    db = SessionLocal()
+    try:
+        user = get_current_active_user(get_current_user(db, token))
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
 def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -73,3 +129,13 @@ def get_current_active_superuser(
             detail="The user doesn't have enough privileges",
         )
     return current_user
+
+def get_streaming_superuser(token: str = Depends(reusable_oauth2)) -> models.User:
+    """`get_current_active_superuser` for streaming responses; see `get_streaming_user`."""
+    db = SessionLocal()
+    try:
+        user = get_current_active_superuser(get_current_active_user(get_current_user(db, token)))
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
@@ -6,7 +6,8 @@ from .endpoints import (
     documents,
     resources,
     recommendations,
-    analytics
+    analytics,
+    jobs,
 )
 
 api_router = APIRouter()
@@ -18,3 +19,4 @@ api_router.include_router(documents.router, prefix="/documents", tags=["Document
 api_router.include_router(resources.router, prefix="/resources", tags=["Resources"])
 api_router.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
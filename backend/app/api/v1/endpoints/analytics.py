@@ -1,14 +1,24 @@
+import asyncio
+import time
 from typing import Any, Dict
-from fastapi import APIRouter, Depends, Request
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app import models
-from sqlalchemy import func
-from app.models.user import EmploymentStatus, User
+from app import models, schemas
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.services.analytics_query import InvalidQueryError, QueryTimeoutError, run_query
+from app.services.live_analytics import live_analytics, user_summary
 
 router = APIRouter()
 
+# How long an EventSource waits before reconnecting (ms)
+SSE_RETRY_MS = 3000
+
 
 @router.post("/track", response_model=dict)
 async def track_event(
@@ -22,21 +32,66 @@ async def track_event(
 
 @router.get("/summary", response_model=dict)
 def analytics_summary(
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Dict[str, Any]:
-    # Basic summary aggregations
-    db = deps.get_db()
-    session = next(db)
+    return user_summary(db)
+
+
+@router.post("/query", response_model=schemas.AnalyticsQueryResult)
+def analytics_query(
+    query: schemas.AnalyticsQuery,
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+):
+    """
+    Event metrics sliced by any of the supported dimensions and time
+    buckets, answered from the hourly rollups when possible (see
+    app/services/analytics_query.py). Results are cached for a few minutes.
+    """
     try:
-        total_users = session.query(func.count(User.id)).scalar() or 0
-        employed = session.query(func.count(User.id)).filter(User.employment_status == EmploymentStatus.EMPLOYED).scalar() or 0
-        unemployed = session.query(func.count(User.id)).filter(User.employment_status == EmploymentStatus.UNEMPLOYED).scalar() or 0
-    finally:
-        session.close()
-
-    return {
-        "total_users": total_users,
-        "employed": employed,
-        "unemployed": unemployed,
-    }
+        return FastJSONResponse(run_query(db, query))
+    except InvalidQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
+@router.get("/live")
+async def analytics_live(
+    current_user: models.User = Depends(deps.get_streaming_superuser),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of the dashboard figures: a "snapshot" event
+    with the totals, then "delta" events with the changes as they happen
+    (see app/services/live_analytics.py). Streams end after
+    `LIVE_ANALYTICS_MAX_STREAM_SECONDS`, or when the client falls behind,
+    and the client reconnects. Superusers only, like the other dashboard
+    endpoints.
+    """
+
+    async def stream():
+        subscriber = live_analytics.subscribe()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+            deadline = time.monotonic() + settings.LIVE_ANALYTICS_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), settings.LIVE_ANALYTICS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                if message is None:
+                    break
+                yield b"event: %s\ndata: %s\n\n" % (message["type"].encode(), orjson.dumps(message))
+        finally:
+            live_analytics.unsubscribe(subscriber)
 
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx must pass events on as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -11,9 +11,6 @@ from app.core import security
 from app.core.config import settings
 from app.core.security import get_password_hash
 from app.schemas.token import Token
-from jose import jwt
-from jose.exceptions import JWTError
-import requests
 
 router = APIRouter()
 
@@ -136,6 +133,9 @@ def google_login(*, db: Session = Depends(deps.get_db), id_token: str = Body(...
     if not settings.GOOGLE_CLIENT_ID:
         raise HTTPException(status_code=500, detail="Google OAuth not configured")
 
+    # Imported lazily: only this endpoint needs an outbound HTTP client
+    import requests
+
     # Verify token with Google
     try:
         response = requests.get(
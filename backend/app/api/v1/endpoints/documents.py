@@ -1,13 +1,22 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 import os
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from app.models.user import User
 
 from app.api import deps
 from app.core.config import settings
-from app import models
+from app.core.responses import FastJSONResponse
+from app import crud, models, schemas
+from app.core.security import verify_download_token
 from app.models.document import Document, DocumentStatus, DocumentType
+from app.services.document_pipeline import enqueue_document
+from app.services.storage import get_storage
+from app.utils.file_response import RangeFileResponse
+from app.utils.uploads import FileTooLargeError, blob_path, save_upload
 from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -23,62 +32,117 @@ async def upload_document(
     if file.content_type not in settings.ALLOWED_FILE_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    file_location = os.path.join(settings.UPLOAD_DIR, file.filename)
-    content = await file.read()
-    with open(file_location, "wb") as f:
-        f.write(content)
+    filename = os.path.basename(file.filename or "") or "upload"
+    storage = get_storage()
+    try:
+        stored = await save_upload(file, storage)
+    except FileTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
 
-    # Persist metadata
+    # Persist metadata; identical content shares one stored blob
     doc = Document(
         user_id=current_user.id,
         document_type=DocumentType.OTHER,
-        file_path=os.path.basename(file_location),
-        file_name=file.filename,
-        file_size=len(content),
+        file_path=blob_path(stored.sha256),
+        file_name=filename,
+        file_size=stored.size,
         mime_type=file.content_type,
+        checksum=stored.sha256,
         status=DocumentStatus.PENDING,
     )
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
+
+    def persist() -> None:
+        # All of the transaction runs in one worker thread: a write that
+        # waits for a database lock must never block the event loop
+        try:
+            crud.document.acquire_blob(db, sha256=stored.sha256, size=stored.size)
+            db.add(doc)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+
+    try:
+        await run_in_threadpool(persist)
+    except BaseException:
+        await run_in_threadpool(stored.upload.abort)
+        raise
+    # Only after the reference is committed, so blob GC cannot race us
+    await run_in_threadpool(stored.upload.commit, doc.file_path, content_type=file.content_type)
+    # Sniffing, thumbnails and normalization happen off the request path
+    await run_in_threadpool(enqueue_document, doc)
+    # No checksum: processing may re-encode the file and store it under a new one
     return {"id": doc.id, "filename": doc.file_name, "status": doc.status}
 
 
 @router.get("/me", response_model=List[dict])
 def list_my_documents(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
 ):
-    docs = db.query(Document).filter(Document.user_id == current_user.id).all()
-    return [
-        {
-            "id": d.id,
-            "file_name": d.file_name,
-            "status": d.status,
-            "uploaded_at": d.created_at,
-            "mime_type": d.mime_type,
-        }
-        for d in docs
-    ]
+    try:
+        docs, next_cursor = crud.document.get_multi_by_owner_keyset(
+            db, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Rows are built as plain dicts: returning the response directly skips
+    # re-validating them against response_model and jsonable_encoder
+    return FastJSONResponse(
+        [
+            {
+                "id": d.id,
+                "file_name": d.file_name,
+                "status": d.status,
+                "uploaded_at": d.created_at,
+                "mime_type": d.mime_type,
+                "file_url": d.get_absolute_url(),
+            }
+            for d in docs
+        ],
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
 
 
-@router.get("/admin", response_model=List[dict])
+@router.get("/admin", response_model=dict)
 def list_documents_admin(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_superuser),
-    status_filter: str | None = None,
+    status_filter: Optional[DocumentStatus] = None,
+    document_type: Optional[DocumentType] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    q: Optional[str] = Query(None, min_length=3, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=500),
 ):
-    q = db.query(Document, User).join(User, Document.user_id == User.id)
-    if status_filter:
-        try:
-            status_enum = DocumentStatus(status_filter)
-            q = q.filter(Document.status == status_enum)
-        except Exception:
-            pass
-    rows = q.order_by(Document.created_at.desc()).limit(200).all()
-    return [
+    """
+    Filtered review listing, newest first, with facet counts per status and
+    type under the same filters. Invalid filter values are rejected with
+    422; `q` needs at least three characters (the trigram index length).
+    """
+    filters = {
+        "user_id": user_id,
+        "created_from": created_from,
+        "created_to": created_to,
+        "search": q,
+    }
+    try:
+        rows, next_cursor = crud.document.get_multi_admin(
+            db,
+            status=status_filter,
+            document_type=document_type,
+            cursor=cursor,
+            limit=limit,
+            **filters,
+        )
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = [
         {
             "id": doc.id,
             "userId": user.id,
@@ -87,7 +151,10 @@ def list_documents_admin(
             "type": doc.document_type,
             "status": doc.status,
             "uploadedAt": doc.created_at,
-            "fileUrl": f"/static/{doc.file_path}",
+            "fileUrl": doc.get_absolute_url(),
+            "thumbnailUrl": doc.get_absolute_url(variant="thumbnail"),
+            "previewUrl": doc.get_absolute_url(variant="preview"),
+            "pageCount": doc.page_count,
             "fileType": (doc.mime_type or "").split("/")[1] if doc.mime_type else "pdf",
             "fileSize": str(doc.file_size or 0),
             "reviewedBy": doc.verified_by,
@@ -95,6 +162,144 @@ def list_documents_admin(
         }
         for (doc, user) in rows
     ]
+    return FastJSONResponse(
+        {
+            "items": items,
+            "facets": crud.document.get_facets(
+                db, status=status_filter, document_type=document_type, **filters
+            ),
+            "nextCursor": next_cursor,
+        },
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
+
+
+@router.api_route("/{doc_id}/file", methods=["GET", "HEAD"])
+def download_document(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: Optional[models.User] = Depends(deps.get_current_user_optional),
+    doc_id: int,
+    variant: str = Query("original", regex="^(original|thumbnail|preview)$"),
+    token: Optional[str] = None,
+):
+    """
+    Serve a document's original file or a generated thumbnail/preview.
+
+    Authorised by a signed `token` (as embedded in listing URLs) or by the
+    bearer token of the owner or a verifier. Redirects to the object store
+    or CDN when the storage backend has URLs; local files support Range
+    requests and conditional GETs, and content-addressed ones are cached
+    as immutable.
+    """
+    doc = db.query(Document).filter(Document.id == doc_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    allowed = (token and verify_download_token(token, doc.id, variant)) or (
+        current_user is not None
+        and (current_user.id == doc.user_id or crud.user.is_verifier(current_user))
+    )
+    if not allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+    relative = doc.storage_key(variant)
+    if not relative:
+        raise HTTPException(status_code=404, detail="File not found")
+    storage = get_storage()
+    url = storage.url(
+        relative,
+        public=doc.is_public(variant),
+        filename=doc.file_name if variant == "original" else None,
+        content_type=doc.media_type(variant),
+    )
+    if url:
+        # Let the object store / CDN send the bytes
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    # Blobs and their derivatives never change once written
+    content_addressed = bool(doc.checksum) and doc.file_path == blob_path(doc.checksum)
+    etag = f'"{doc.checksum}-{variant}"' if content_addressed else None
+    path = storage.local_path(relative)
+    if path is None:
+        # Backends without local files or URLs (the in-memory fake)
+        if not storage.exists(relative):
+            raise HTTPException(status_code=404, detail="File not found")
+        return Response(
+            storage.read(relative) if request.method != "HEAD" else b"",
+            media_type=doc.media_type(variant),
+            headers={"ETag": etag} if etag else None,
+        )
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    accel = None
+    if settings.UPLOAD_ACCEL_REDIRECT_PREFIX:
+        accel = settings.UPLOAD_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative
+    return RangeFileResponse(
+        path,
+        request_headers=request.headers,
+        media_type=doc.media_type(variant),
+        etag=etag,
+        immutable=content_addressed,
+        filename=doc.file_name if variant == "original" else None,
+        accel_redirect=accel,
+        method=request.method,
+    )
+
+
+def redirect_legacy_upload_link(
+    *,
+    db: Session = Depends(deps.get_read_db),
+    key: str,
+) -> RedirectResponse:
+    """
+    `/static/<file_name>` links from before uploads were content-addressed:
+    redirect to the document's download endpoint, which checks access. Only
+    legacy (checksum-less) originals are looked up; any other key is 404.
+    """
+    doc = None
+    if "/" not in key:
+        doc = (
+            db.query(Document)
+            .filter(Document.checksum.is_(None), Document.file_path == key)
+            .order_by(Document.id)
+            .first()
+        )
+    if doc is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return RedirectResponse(
+        f"{settings.API_V1_STR}/documents/{doc.id}/file",
+        status_code=status.HTTP_301_MOVED_PERMANENTLY,
+    )
+
+
+@router.post("/review", response_model=schemas.DocumentReviewResult)
+def review_documents(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    body: schemas.DocumentReviewRequest,
+):
+    """
+    Verify and/or reject many documents at once, in a single transaction.
+    If an id appears more than once, its last decision wins.
+    """
+    decisions = {item.id: item for item in body.items}
+    verify_ids = [i for i, item in decisions.items() if item.decision == schemas.ReviewDecision.VERIFY]
+    reject_reasons = {
+        i: item.reason or ""
+        for i, item in decisions.items()
+        if item.decision == schemas.ReviewDecision.REJECT
+    }
+    verified, rejected = crud.document.review_many(
+        db, reviewer_id=current_user.id, verify_ids=verify_ids, reject_reasons=reject_reasons
+    )
+    found = set(verified) | set(rejected)
+    return {
+        "verified": verified,
+        "rejected": rejected,
+        "not_found": [i for i in decisions if i not in found],
+    }
 
 
 @router.post("/{doc_id}/verify", response_model=dict)
@@ -104,15 +309,10 @@ def verify_document(
     current_user: models.User = Depends(deps.get_current_active_superuser),
     doc_id: int,
 ):
-    doc = db.query(Document).filter(Document.id == doc_id).first()
-    if not doc:
+    verified, _ = crud.document.review_many(db, reviewer_id=current_user.id, verify_ids=[doc_id])
+    if not verified:
         raise HTTPException(status_code=404, detail="Document not found")
-    doc.status = DocumentStatus.VERIFIED
-    doc.verified_by = current_user.id
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
-    return {"id": doc.id, "status": doc.status}
+    return {"id": doc_id, "status": DocumentStatus.VERIFIED}
 
 
 @router.post("/{doc_id}/reject", response_model=dict)
@@ -123,14 +323,9 @@ def reject_document(
     doc_id: int,
     reason: str = "",
 ):
-    doc = db.query(Document).filter(Document.id == doc_id).first()
-    if not doc:
+    _, rejected = crud.document.review_many(
+        db, reviewer_id=current_user.id, reject_reasons={doc_id: reason}
+    )
+    if not rejected:
         raise HTTPException(status_code=404, detail="Document not found")
-    doc.status = DocumentStatus.REJECTED
-    doc.rejection_reason = reason
-    doc.verified_by = current_user.id
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
-    return {"id": doc.id, "status": doc.status, "rejection_reason": doc.rejection_reason}
-
+    return {"id": doc_id, "status": DocumentStatus.REJECTED, "rejection_reason": reason}
@@ -0,0 +1,78 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.api import deps
+from app.core.responses import FastJSONResponse
+from app.models.job import JobStatus
+from app.services import jobs
+
+router = APIRouter()
+
+
+def _job(job: models.Job) -> dict:
+    return schemas.Job.from_orm(job).dict()
+
+
+@router.get("/", response_model=dict)
+def list_jobs(
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+    name: Optional[str] = Query(None, max_length=100),
+    status_filter: Optional[JobStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """Job runs, newest first, with their status and progress."""
+    try:
+        rows, next_cursor = crud.job.get_multi_filtered(
+            db, name=name, status=status_filter, cursor=cursor, limit=limit
+        )
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return FastJSONResponse(
+        {"items": [_job(job) for job in rows], "nextCursor": next_cursor},
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
+
+
+@router.post("/", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_in: schemas.JobCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+):
+    """Run a job now, in the background; follow it with GET /jobs/{id}."""
+    try:
+        job = jobs.enqueue(db, job_in.name, job_in.args, created_by=current_user.id)
+    except jobs.InvalidJobError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return FastJSONResponse(_job(job), status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(
+    job_id: int,
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+):
+    job = crud.job.get(db, id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(_job(job))
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+):
+    """Cancel a job that has not started, or is waiting to retry."""
+    if not jobs.cancel(db, job_id):
+        if crud.job.get(db, id=job_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail="Only queued jobs can be cancelled")
+    return FastJSONResponse(_job(crud.job.get(db, id=job_id)))
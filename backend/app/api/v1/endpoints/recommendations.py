@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.api import deps
 from app import models
+from app.core.responses import FastJSONResponse
 from app.models.user import EducationalDetail
 from app.models.recommendation import Resource, UserRecommendation
 
@@ -12,7 +13,7 @@ router = APIRouter()
 
 @router.get("/me", response_model=List[dict])
 def get_my_recommendations(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
     # Simple content-based filter using education fields and resource metadata
@@ -34,16 +35,18 @@ def get_my_recommendations(
         return s
 
     ranked = sorted(resources, key=score, reverse=True)[:10]
-    return [
-        {
-            "id": r.id,
-            "title": r.title,
-            "description": r.description,
-            "url": r.url,
-            "score": score(r),
-            "resource_type": r.resource_type,
-            "source": r.source,
-        }
-        for r in ranked
-    ]
+    return FastJSONResponse(
+        [
+            {
+                "id": r.id,
+                "title": r.title,
+                "description": r.description,
+                "url": r.url,
+                "score": score(r),
+                "resource_type": r.resource_type,
+                "source": r.source,
+            }
+            for r in ranked
+        ]
+    )
 
@@ -1,15 +1,86 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app import models
+from app import crud
+from app.core.responses import FastJSONResponse
+from app.models.recommendation import ResourceType
+from app.services.autocomplete import autocomplete
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[dict])
-def list_resources(db: Session = Depends(deps.get_db)):
-    # Placeholder - return empty list to unblock frontend
-    return []
+@router.get("/", response_model=dict)
+def list_resources(
+    db: Session = Depends(deps.get_read_db),
+    q: Optional[str] = Query(None, min_length=2, max_length=100),
+    resource_type: Optional[ResourceType] = None,
+    source: Optional[str] = Query(None, max_length=100),
+    location: Optional[str] = Query(None, max_length=255),
+    active_from: Optional[datetime] = None,
+    active_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """
+    Active catalog, newest first. `q` is a full-text search over title,
+    description and eligibility; `active_from`/`active_to` keep resources
+    open at some point in that window. Facet counts per type, source and
+    location come with the first page only (`cursor` unset).
+    """
+    filters = dict(
+        search=q,
+        resource_type=resource_type,
+        source=source,
+        location=location,
+        active_from=active_from,
+        active_to=active_to,
+    )
+    try:
+        resources, next_cursor = crud.resource.search(db, cursor=cursor, limit=limit, **filters)
+    except crud.InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = [
+        {
+            "id": r.id,
+            "title": r.title,
+            "description": r.description,
+            "url": r.url,
+            "resource_type": r.resource_type,
+            "source": r.source,
+            "location": r.location,
+            "start_date": r.start_date,
+            "end_date": r.end_date,
+        }
+        for r in resources
+    ]
+    return FastJSONResponse(
+        {
+            "items": items,
+            "facets": crud.resource.get_facets(db, **filters) if cursor is None else None,
+            "nextCursor": next_cursor,
+        },
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
 
+
+@router.get("/autocomplete", response_model=List[dict])
+def autocomplete_resources(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+):
+    """
+    Suggestions for the search box: resource titles, tags and areas of
+    interest with a word starting with `q`, most popular first. Served from
+    an in-memory index (see app/services/autocomplete.py).
+    """
+    return FastJSONResponse(
+        [
+            {"text": s.text, "type": s.kind, "id": s.id}
+            for s in autocomplete.suggest(q, limit)
+        ],
+        # Same answer for every user; let browsers reuse it while typing
+        headers={"Cache-Control": "public, max-age=60"},
+    )
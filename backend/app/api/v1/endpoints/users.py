@@ -53,11 +53,10 @@ def upsert_my_education(
     if not edu:
         edu = EducationalDetail(user_id=current_user.id)
         db.add(edu)
-        db.flush()
     for field, value in body.dict(exclude_unset=True).items():
-        setattr(edu, field, value)
-    db.add(edu)
+        if getattr(edu, field) != value:
+            setattr(edu, field, value)
+    # A single INSERT or UPDATE ... RETURNING; no refresh needed
     db.commit()
-    db.refresh(edu)
     return edu
 
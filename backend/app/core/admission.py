@@ -0,0 +1,292 @@
+"""
+Admission control for expensive endpoints.
+
+Under load the write-heavy routes -- event tracking, password login
+(bcrypt), document upload -- compete for the same DB pool and threadpool
+and drag every other endpoint down with them. `AdmissionControlMiddleware`
+turns excess requests away before they reach their route (and before an
+upload body is read), so cheap reads keep their latency:
+
+* per-route concurrency limits, per worker: a request waits at most
+  `max_wait` seconds for a slot and is then shed with 503;
+* token-bucket rate limits per user (bearer token subject) or client IP,
+  over which requests get 429. The IP is the ASGI client address, which
+  uvicorn takes from X-Forwarded-For only for proxies listed in
+  `FORWARDED_ALLOW_IPS` (see gunicorn_conf.py); otherwise every client
+  behind a proxy shares the proxy's bucket. Buckets live in worker memory, or in Redis
+  (`ADMISSION_RATE_LIMIT_BACKEND=redis`) to be shared by all workers and
+  nodes; if Redis is unreachable requests are let through;
+* shedding, with 503, of any request that already queued upstream longer
+  than `ADMISSION_MAX_QUEUE_MS` according to the proxy's X-Request-Start
+  header, since its client has most likely given up.
+
+Every rejection carries Retry-After. Routes without a policy are only
+subject to the queue-time check.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import InvalidTokenError, decode_token
+
+logger = logging.getLogger(__name__)
+
+API = settings.API_V1_STR
+# Liveness probes and scrapes must answer even when everything else is shed
+QUEUE_TIME_EXEMPT = {"/api/health", "/metrics"}
+
+
+class RoutePolicy(NamedTuple):
+    method: str
+    path: str
+    concurrency: Optional[int] = None  # requests in flight per worker
+    max_wait: float = 1.0  # seconds to wait for a slot before shedding
+    rate: Optional[float] = None  # sustained requests per second per client
+    burst: int = 1
+    key: str = "user"  # "user" (falls back to the IP when anonymous) or "ip"
+    pool: Optional[str] = None  # routes naming the same pool share its slots
+
+
+POLICIES = [
+    # bcrypt is CPU-bound: a couple of hashes per worker saturate its core
+    RoutePolicy(
+        "POST", f"{API}/auth/login/access-token",
+        concurrency=2, max_wait=10.0, rate=2, burst=30, key="ip", pool="bcrypt",
+    ),
+    RoutePolicy("POST", f"{API}/auth/register", concurrency=2, max_wait=10.0, pool="bcrypt"),
+    # Holds a DB connection and a thread for the whole body
+    RoutePolicy("POST", f"{API}/documents/upload", concurrency=4, max_wait=5.0, rate=0.5, burst=10),
+    RoutePolicy("POST", f"{API}/analytics/track", concurrency=16, max_wait=0.5, rate=10, burst=30),
+]
+
+
+class ConcurrencyLimit:
+    """A FIFO semaphore whose waiters give up after a deadline."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was handed over just as we left
+            else:
+                self._discard(waiter)
+            raise
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest live waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class MemoryRateLimiter:
+    """Token buckets in this worker's memory, least recently used evicted."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Same bucket as MemoryRateLimiter, atomically in Redis on the server's clock
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter:
+    """Token buckets shared through Redis by every worker and node."""
+
+    def __init__(self, url: str, prefix: str = "admission:") -> None:
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self._warned_at = 0.0
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            return float(await self._take(keys=[self.prefix + key], args=[rate, burst]))
+        except Exception as exc:
+            # Fail open: an outage of the limiter must not become ours
+            if time.monotonic() - self._warned_at > 60:
+                self._warned_at = time.monotonic()
+                logger.warning("Rate limiter backend unavailable, not limiting: %r", exc)
+            return 0.0
+
+
+def create_rate_limiter():
+    backend = settings.ADMISSION_RATE_LIMIT_BACKEND
+    if backend == "redis":
+        return RedisRateLimiter(settings.REDIS_URL)
+    if backend == "memory":
+        return MemoryRateLimiter()
+    raise ValueError(f"Unknown ADMISSION_RATE_LIMIT_BACKEND: {backend!r}")
+
+
+def queue_time(header: str, now: float) -> Optional[float]:
+    """
+    Seconds since the proxy received the request, from an X-Request-Start
+    value in seconds ("t=1700000000.123", nginx), milliseconds (Heroku) or
+    microseconds.
+    """
+    value = header.strip()
+    if value.startswith("t="):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, now - started)
+
+
+def client_key(policy: RoutePolicy, headers: Headers, scope: Scope) -> str:
+    if policy.key == "user":
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                payload = decode_token(token)
+            except InvalidTokenError:
+                payload = {}
+            # Only verified tokens: forged subjects would each get a fresh bucket
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+    # Already the forwarded client address when the peer is a trusted proxy
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, policies=POLICIES, rate_limiter=None) -> None:
+        self.app = app
+        self.policies: Dict[Tuple[str, str], RoutePolicy] = {
+            (policy.method, policy.path): policy for policy in policies
+        }
+        self.limits: Dict[str, ConcurrencyLimit] = {}
+        for policy in policies:
+            if policy.concurrency:
+                pool = policy.pool or policy.path
+                self.limits.setdefault(pool, ConcurrencyLimit(policy.concurrency))
+        self.rate_limiter = rate_limiter or create_rate_limiter()
+        max_queue_ms = settings.ADMISSION_MAX_QUEUE_MS
+        self.max_queue_time = max_queue_ms / 1000 if max_queue_ms else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        route = (scope["method"], path.rstrip("/") or "/")
+        policy = self.policies.get(route)
+        headers = Headers(scope=scope)
+
+        if self.max_queue_time is not None and path not in QUEUE_TIME_EXEMPT:
+            started = headers.get("x-request-start")
+            waited = queue_time(started, time.time()) if started else None
+            if waited is not None and waited > self.max_queue_time:
+                await self._shed(scope, receive, send, policy, 503, "Server busy, request queued too long", 1)
+                return
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        if policy.rate:
+            key = f"{policy.method} {policy.path} {client_key(policy, headers, scope)}"
+            wait = await self.rate_limiter.take(key, policy.rate, policy.burst)
+            if wait > 0:
+                await self._shed(scope, receive, send, policy, 429, "Too many requests", wait)
+                return
+
+        limit = self.limits.get(policy.pool or policy.path)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limit.acquire(policy.max_wait):
+            await self._shed(scope, receive, send, policy, 503, "Server busy, try again shortly", policy.max_wait)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+    async def _shed(self, scope, receive, send, policy, status_code, detail, retry_after) -> None:
+        if policy is not None:
+            # Never routed; lets the metrics label the rejection by route
+            scope["admission.route"] = policy.path
+        await _reject(status_code, detail, retry_after)(scope, receive, send)
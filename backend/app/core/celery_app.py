@@ -0,0 +1,16 @@
+from celery import Celery
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "worker",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+
+celery_app.conf.task_routes = {
+    "app.worker.process_document_task": "documents",
+    "app.worker.run_job_task": "jobs",
+}
+celery_app.conf.task_acks_late = True
+celery_app.conf.worker_prefetch_multiplier = 1
@@ -1,6 +1,7 @@
-from pydantic import BaseSettings, AnyHttpUrl, validator
+from pydantic import BaseSettings, validator
 from typing import List, Union, Optional
 import os
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -18,10 +19,19 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     
     # CORS
-    BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = [
+    BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",  # React frontend
         "http://127.0.0.1:3000",
     ]
+
+    # Checked by hand rather than typed AnyHttpUrl: compiling pydantic's URL
+    # regex costs ~60ms of every worker's start-up
+    @validator("BACKEND_CORS_ORIGINS", each_item=True)
+    def check_cors_origin(cls, value: str) -> str:
+        parts = urlsplit(value)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"not an http(s) origin: {value!r}")
+        return value
     FRONTEND_URL: Optional[str] = os.getenv("FRONTEND_URL")
     
     # Database
@@ -30,12 +40,119 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "pgrkam_db")
     DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+    # Read replicas (comma-separated URLs) for read-only endpoints; replicas
+    # lagging more than REPLICA_MAX_LAG_SECONDS are skipped, and a user's
+    # reads stay on the primary for READ_YOUR_WRITES_SECONDS after their own
+    # writes (tracked in "memory" per worker, or "redis" shared via REDIS_URL)
+    DATABASE_REPLICA_URLS: Union[str, List[str]] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 1.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+    READ_YOUR_WRITES_BACKEND: str = "memory"
+
+    @validator("DATABASE_REPLICA_URLS", pre=True)
+    def split_replica_urls(cls, value: Union[str, List[str]]) -> List[str]:
+        if isinstance(value, str):
+            return [url.strip() for url in value.split(",") if url.strip()]
+        return value
+
+    # Development-only: EXPLAIN each request's queries and warn about
+    # sequential scans on tables with at least INDEX_ADVISOR_MIN_ROWS rows
+    INDEX_ADVISOR_ENABLED: bool = False
+    INDEX_ADVISOR_MIN_ROWS: int = 10_000
+
+    # Development/staging: warn when a request repeats one statement shape more
+    # than QUERY_PROFILER_REPEAT_THRESHOLD times (N+1) or a statement takes
+    # longer than QUERY_PROFILER_SLOW_MS
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 10
+    QUERY_PROFILER_SLOW_MS: float = 100
+
+    # Per-route latency / DB query metrics, Server-Timing headers and GET /metrics
+    METRICS_ENABLED: bool = True
+
+    # Weak ETags (answered with 304) on JSON GETs, and brotli (if installed)
+    # or gzip compression of text-like responses from COMPRESSION_MIN_SIZE bytes
+    ETAGS_ENABLED: bool = True
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Concurrency caps and per-user/IP rate limits for expensive endpoints
+    # (app/core/admission.py); rate limit buckets live in "memory" (per
+    # worker) or "redis" (REDIS_URL, shared by all workers)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_RATE_LIMIT_BACKEND: str = "memory"
+    # Shed requests that waited longer than this before reaching us, per the
+    # proxy's X-Request-Start header (nginx: "t=${msec}"); None to disable
+    ADMISSION_MAX_QUEUE_MS: Optional[int] = None
     
-    # File Storage
+    # File Storage: "local" (UPLOAD_DIR), "s3" (any S3-compatible store) or
+    # "memory" (tests); see app/services/storage.py
+    STORAGE_BACKEND: str = "local"
     UPLOAD_DIR: str = "static/uploads"
+    S3_BUCKET: Optional[str] = None
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. MinIO; None for AWS
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None  # None: boto3's default credential chain
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024
+    # CDN (or static server) in front of the bucket/upload dir; thumbnails and
+    # previews of non-sensitive documents are then STORAGE_PUBLIC_BASE_URL/<key>
+    # (unsigned) instead of signed URLs. Originals are always signed.
+    STORAGE_PUBLIC_BASE_URL: Optional[str] = None
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # read/write uploads 1MB at a time
+    DOWNLOAD_URL_TTL_SECONDS: int = 60 * 60  # signed document URLs live 1-2 windows
+    # When set (e.g. "/protected-uploads/"), local downloads are handed to nginx
+    # via X-Accel-Redirect so the proxy sends the file with sendfile
+    UPLOAD_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    BLOB_GC_GRACE_SECONDS: int = 60 * 60  # keep unreferenced blobs this long
+
+    # Document processing pipeline: "local" (process pool), "celery" or "eager"
+    DOCUMENT_PIPELINE_BROKER: str = "local"
+    DOCUMENT_PIPELINE_WORKERS: int = 2
+    DOCUMENT_MAX_IMAGE_SIDE: int = 3000  # re-encode scans larger than this (px)
+    DOCUMENT_REENCODE_MIN_BYTES: int = 2 * 1024 * 1024  # ... or than this
+    DOCUMENT_THUMBNAIL_SIDE: int = 256
+    DOCUMENT_PREVIEW_SIDE: int = 1600
     ALLOWED_FILE_TYPES: list = ["application/pdf", "image/jpeg", "image/png"]
     
+    # Resource catalog: facet counts are computed on a search's first page
+    # and reused by each worker for this long
+    RESOURCE_FACETS_CACHE_SECONDS: float = 60.0
+    # Autocomplete index (per worker): pick up changed resources this often,
+    # rebuild everything (popularity included) this often
+    AUTOCOMPLETE_REFRESH_SECONDS: float = 30.0
+    AUTOCOMPLETE_REBUILD_SECONDS: float = 15 * 60
+    AUTOCOMPLETE_POPULARITY_DAYS: int = 30  # resource views counted
+
+    # Live dashboard stream (GET /analytics/live): one aggregator per worker
+    # polls for changes this often while anyone is subscribed
+    LIVE_ANALYTICS_INTERVAL_SECONDS: float = 2.0
+    LIVE_ANALYTICS_SNAPSHOT_SECONDS: float = 60.0  # full totals re-read
+    LIVE_ANALYTICS_QUEUE_SIZE: int = 32  # messages a client may lag before it is dropped
+    LIVE_ANALYTICS_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_ANALYTICS_MAX_STREAM_SECONDS: float = 5 * 60  # bounds how long a reload waits on streams
+
+    # Ad-hoc analytics queries (POST /analytics/query)
+    ANALYTICS_QUERY_MAX_DAYS: int = 366
+    ANALYTICS_QUERY_MAX_ROWS: int = 10000
+    ANALYTICS_QUERY_TIMEOUT_SECONDS: float = 10.0
+    ANALYTICS_QUERY_CACHE_SECONDS: float = 5 * 60
+    ANALYTICS_QUERY_CACHE_BACKEND: str = "memory"  # or "redis"
+
+    # Background jobs (app/services/jobs.py): "local" (python -m app.job_worker),
+    # "celery" or "eager"
+    JOB_BROKER: str = "local"
+    JOB_WORKER_PROCESSES: int = 2
+    JOB_POLL_SECONDS: float = 1.0  # idle workers look for due jobs this often
+    JOB_SCHEDULER_INTERVAL_SECONDS: float = 30.0  # periodic jobs, lost workers
+    JOB_LEASE_SECONDS: float = 60.0  # running jobs not renewed for this long are retried
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 1.0  # at most one progress write per job
+
     # ML Configuration
     ML_MODEL_PATH: str = "ml_models/recommendation_model.pkl"
     
@@ -0,0 +1,132 @@
+"""
+Request and database metrics in Prometheus format.
+
+`MetricsMiddleware` records, per route template, request counts, latency,
+requests in flight and the number and duration of DB queries each request
+ran (counted by the engine hooks in app/db/session.py), and adds a
+`Server-Timing` header so the same numbers show up in browser devtools.
+`GET /metrics` serves them.
+
+Under gunicorn every worker keeps its own metrics; set
+`PROMETHEUS_MULTIPROC_DIR` to an empty, writable directory so `/metrics`
+reports all workers together (see gunicorn_conf.py).
+"""
+import os
+import time
+from typing import Callable, Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.session import track_queries
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests served", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to the end of the response body",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "DB statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing DB statements per request",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def _route_templates(app) -> Dict[Callable, str]:
+    # "/api/v1/documents/{doc_id}" rather than one label per document id
+    return {
+        route.endpoint: route.path
+        for route in getattr(app, "routes", [])
+        if hasattr(route, "endpoint")
+    }
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._templates: Dict[Callable, str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            # Requests shed by admission control never reach the router
+            return scope.get("admission.route", UNMATCHED_ROUTE)
+        if endpoint not in self._templates:
+            self._templates = _route_templates(scope.get("app"))
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = (time.perf_counter() - start) * 1000
+                timing = (
+                    f"app;dur={elapsed:.1f}, "
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        IN_PROGRESS.labels(method).inc()
+        try:
+            with track_queries() as stats:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_PROGRESS.labels(method).dec()
+            route = self._route(scope)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            DB_QUERIES.labels(method, route).observe(stats.count)
+            DB_DURATION.labels(method, route).observe(stats.duration)
+
+
+def metrics_response(request: Request) -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        data = generate_latest(registry)
+    else:
+        data = generate_latest(REGISTRY)
+    return Response(data, media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,237 @@
+"""
+Response encoding: fast JSON, weak ETags and compression.
+
+* `FastJSONResponse`, the app's default response class, renders with
+  orjson, several times faster than the stdlib encoder. List endpoints
+  whose rows are already plain dicts return it directly, which also skips
+  FastAPI's `response_model` re-validation and `jsonable_encoder` pass
+  (orjson encodes datetimes, dates, enums and UUIDs natively); the
+  `response_model` then only documents the shape.
+* `ETagMiddleware` tags successful JSON GET responses with a weak ETag of
+  their body and answers a matching If-None-Match with an empty 304.
+* `CompressionMiddleware` compresses text-like responses of at least
+  `COMPRESSION_MIN_SIZE` bytes with brotli, when the `brotli` package is
+  installed and the client accepts it, or gzip.
+
+`python scripts/benchmark_responses.py` measures the difference.
+"""
+import hashlib
+import zlib
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.file_response import REVALIDATE_CACHE, _etag_matches
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _default(obj: Any) -> Any:
+    # What orjson cannot encode itself
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Optional[Message] = None
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] == 200
+                    and "etag" not in headers
+                    and headers.get("content-type", "").startswith("application/json")
+                    and "no-store" not in headers.get("cache-control", "")
+                ):
+                    start = message  # held until the body is known
+                    return
+            elif start is not None:
+                held, start = start, None
+                if message["type"] != "http.response.body" or message.get("more_body", False):
+                    # Streamed: no single body to tag
+                    await send(held)
+                else:
+                    etag = weak_etag(message.get("body", b""))
+                    headers = MutableHeaders(scope=held)
+                    headers["etag"] = etag
+                    headers.setdefault("cache-control", REVALIDATE_CACHE)
+                    if if_none_match and _etag_matches(if_none_match, etag):
+                        del headers["content-length"]
+                        del headers["content-type"]
+                        await send({**held, "status": 304})
+                        await send({"type": "http.response.body", "body": b""})
+                        return
+                    await send(held)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            q = params.strip()
+            try:
+                return not (q.startswith("q=") and float(q[2:]) == 0)
+            except ValueError:
+                return False
+    return False
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def process(self, data: bytes) -> bytes:
+        # Flush every chunk so streamed responses reach the client as they go
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = (
+            settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+        )
+
+    def _encoding(self, scope: Scope) -> Optional[str]:
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept, "br"):
+            return "br"
+        if _accepts(accept, "gzip"):
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._encoding(scope) if scope["type"] == "http" else None
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    message["status"] in (200, 201, 203)
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                    and not content_type.startswith("text/event-stream")
+                    and "content-encoding" not in headers
+                    and "no-transform" not in headers.get("cache-control", "")
+                ):
+                    start = message  # held until the body size is known
+                    return
+                if message["status"] == 304:
+                    # Caches match it to the stored 200, which varied on this
+                    MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                await send(message)
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                held = start
+                headers = MutableHeaders(scope=held)
+                if not more_body and len(body) < self.minimum_size:
+                    start = None
+                    await send(held)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    body = compressor.compress(body)
+                    headers["content-length"] = str(len(body))
+                    await send(held)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(held)
+            data = compressor.process(body)
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,13 +1,32 @@
+import time
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 
-from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# python-jose is imported on first use: it loads `cryptography`, a sizeable
+# share of a worker's start-up, and no token is handled before a request
+
+class InvalidTokenError(ValueError):
+    """A token that is malformed, expired or not signed with SECRET_KEY."""
+
+def decode_token(token: str) -> Dict[str, Any]:
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError as exc:
+        raise InvalidTokenError(str(exc)) from None
+
+def _encode(claims: Dict[str, Any]) -> str:
+    from jose import jwt
+
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -18,10 +37,31 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM
-    )
-    return encoded_jwt
+    return _encode(to_encode)
+
+def create_download_token(document_id: int, variant: str) -> str:
+    """
+    Signed token for a document download URL usable without auth headers
+    (e.g. in <img>/<iframe> src). The expiry is aligned to whole TTL windows
+    so the URL, and with it the browser cache entry, stays stable for a while.
+    """
+    to_encode = {"exp": download_url_expiry(), "sub": f"document:{document_id}:{variant}"}
+    return _encode(to_encode)
+
+def download_url_expiry(window: int = settings.DOWNLOAD_URL_TTL_SECONDS) -> int:
+    """
+    Expiry (epoch seconds) for download URLs issued now: the end of the next
+    whole `window`, so URLs issued within one window are identical and live
+    between one and two windows.
+    """
+    return (int(time.time()) // window + 2) * window
+
+def verify_download_token(token: str, document_id: int, variant: str) -> bool:
+    try:
+        payload = decode_token(token)
+    except InvalidTokenError:
+        return False
+    return payload.get("sub") == f"document:{document_id}:{variant}"
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -1,5 +1,9 @@
 # This file makes the crud directory a Python package
-from .base import CRUDBase
+from .base import BulkRowResult, CRUDBase
+from .document import document
+from .job import job
+from .pagination import InvalidCursorError
+from .resource import resource
 from .user import user
 
-__all__ = ["CRUDBase", "user"]
+__all__ = ["BulkRowResult", "CRUDBase", "InvalidCursorError", "document", "job", "resource", "user"]
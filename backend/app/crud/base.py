@@ -1,15 +1,48 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any, Callable, Dict, Generic, List, NamedTuple, Optional, Sequence, Tuple, Type, TypeVar, Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, insert, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query, Session
 
+from app.crud.pagination import keyset_paginate
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+DEFAULT_CHUNK_SIZE = 500
+
+
+class BulkRowResult(NamedTuple):
+    """Outcome of one input row of a bulk operation, in input order."""
+    index: int
+    id: Optional[Any] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def upsert_insert(db: Session) -> Callable[..., Any]:
+    """
+    Return the dialect's `insert()` construct, which supports ON CONFLICT.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+    return dialect_insert
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -29,12 +62,30 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_multi_keyset(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        query: Optional[Query] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Cursor-paginated listing, newest first.
+
+        Returns the page and an opaque cursor for the next one (None on the
+        last page). Pass `query` to paginate a filtered query of this model.
+        Raises `InvalidCursorError` for a malformed cursor.
+        """
+        if query is None:
+            query = db.query(self.model)
+        return keyset_paginate(query, self.model, cursor=cursor, limit=limit)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
     def update(
@@ -44,21 +95,207 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+
+        # Only touch mapped columns whose value actually changes; the flush
+        # then emits a single UPDATE of those columns, RETURNING any
+        # server-generated ones (see eager_defaults on the model base).
+        columns = inspect(self.model).column_attrs.keys()
+        for field, value in update_data.items():
+            if field in columns and getattr(db_obj, field) != value:
+                setattr(db_obj, field, value)
+
+        if db.is_modified(db_obj):
+            db.add(db_obj)
+            db.commit()
         return db_obj
 
+    def _to_row(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        columns = self.model.__table__.columns
+        return {k: v for k, v in data.items() if k in columns}
+
+    def _run_chunks(
+        self,
+        db: Session,
+        rows: Sequence[Tuple[int, Dict[str, Any]]],
+        chunk_size: int,
+        write_chunk: Callable[[List[Tuple[int, Dict[str, Any]]]], Dict[int, Any]],
+    ) -> List[BulkRowResult]:
+        """
+        Feed (input index, row) pairs to `write_chunk` in chunks, one
+        transaction per chunk.
+
+        `write_chunk` returns the ids it wrote keyed by input index. A failing
+        chunk is rolled back and bisected until the offending rows are
+        isolated: only they are reported with the error, the rest are
+        written. Later chunks still run.
+        """
+        results: List[BulkRowResult] = []
+        for start in range(0, len(rows), chunk_size):
+            results.extend(self._write_chunk(db, list(rows[start:start + chunk_size]), write_chunk))
+        return results
+
+    def _write_chunk(
+        self,
+        db: Session,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        write_chunk: Callable[[List[Tuple[int, Dict[str, Any]]]], Dict[int, Any]],
+    ) -> List[BulkRowResult]:
+        try:
+            ids = write_chunk(chunk)
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            if len(chunk) > 1:
+                middle = len(chunk) // 2
+                return (
+                    self._write_chunk(db, chunk[:middle], write_chunk)
+                    + self._write_chunk(db, chunk[middle:], write_chunk)
+                )
+            return [BulkRowResult(index=chunk[0][0], error=str(getattr(exc, "orig", None) or exc))]
+        return [
+            BulkRowResult(index=i, id=ids[i]) if i in ids
+            else BulkRowResult(index=i, error="Not found")
+            for i, _ in chunk
+        ]
+
+    def _execute_returning_ids(
+        self, db: Session, stmt: Any, chunk: List[Tuple[int, Dict[str, Any]]]
+    ) -> Dict[int, Any]:
+        """
+        Run `stmt` (an INSERT ... RETURNING id with
+        `sort_by_parameter_order=True`, so ids come back in parameter order)
+        for the chunk's rows.
+        """
+        # Multi-row VALUES needs the same columns in every row, so run one
+        # statement per distinct column set in the chunk.
+        groups: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+        for i, row in chunk:
+            groups.setdefault(tuple(sorted(row)), []).append((i, row))
+        ids: Dict[int, Any] = {}
+        for group in groups.values():
+            returned = db.execute(stmt, [row for _, row in group]).scalars().all()
+            ids.update(zip((i for i, _ in group), returned))
+        return ids
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> List[BulkRowResult]:
+        """
+        Insert many rows with multi-row INSERT ... RETURNING id.
+
+        No ORM objects are built or refreshed. Returns one `BulkRowResult`
+        per input row, in input order.
+        """
+        table = self.model.__table__
+        stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        rows = list(enumerate(self._to_row(obj) for obj in objs_in))
+        return self._run_chunks(
+            db, rows, chunk_size, lambda chunk: self._execute_returning_ids(db, stmt, chunk)
+        )
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> List[BulkRowResult]:
+        """
+        Insert many rows, updating the ones that collide on `index_elements`.
+
+        Compiles to INSERT ... ON CONFLICT (...) DO UPDATE ... RETURNING id on
+        PostgreSQL and SQLite 3.35+. `update_fields` limits which columns are
+        overwritten on conflict; by default every supplied non-key column is.
+        """
+        dialect_insert = upsert_insert(db)
+        table = self.model.__table__
+        rows = list(enumerate(self._to_row(obj) for obj in objs_in))
+
+        def write_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Any]:
+            ids: Dict[int, Any] = {}
+            by_keys: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+            for i, row in chunk:
+                by_keys.setdefault(tuple(sorted(row)), []).append((i, row))
+            for keys, group in by_keys.items():
+                stmt = dialect_insert(table)
+                fields = update_fields or [
+                    k for k in keys if k not in index_elements and k != "id"
+                ]
+                # With nothing to change, still "update" a key column to itself
+                # so RETURNING yields an id for conflicting rows too.
+                set_ = {k: stmt.excluded[k] for k in fields or index_elements[:1]}
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(index_elements), set_=set_
+                ).returning(table.c.id, sort_by_parameter_order=True)
+                ids.update(self._execute_returning_ids(db, stmt, group))
+            return ids
+
+        return self._run_chunks(db, rows, chunk_size, write_chunk)
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> List[BulkRowResult]:
+        """
+        Apply per-row changes; every dict must carry the row's `id`.
+
+        Rows changing the same set of columns share one executemany UPDATE.
+        Rows without an id are reported as "Missing id", ids that do not exist
+        as "Not found".
+        """
+        table = self.model.__table__
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        missing: List[BulkRowResult] = []
+        for i, obj in enumerate(objs_in):
+            row = self._to_row(obj)
+            if row.get("id") is None:
+                missing.append(BulkRowResult(index=i, error="Missing id"))
+            else:
+                rows.append((i, row))
+
+        def write_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> Dict[int, Any]:
+            existing = set(
+                db.execute(
+                    select(table.c.id).where(table.c.id.in_([row["id"] for _, row in chunk]))
+                ).scalars()
+            )
+            ids: Dict[int, Any] = {}
+            by_keys: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for i, row in chunk:
+                if row["id"] not in existing:
+                    continue
+                ids[i] = row["id"]
+                changes = {k: v for k, v in row.items() if k != "id"}
+                if changes:
+                    by_keys.setdefault(tuple(sorted(changes)), []).append(
+                        {"_id": row["id"], **changes}
+                    )
+            for keys, params in by_keys.items():
+                stmt = (
+                    update(table)
+                    .where(table.c.id == bindparam("_id"))
+                    .values({k: bindparam(k) for k in keys})
+                )
+                db.execute(stmt, params)
+            return ids
+
+        results = self._run_chunks(db, rows, chunk_size, write_chunk) + missing
+        return sorted(results, key=lambda result: result.index)
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
@@ -0,0 +1,262 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase, upsert_insert
+from app.crud.pagination import bind_timestamp
+from app.models.analytics import ActivityType, UserActivity
+from app.models.document import (
+    Document,
+    DocumentBlob,
+    DocumentCount,
+    DocumentStatus,
+    DocumentType,
+)
+from app.models.user import User
+
+
+class CRUDDocument(CRUDBase[Document, BaseModel, BaseModel]):
+    def get_multi_by_owner_keyset(
+        self, db: Session, *, user_id: int, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Document], Optional[str]]:
+        query = db.query(Document).filter(Document.user_id == user_id)
+        return self.get_multi_keyset(db, cursor=cursor, limit=limit, query=query)
+
+    def get_multi_admin(
+        self,
+        db: Session,
+        *,
+        status: Optional[DocumentStatus] = None,
+        document_type: Optional[DocumentType] = None,
+        user_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Tuple[Document, User]], Optional[str]]:
+        """
+        One keyset page of (Document, owner) rows for the review screen.
+
+        `search` matches the owner's name or email (case-insensitive
+        substring, trigram-indexed on Postgres); it is resolved against
+        users first so the documents side stays on its (filter, created_at,
+        id) indexes.
+        """
+        query = db.query(Document, User).join(User, Document.user_id == User.id)
+        if status is not None:
+            query = query.filter(Document.status == status)
+        if document_type is not None:
+            query = query.filter(Document.document_type == document_type)
+        query = query.filter(
+            *self._admin_filters(
+                db, user_id=user_id, created_from=created_from, created_to=created_to, search=search
+            )
+        )
+        return self.get_multi_keyset(db, cursor=cursor, limit=limit, query=query)
+
+    def get_facets(
+        self,
+        db: Session,
+        *,
+        status: Optional[DocumentStatus] = None,
+        document_type: Optional[DocumentType] = None,
+        user_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        search: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Document counts per status and per type under the listing's filters.
+
+        Each facet applies every filter except its own, so all review tabs
+        and type chips show what selecting them would return. With only
+        status/type filters the counts come from the trigger-maintained
+        `document_counts` table; any other filter needs one GROUP BY over
+        the matching documents.
+        """
+        filters = self._admin_filters(
+            db, user_id=user_id, created_from=created_from, created_to=created_to, search=search
+        )
+        if filters:
+            rows = db.execute(
+                select(Document.status, Document.document_type, func.count().label("count"))
+                .where(*filters)
+                .group_by(Document.status, Document.document_type)
+            )
+        else:
+            rows = db.execute(
+                select(
+                    DocumentCount.status,
+                    DocumentCount.document_type,
+                    func.sum(DocumentCount.count).label("count"),
+                ).group_by(DocumentCount.status, DocumentCount.document_type)
+            )
+        by_status = {s.value: 0 for s in DocumentStatus}
+        by_type = {t.value: 0 for t in DocumentType}
+        for row in rows:
+            if document_type is None or row.document_type == document_type:
+                by_status[row.status.value] += row.count
+            if status is None or row.status == status:
+                by_type[row.document_type.value] += row.count
+        return {"status": by_status, "type": by_type}
+
+    @staticmethod
+    def _admin_filters(
+        db: Session,
+        *,
+        user_id: Optional[int],
+        created_from: Optional[datetime],
+        created_to: Optional[datetime],
+        search: Optional[str],
+    ) -> List[Any]:
+        """Conditions of the review listing other than status and type."""
+        filters: List[Any] = []
+        if user_id is not None:
+            filters.append(Document.user_id == user_id)
+        dialect_name = db.get_bind().dialect.name
+        if created_from is not None:
+            filters.append(
+                Document.created_at >= bind_timestamp(dialect_name, created_from, Document.created_at.type)
+            )
+        if created_to is not None:
+            filters.append(
+                Document.created_at < bind_timestamp(dialect_name, created_to, Document.created_at.type)
+            )
+        if search:
+            pattern = f"%{search}%"
+            filters.append(
+                Document.user_id.in_(
+                    select(User.id).where(or_(User.full_name.ilike(pattern), User.email.ilike(pattern)))
+                )
+            )
+        return filters
+
+    def remove(self, db: Session, *, id: int) -> Document:
+        obj = db.get(Document, id)
+        if obj.checksum:
+            self.release_blob(db, sha256=obj.checksum)
+        db.delete(obj)
+        db.commit()
+        return obj
+
+    def review_many(
+        self,
+        db: Session,
+        *,
+        reviewer_id: int,
+        verify_ids: Sequence[int] = (),
+        reject_reasons: Optional[Dict[int, str]] = None,
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Verify and reject documents in one transaction.
+
+        One UPDATE ... RETURNING per decision (rejection reasons are set per
+        row with a CASE on id), plus one multi-row INSERT of the
+        DOCUMENT_VERIFIED activities. Documents that are already verified
+        keep their reviewer and timestamp and get no second activity.
+        Returns the verified and rejected ids that existed.
+        """
+        verified: List[int] = []
+        rejected: List[int] = []
+        activities = []
+        reviewed = {"verified_by": reviewer_id, "verified_at": func.now()}
+        if verify_ids:
+            rows = db.execute(
+                update(Document)
+                .where(Document.id.in_(list(verify_ids)), Document.status != DocumentStatus.VERIFIED)
+                .values(status=DocumentStatus.VERIFIED, rejection_reason=None, **reviewed)
+                .returning(Document.id, Document.user_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            for doc_id, owner_id in rows:
+                verified.append(doc_id)
+                activities.append({
+                    "user_id": owner_id,
+                    "activity_type": ActivityType.DOCUMENT_VERIFIED,
+                    "entity_type": "document",
+                    "entity_id": doc_id,
+                    "additional_data": {"verified_by": reviewer_id},
+                })
+            unchanged = set(verify_ids) - set(verified)
+            if unchanged:
+                verified += db.execute(
+                    select(Document.id).where(
+                        Document.id.in_(unchanged), Document.status == DocumentStatus.VERIFIED
+                    )
+                ).scalars().all()
+        if reject_reasons:
+            rows = db.execute(
+                update(Document)
+                .where(Document.id.in_(list(reject_reasons)))
+                .values(
+                    status=DocumentStatus.REJECTED,
+                    rejection_reason=case(reject_reasons, value=Document.id),
+                    **reviewed,
+                )
+                .returning(Document.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            rejected = [doc_id for doc_id, in rows]
+        if activities:
+            db.execute(insert(UserActivity), activities)
+        db.commit()
+        return verified, rejected
+
+    def acquire_blob(self, db: Session, *, sha256: str, size: int) -> None:
+        """
+        Count one more reference to the blob, creating its row if needed.
+        Does not commit; call it in the same transaction as the Document insert.
+        """
+        stmt = upsert_insert(db)(DocumentBlob).values(sha256=sha256, size=size, ref_count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["sha256"],
+            set_={"ref_count": DocumentBlob.ref_count + 1, "updated_at": func.now()},
+        )
+        db.execute(stmt)
+
+    def release_blob(self, db: Session, *, sha256: str) -> None:
+        db.execute(
+            update(DocumentBlob)
+            .where(DocumentBlob.sha256 == sha256, DocumentBlob.ref_count > 0)
+            .values(ref_count=DocumentBlob.ref_count - 1)
+        )
+
+    def get_unreferenced_blobs(
+        self, db: Session, *, released_before: datetime, limit: int = 1000
+    ) -> List[str]:
+        return list(
+            db.execute(
+                select(DocumentBlob.sha256)
+                .where(DocumentBlob.ref_count == 0, DocumentBlob.updated_at < released_before)
+                .limit(limit)
+            ).scalars()
+        )
+
+    def delete_unreferenced_blob(self, db: Session, *, sha256: str, released_before: datetime) -> bool:
+        """
+        Delete the blob row if it is still unreferenced. Returns True if it
+        was deleted; the caller removes the file before committing, so a
+        concurrent upload of the same content waits for (or re-creates) it.
+        """
+        result = db.execute(
+            delete(DocumentBlob).where(
+                DocumentBlob.sha256 == sha256,
+                DocumentBlob.ref_count == 0,
+                DocumentBlob.updated_at < released_before,
+            )
+        )
+        return result.rowcount > 0
+
+    def get_known_blobs(self, db: Session, *, sha256s: Iterable[str]) -> Set[str]:
+        return set(
+            db.execute(
+                select(DocumentBlob.sha256).where(DocumentBlob.sha256.in_(list(sha256s)))
+            ).scalars()
+        )
+
+
+document = CRUDDocument(Document)
@@ -0,0 +1,28 @@
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.job import Job, JobStatus
+
+
+class CRUDJob(CRUDBase[Job, BaseModel, BaseModel]):
+    def get_multi_filtered(
+        self,
+        db: Session,
+        *,
+        name: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Job], Optional[str]]:
+        query = db.query(Job)
+        if name is not None:
+            query = query.filter(Job.name == name)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        return self.get_multi_keyset(db, cursor=cursor, limit=limit, query=query)
+
+
+job = CRUDJob(Job)
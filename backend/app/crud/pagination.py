@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple, Type
+
+from sqlalchemy import String, literal, tuple_
+from sqlalchemy.orm import Query
+
+from app.db.base_class import Base
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor token cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Build an opaque cursor token for the (`created_at`, `id`) position of a row.
+    """
+    raw = json.dumps([created_at.isoformat(), id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
+
+
+def bind_timestamp(dialect_name: str, value: datetime, type_: Any) -> Any:
+    """`value` as a bind parameter comparable with a stored DateTime column."""
+    # SQLite keeps DateTime as text, and `server_default=func.now()` writes it
+    # without fractional seconds while SQLAlchemy binds "...:SS.ffffff".
+    # Compare like with like so rows sharing a timestamp are not repeated.
+    if dialect_name == "sqlite":
+        if value.tzinfo is not None:  # CURRENT_TIMESTAMP is naive UTC
+            value = value.astimezone(timezone.utc)
+        text = value.strftime("%Y-%m-%d %H:%M:%S")
+        if value.microsecond:
+            text += f".{value.microsecond:06d}"
+        return literal(text, String)
+    return literal(value, type_)
+
+
+def _bind_created_at(query: Query, model: Type[Base], value: datetime) -> Any:
+    return bind_timestamp(query.session.get_bind().dialect.name, value, model.created_at.type)
+
+
+def keyset_paginate(
+    query: Query,
+    model: Type[Base],
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of `query`, newest first, plus the cursor for the next page.
+
+    Pages are anchored on (`created_at`, `id`) of `model` rather than an
+    OFFSET, so page N costs the same as page 1 given an index on those
+    columns. `query` may select extra entities (e.g. a join) as long as
+    `model` is one of them. The next cursor is None on the last page.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(model.created_at, model.id)
+            < tuple_(_bind_created_at(query, model, created_at), last_id)
+        )
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    if not isinstance(last, model):
+        last = next(entity for entity in last if isinstance(entity, model))
+    return rows, encode_cursor(last.created_at, last.id)
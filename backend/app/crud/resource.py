@@ -0,0 +1,168 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import Integer, and_, cast, column, func, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.db.search import SEARCH_CONFIG, has_resource_search
+from app.models.recommendation import Resource, ResourceType
+
+# Facet values listed for the free-form columns, most frequent first
+FACET_VALUES_LIMIT = 20
+FACET_CACHE_SIZE = 1024
+
+
+class CRUDResource(CRUDBase[Resource, BaseModel, BaseModel]):
+    def __init__(self, model):
+        super().__init__(model)
+        self._search_index: Dict[str, bool] = {}
+        self._facet_cache: "OrderedDict[tuple, Tuple[float, Dict[str, Dict[str, int]]]]" = OrderedDict()
+        self._facet_lock = threading.Lock()
+
+    def get_multi_active_keyset(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Resource], Optional[str]]:
+        query = db.query(Resource).filter(Resource.is_active == True)  # noqa: E712
+        return self.get_multi_keyset(db, cursor=cursor, limit=limit, query=query)
+
+    def _search_condition(self, db: Session, search: str) -> Any:
+        bind = db.get_bind()
+        if bind.dialect.name == "postgresql":
+            return literal_column("resources.search_vector").op("@@")(
+                func.plainto_tsquery(cast(SEARCH_CONFIG, REGCONFIG), search)
+            )
+        # Words only, each quoted, so user input is never FTS5 query syntax
+        terms = re.findall(r"\w+", search)
+        if not terms:
+            return None
+        key = str(bind.url)
+        if key not in self._search_index:
+            self._search_index[key] = has_resource_search(db.connection())
+        if self._search_index[key]:
+            matches = (
+                text("SELECT rowid FROM resources_fts WHERE resources_fts MATCH :match")
+                .bindparams(match=" ".join(f'"{term}"' for term in terms))
+                .columns(column("rowid", Integer))
+            )
+            return Resource.id.in_(matches)
+        return and_(
+            *(
+                or_(Resource.title.ilike(f"%{term}%"), Resource.description.ilike(f"%{term}%"))
+                for term in terms
+            )
+        )
+
+    def _filter_active(
+        self,
+        db: Session,
+        query: Query,
+        *,
+        search: Optional[str] = None,
+        resource_type: Optional[ResourceType] = None,
+        source: Optional[str] = None,
+        location: Optional[str] = None,
+        active_from: Optional[datetime] = None,
+        active_to: Optional[datetime] = None,
+    ) -> Query:
+        query = query.filter(Resource.is_active == True)  # noqa: E712
+        if search:
+            condition = self._search_condition(db, search)
+            if condition is not None:
+                query = query.filter(condition)
+        if resource_type is not None:
+            query = query.filter(Resource.resource_type == resource_type)
+        if source is not None:
+            query = query.filter(Resource.source == source)
+        if location is not None:
+            query = query.filter(Resource.location == location)
+        # Open at some point in the window; open-ended dates always match
+        if active_from is not None:
+            query = query.filter(or_(Resource.end_date.is_(None), Resource.end_date >= active_from))
+        if active_to is not None:
+            query = query.filter(or_(Resource.start_date.is_(None), Resource.start_date <= active_to))
+        return query
+
+    def search(
+        self,
+        db: Session,
+        *,
+        search: Optional[str] = None,
+        resource_type: Optional[ResourceType] = None,
+        source: Optional[str] = None,
+        location: Optional[str] = None,
+        active_from: Optional[datetime] = None,
+        active_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Resource], Optional[str]]:
+        """
+        One keyset page of the active catalog, newest first.
+
+        `search` is matched against the full-text index (all words must
+        occur, stemmed); the other filters are exact. The active window
+        keeps resources open at some point between `active_from` and
+        `active_to`.
+        """
+        query = self._filter_active(
+            db,
+            db.query(Resource),
+            search=search,
+            resource_type=resource_type,
+            source=source,
+            location=location,
+            active_from=active_from,
+            active_to=active_to,
+        )
+        return self.get_multi_keyset(db, cursor=cursor, limit=limit, query=query)
+
+    def get_facets(self, db: Session, **filters: Any) -> Dict[str, Dict[str, int]]:
+        """
+        Counts per type, source and location for a search, each narrowed by
+        every filter except its own so the alternatives stay visible.
+        Takes the keyword filters of `search` and caches the result for
+        `RESOURCE_FACETS_CACHE_SECONDS`. The cache is per worker and is not
+        cleared on writes, so counts may trail resource changes by up to
+        that long while the listing itself is current.
+        """
+        key = tuple(sorted(filters.items()))
+        now = time.monotonic()
+        with self._facet_lock:
+            cached = self._facet_cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._facet_cache.move_to_end(key)
+                return cached[1]
+
+        facets: Dict[str, Dict[str, int]] = {"resource_type": {t.value: 0 for t in ResourceType}}
+        for name in ("resource_type", "source", "location"):
+            facet_column = getattr(Resource, name)
+            count = func.count(Resource.id).label("count")
+            query = self._filter_active(
+                db, db.query(facet_column, count), **{**filters, name: None}
+            ).group_by(facet_column)
+            if name != "resource_type":
+                query = (
+                    query.filter(facet_column.isnot(None))
+                    .order_by(count.desc(), facet_column)
+                    .limit(FACET_VALUES_LIMIT)
+                )
+            counts = facets.setdefault(name, {})
+            for value, n in query:
+                counts[value.value if isinstance(value, ResourceType) else value] = n
+
+        with self._facet_lock:
+            self._facet_cache[key] = (now + settings.RESOURCE_FACETS_CACHE_SECONDS, facets)
+            self._facet_cache.move_to_end(key)
+            while len(self._facet_cache) > FACET_CACHE_SIZE:
+                self._facet_cache.popitem(last=False)
+        return facets
+
+
+resource = CRUDResource(Resource)
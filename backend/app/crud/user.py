@@ -1,9 +1,9 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.crud.base import DEFAULT_CHUNK_SIZE, BulkRowResult, CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserRole
 
@@ -25,9 +25,24 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return db_obj
     
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[UserCreate], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> List[BulkRowResult]:
+        rows = [
+            {
+                "email": obj_in.email,
+                "hashed_password": get_password_hash(obj_in.password),
+                "full_name": obj_in.full_name,
+                "phone_number": obj_in.phone_number,
+                "role": UserRole.USER,
+                "is_active": True,
+            }
+            for obj_in in objs_in
+        ]
+        return super().create_many(db, objs_in=rows, chunk_size=chunk_size)
+
     def update(
         self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
     ) -> User:
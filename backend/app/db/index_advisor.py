@@ -0,0 +1,124 @@
+"""
+Development-mode index advisor.
+
+Captures the SELECT statements each request emits, runs EXPLAIN on them
+after the response is sent and logs a warning for every full table scan of
+a table with at least `INDEX_ADVISOR_MIN_ROWS` rows. Enable it with
+`INDEX_ADVISOR_ENABLED=true`; it is never meant to run in production.
+"""
+import json
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from anyio import to_thread
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.index_advisor")
+
+# (statement, parameters) captured for the request being served
+_captured: ContextVar[Optional[List[Tuple[str, Any]]]] = ContextVar(
+    "index_advisor_statements", default=None
+)
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany) -> None:
+    statements = _captured.get()
+    if statements is not None and not executemany:
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+
+class IndexAdvisor:
+    def __init__(self, engine: Engine, min_rows: int = 10_000) -> None:
+        self.engine = engine
+        self.min_rows = min_rows
+        # Statement shapes already explained; the plan rarely changes per call
+        self._seen: Set[str] = set()
+        event.listen(engine, "before_cursor_execute", _capture)
+
+    def explain(self, statement: str, parameters: Any) -> List[Tuple[str, int]]:
+        """Return (table, approximate rows) for each large table scanned in full."""
+        with self.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return self._explain_postgresql(conn, statement, parameters)
+            if conn.dialect.name == "sqlite":
+                return self._explain_sqlite(conn, statement, parameters)
+        return []
+
+    def _explain_postgresql(self, conn, statement: str, parameters: Any) -> List[Tuple[str, int]]:
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node.get("Node Type") == "Seq Scan":
+                table = node["Relation Name"]
+                rows = conn.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {"t": table}
+                ).scalar() or 0
+                if rows >= self.min_rows:
+                    scans.append((table, rows))
+        return scans
+
+    def _explain_sqlite(self, conn, statement: str, parameters: Any) -> List[Tuple[str, int]]:
+        scans = []
+        for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            detail = row[-1]
+            # "SCAN users" is a full scan; "SCAN users USING INDEX ..." is not
+            if not detail.startswith("SCAN ") or " USING " in detail:
+                continue
+            table = detail.split()[1]
+            rows = conn.exec_driver_sql(f'SELECT count(*) FROM "{table}"').scalar() or 0
+            if rows >= self.min_rows:
+                scans.append((table, rows))
+        return scans
+
+    def review(self, route: str, statements: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        findings = []
+        for statement, parameters in statements:
+            if statement in self._seen:
+                continue
+            self._seen.add(statement)
+            try:
+                scans = self.explain(statement, parameters)
+            except Exception:  # advisory only; never let it break a request
+                logger.debug("EXPLAIN failed for %s", statement, exc_info=True)
+                continue
+            for table, rows in scans:
+                logger.warning(
+                    "%s: sequential scan on %s (~%d rows)\n%s", route, table, rows, statement
+                )
+                findings.append({"route": route, "table": table, "rows": rows, "statement": statement})
+        return findings
+
+
+class IndexAdvisorMiddleware:
+    """ASGI middleware that runs the advisor over each HTTP request's queries."""
+
+    def __init__(self, app, engine: Engine, min_rows: Optional[int] = None) -> None:
+        self.app = app
+        self.advisor = IndexAdvisor(
+            engine, min_rows=settings.INDEX_ADVISOR_MIN_ROWS if min_rows is None else min_rows
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements: List[Tuple[str, Any]] = []
+        token = _captured.set(statements)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _captured.reset(token)
+        if statements:
+            route = f"{scope['method']} {scope['path']}"
+            await to_thread.run_sync(self.advisor.review, route, statements)
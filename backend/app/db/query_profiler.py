@@ -0,0 +1,208 @@
+"""
+N+1 and slow-query detector for development, staging and tests.
+
+Groups the statements a request runs by shape (the SQL text with IN-lists
+collapsed) and warns when one shape repeats more than
+`QUERY_PROFILER_REPEAT_THRESHOLD` times -- the signature of lazy-loaded
+relationships being walked row by row, e.g. `orm_mode` schemas serializing
+`User.documents` or `Resource.tags` for every item of a list. Statements
+slower than `QUERY_PROFILER_SLOW_MS` are logged with their parameters and
+the application line that issued them.
+
+* Middleware: set `QUERY_PROFILER_ENABLED=true`; findings are logged by the
+  `app.query_profiler` logger.
+* Tests: the `query_profiler` pytest fixture (backend/conftest.py) profiles
+  the whole test and fails it on a suspected N+1.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.query_profiler")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class NPlusOneError(AssertionError):
+    """A statement shape repeated more often than the threshold allows."""
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def statement_origin() -> str:
+    """
+    The innermost application frame on the stack (outside this module),
+    or the innermost non-SQLAlchemy frame when the query comes from
+    framework code such as response serialization.
+    """
+    fallback = None
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if frame.filename == __file__:
+            continue
+        if frame.filename.startswith(_APP_DIR):
+            path = os.path.relpath(frame.filename, os.path.dirname(_APP_DIR))
+            return f"{path}:{frame.lineno} in {frame.name}"
+        if fallback is None and "sqlalchemy" not in frame.filename:
+            fallback = f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return fallback or "<unknown>"
+
+
+class StatementGroup:
+    __slots__ = ("shape", "count", "duration", "origin")
+
+    def __init__(self, shape: str, origin: str) -> None:
+        self.shape = shape
+        self.count = 0
+        self.duration = 0.0
+        self.origin = origin
+
+
+class QueryProfile:
+    """Statements seen in one request (or one test)."""
+
+    def __init__(self, label: str, *, threshold: int, slow_ms: float) -> None:
+        self.label = label
+        self.threshold = threshold
+        self.slow_ms = slow_ms
+        self.groups: Dict[str, StatementGroup] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(group.count for group in self.groups.values())
+
+    def record(self, statement: str, parameters: Any, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        slow = elapsed * 1000 >= self.slow_ms
+        with self._lock:
+            group = self.groups.get(shape)
+            if group is None:
+                # Walking the stack is costly; only once per shape
+                group = self.groups[shape] = StatementGroup(shape, statement_origin())
+            group.count += 1
+            group.duration += elapsed
+        if slow:
+            logger.warning(
+                "%s: slow query (%.1f ms) from %s\n%s\nparameters: %r",
+                self.label, elapsed * 1000, statement_origin(), statement, parameters,
+            )
+
+    def repeated(self) -> List[StatementGroup]:
+        return sorted(
+            (group for group in self.groups.values() if group.count > self.threshold),
+            key=lambda group: -group.count,
+        )
+
+    def report(self) -> List[StatementGroup]:
+        """Log each suspected N+1 and return the offending groups."""
+        offenders = self.repeated()
+        for group in offenders:
+            logger.warning(
+                "%s: possible N+1, %d similar queries (%.1f ms) from %s\n%s",
+                self.label, group.count, group.duration * 1000, group.origin, group.shape,
+            )
+        return offenders
+
+    def check(self) -> None:
+        """Raise `NPlusOneError` if any statement shape repeated too often."""
+        offenders = self.repeated()
+        if offenders:
+            raise NPlusOneError(
+                "\n".join(
+                    f"{group.count} similar queries from {group.origin}: {group.shape}"
+                    for group in offenders
+                )
+            )
+
+
+# Profile of the request being served (middleware) ...
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+# ... or one shared by every thread (tests, where TestClient runs the app
+# in another thread and context variables do not follow)
+_global_profile: Optional[QueryProfile] = None
+_installed: Dict[int, bool] = {}
+
+
+def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None or _global_profile is not None:
+        conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get() or _global_profile
+    starts = conn.info.get("query_profiler_start")
+    if profile is None or not starts:
+        return
+    profile.record(statement, parameters, time.perf_counter() - starts.pop())
+
+
+def _error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_profiler_start"):
+        conn.info["query_profiler_start"].pop()
+
+
+def install(engine: Engine) -> None:
+    """Register the statement hooks on `engine` (idempotent)."""
+    if _installed.get(id(engine)):
+        return
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _error)
+    _installed[id(engine)] = True
+
+
+def start_global_profile(label: str, *, threshold: int, slow_ms: float) -> QueryProfile:
+    global _global_profile
+    _global_profile = QueryProfile(label, threshold=threshold, slow_ms=slow_ms)
+    return _global_profile
+
+
+def stop_global_profile() -> None:
+    global _global_profile
+    _global_profile = None
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that profiles each HTTP request's queries."""
+
+    def __init__(
+        self,
+        app,
+        engine: Engine,
+        threshold: Optional[int] = None,
+        slow_ms: Optional[float] = None,
+    ) -> None:
+        self.app = app
+        self.threshold = settings.QUERY_PROFILER_REPEAT_THRESHOLD if threshold is None else threshold
+        self.slow_ms = settings.QUERY_PROFILER_SLOW_MS if slow_ms is None else slow_ms
+        install(engine)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(
+            f"{scope['method']} {scope['path']}", threshold=self.threshold, slow_ms=self.slow_ms
+        )
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            profile.report()
@@ -0,0 +1,205 @@
+"""
+Read-replica routing for read-only endpoints.
+
+Endpoints that only read (listings, analytics, recommendations) take their
+session from `deps.get_read_db`, which binds it to one of the
+`DATABASE_REPLICA_URLS` engines instead of the primary:
+
+* each replica's replication lag is checked at most every
+  `REPLICA_LAG_CHECK_INTERVAL_SECONDS`; replicas lagging more than
+  `REPLICA_MAX_LAG_SECONDS`, or unreachable, are skipped, and with none
+  left reads go to the primary;
+* read-your-writes: for `READ_YOUR_WRITES_SECONDS` after a user commits a
+  write, that user's reads go to the primary. The marks live in worker
+  memory, or in Redis (`READ_YOUR_WRITES_BACKEND=redis`) to hold across
+  workers and nodes.
+
+Lag is read from Postgres' WAL replay position; other databases report
+none. To try it locally, point DATABASE_REPLICA_URLS at a copy of the
+primary: a second SQLite file (`sqlite3 app.db ".backup replica.db"`) or a
+second local Postgres database.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InvalidRequestError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal, replica_engines
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; 0 when fully replayed (an idle primary writes
+# nothing, so the last replay timestamp alone would look like growing lag)
+LAG_QUERIES = {
+    "postgresql": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """,
+}
+
+
+class Replica:
+    __slots__ = ("engine", "lag", "healthy", "checked_at", "lock")
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.lag = 0.0
+        self.healthy = False
+        self.checked_at = float("-inf")
+        self.lock = threading.Lock()
+
+
+class ReplicaSet:
+    def __init__(self, engines: List[Engine], *, max_lag: float, check_interval: float) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+
+    def _check(self, replica: Replica) -> None:
+        query = LAG_QUERIES.get(replica.engine.dialect.name, "SELECT 0")
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag = float(conn.execute(text(query)).scalar() or 0)
+            replica.healthy = True
+        except SQLAlchemyError as exc:
+            if replica.healthy:
+                logger.warning("Read replica %s unavailable: %r", replica.engine.url, exc)
+            replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def _refresh(self, replica: Replica) -> None:
+        if time.monotonic() - replica.checked_at < self.check_interval:
+            return
+        # One thread checks; the others go on with the last known state
+        if not replica.lock.acquire(blocking=False):
+            return
+        try:
+            self._check(replica)
+        finally:
+            replica.lock.release()
+
+    def pick(self) -> Optional[Engine]:
+        """A healthy replica within the lag bound, round robin, or None."""
+        for replica in self.replicas:
+            self._refresh(replica)
+        fresh = [r for r in self.replicas if r.healthy and r.lag <= self.max_lag]
+        if not fresh:
+            return None
+        return fresh[next(self._turn) % len(fresh)].engine
+
+
+class MemoryRecentWrites:
+    """Users who wrote recently, in this worker's memory."""
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.window
+            if len(self._until) > 10_000:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def wrote_recently(self, user_id: int) -> bool:
+        return self._until.get(user_id, 0.0) > time.monotonic()
+
+
+class RedisRecentWrites:
+    """Users who wrote recently, shared through Redis by every worker and node."""
+
+    def __init__(self, url: str, window: float, prefix: str = "recent-write:") -> None:
+        import redis
+
+        self.window_ms = int(window * 1000)
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def mark(self, user_id: int) -> None:
+        try:
+            self._client.set(f"{self.prefix}{user_id}", 1, px=self.window_ms)
+        except Exception as exc:
+            logger.warning("Could not record write by user %s: %r", user_id, exc)
+
+    def wrote_recently(self, user_id: int) -> bool:
+        try:
+            return bool(self._client.exists(f"{self.prefix}{user_id}"))
+        except Exception:
+            return True  # unknown: the primary is always correct
+
+
+def create_recent_writes():
+    backend = settings.READ_YOUR_WRITES_BACKEND
+    if backend == "redis":
+        return RedisRecentWrites(settings.REDIS_URL, settings.READ_YOUR_WRITES_SECONDS)
+    if backend == "memory":
+        return MemoryRecentWrites(settings.READ_YOUR_WRITES_SECONDS)
+    raise ValueError(f"Unknown READ_YOUR_WRITES_BACKEND: {backend!r}")
+
+
+replicas = ReplicaSet(
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+)
+recent_writes = create_recent_writes()
+
+
+def read_session(user_id: Optional[int] = None) -> Session:
+    """
+    A session for read-only work: on a fresh replica if there is one and
+    `user_id` has not just written, otherwise on the primary.
+    """
+    if replicas.replicas and (user_id is None or not recent_writes.wrote_recently(user_id)):
+        engine = replicas.pick()
+        if engine is not None:
+            db = SessionLocal(bind=engine)
+            db.info["read_only"] = True
+            return db
+    return SessionLocal()
+
+
+# Sessions know their user once deps.get_current_user has run; a commit
+# that wrote anything then keeps that user's reads on the primary
+@event.listens_for(SessionLocal, "before_flush")
+def _check_writable(session, flush_context, instances) -> None:
+    if session.info.get("read_only"):
+        raise InvalidRequestError("Session is bound to a read replica and cannot write")
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flush(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_statement(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if orm_execute_state.session.info.get("read_only"):
+            raise InvalidRequestError("Session is bound to a read replica and cannot write")
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_writer(session) -> None:
+    user_id = session.info.get("user_id")
+    if session.info.pop("wrote", False) and user_id is not None:
+        recent_writes.mark(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_writes(session) -> None:
+    session.info.pop("wrote", None)
@@ -0,0 +1,137 @@
+"""
+Trigger-maintained hourly event rollups.
+
+`analytics_event_rollups` holds one row per (UTC hour, event_name) with the
+number of analytics events in it, kept exact by triggers on
+`analytics_events` like `document_counts` (see counters.py). On Postgres
+the triggers are per statement and read the transition tables, so a
+batched insert costs one upsert per (hour, event_name) it touches rather
+than one per row. The analytics query planner (app/services/
+analytics_query.py) answers event counts by name and time from here
+instead of scanning the events.
+"""
+from typing import List
+
+_PG_BUCKET = "date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"
+
+POSTGRESQL_EVENT_ROLLUP_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION analytics_event_rollups_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE analytics_event_rollups r SET count = r.count - o.count
+            FROM (
+                SELECT {_PG_BUCKET} AS bucket, event_name, count(*) AS count
+                FROM old_rows WHERE created_at IS NOT NULL GROUP BY 1, 2
+            ) o
+            WHERE r.bucket = o.bucket AND r.event_name = o.event_name;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO analytics_event_rollups (bucket, event_name, count)
+            SELECT {_PG_BUCKET}, event_name, count(*)
+            FROM new_rows WHERE created_at IS NOT NULL GROUP BY 1, 2
+            ON CONFLICT (bucket, event_name)
+            DO UPDATE SET count = analytics_event_rollups.count + EXCLUDED.count;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS analytics_events_rollup_insert ON analytics_events",
+    """
+    CREATE TRIGGER analytics_events_rollup_insert AFTER INSERT ON analytics_events
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_event_rollups_sync()
+    """,
+    "DROP TRIGGER IF EXISTS analytics_events_rollup_delete ON analytics_events",
+    """
+    CREATE TRIGGER analytics_events_rollup_delete AFTER DELETE ON analytics_events
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_event_rollups_sync()
+    """,
+    "DROP TRIGGER IF EXISTS analytics_events_rollup_update ON analytics_events",
+    """
+    CREATE TRIGGER analytics_events_rollup_update AFTER UPDATE ON analytics_events
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION analytics_event_rollups_sync()
+    """,
+]
+
+_SQLITE_BUCKET = "strftime('%Y-%m-%d %H:00:00', {row}.created_at)"
+# Rows without a timestamp have no bucket and are not counted
+_SQLITE_INCREMENT = f"""
+        INSERT INTO analytics_event_rollups (bucket, event_name, count)
+        SELECT {_SQLITE_BUCKET.format(row="NEW")}, NEW.event_name, 1
+        WHERE NEW.created_at IS NOT NULL
+        ON CONFLICT (bucket, event_name) DO UPDATE SET count = count + 1;
+"""
+_SQLITE_DECREMENT = f"""
+        UPDATE analytics_event_rollups SET count = count - 1
+        WHERE bucket = {_SQLITE_BUCKET.format(row="OLD")} AND event_name = OLD.event_name;
+"""
+
+SQLITE_EVENT_ROLLUP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analytics_events_rollup_insert AFTER INSERT ON analytics_events
+    BEGIN {_SQLITE_INCREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analytics_events_rollup_delete AFTER DELETE ON analytics_events
+    BEGIN {_SQLITE_DECREMENT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analytics_events_rollup_update
+    AFTER UPDATE OF event_name, created_at ON analytics_events
+    WHEN OLD.event_name IS NOT NEW.event_name OR OLD.created_at IS NOT NEW.created_at
+    BEGIN {_SQLITE_DECREMENT} {_SQLITE_INCREMENT} END
+    """,
+]
+
+DROP_EVENT_ROLLUP_TRIGGERS = {
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_update ON analytics_events",
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_delete ON analytics_events",
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_insert ON analytics_events",
+        "DROP FUNCTION IF EXISTS analytics_event_rollups_sync()",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_update",
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_delete",
+        "DROP TRIGGER IF EXISTS analytics_events_rollup_insert",
+    ],
+}
+
+BACKFILL_EVENT_ROLLUPS = {
+    "postgresql": f"""
+        INSERT INTO analytics_event_rollups (bucket, event_name, count)
+        SELECT {_PG_BUCKET}, event_name, count(*) FROM analytics_events
+        WHERE created_at IS NOT NULL GROUP BY 1, 2
+    """,
+    "sqlite": f"""
+        INSERT INTO analytics_event_rollups (bucket, event_name, count)
+        SELECT {_SQLITE_BUCKET.format(row="analytics_events")}, event_name, count(*)
+        FROM analytics_events WHERE created_at IS NOT NULL GROUP BY 1, 2
+    """,
+}
+
+
+def event_rollup_triggers(dialect_name: str) -> List[str]:
+    if dialect_name == "postgresql":
+        return POSTGRESQL_EVENT_ROLLUP_TRIGGERS
+    if dialect_name == "sqlite":
+        return SQLITE_EVENT_ROLLUP_TRIGGERS
+    raise NotImplementedError(f"Event rollup triggers are not supported on {dialect_name}")
+
+
+def has_event_rollup_triggers(connection) -> bool:
+    if connection.dialect.name == "postgresql":
+        query = "SELECT 1 FROM pg_trigger WHERE tgname = 'analytics_events_rollup_update'"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'analytics_events_rollup_update'"
+    return connection.exec_driver_sql(query).first() is not None
+
+
+def install_event_rollup_triggers(target, connection, **kw) -> None:
+    """`after_create` listener for the analytics_events table."""
+    for statement in event_rollup_triggers(connection.dialect.name):
+        connection.exec_driver_sql(statement)
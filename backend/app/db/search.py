@@ -0,0 +1,141 @@
+"""
+Full-text search over the resource catalog, and substring search over users.
+
+On PostgreSQL `resources.search_vector` is a stored generated tsvector of
+the title, description and eligibility text with a GIN index on it, so it
+is kept current by the database on every write path and a match is an
+index lookup. On SQLite an external-content FTS5 table `resources_fts`
+indexes the same columns (porter-stemmed, like the English configuration
+on Postgres) and is kept in sync by triggers. SQLite builds without FTS5
+get no index and search falls back to LIKE (see `crud.resource`).
+
+The admin document listing matches owners by case-insensitive substring of
+name or email. On PostgreSQL trigram GIN indexes (pg_trgm) answer those
+ILIKE '%...%' filters for patterns of three or more characters; SQLite
+scans `users`.
+"""
+from typing import List
+
+from sqlalchemy.exc import OperationalError
+
+# Text search configuration for both the stored vector and the queries
+SEARCH_CONFIG = "english"
+
+POSTGRESQL_RESOURCE_SEARCH = [
+    f"""
+    ALTER TABLE resources ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('{SEARCH_CONFIG}',
+            coalesce(title, '') || ' ' || coalesce(description, '') || ' '
+            || coalesce(eligibility_criteria, ''))
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_resources_search_vector ON resources USING GIN (search_vector)",
+]
+
+_SQLITE_FTS_INSERT = """
+        INSERT INTO resources_fts (rowid, title, description, eligibility_criteria)
+        VALUES (NEW.id, NEW.title, NEW.description, NEW.eligibility_criteria);
+"""
+_SQLITE_FTS_DELETE = """
+        INSERT INTO resources_fts (resources_fts, rowid, title, description, eligibility_criteria)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.eligibility_criteria);
+"""
+
+SQLITE_RESOURCE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5(
+        title, description, eligibility_criteria,
+        content='resources', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_fts_insert AFTER INSERT ON resources
+    BEGIN {_SQLITE_FTS_INSERT} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_fts_delete AFTER DELETE ON resources
+    BEGIN {_SQLITE_FTS_DELETE} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_fts_update
+    AFTER UPDATE OF title, description, eligibility_criteria ON resources
+    BEGIN {_SQLITE_FTS_DELETE} {_SQLITE_FTS_INSERT} END
+    """,
+]
+
+DROP_RESOURCE_SEARCH = {
+    "postgresql": [
+        "DROP INDEX IF EXISTS ix_resources_search_vector",
+        "ALTER TABLE resources DROP COLUMN IF EXISTS search_vector",
+    ],
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS resources_fts_update",
+        "DROP TRIGGER IF EXISTS resources_fts_delete",
+        "DROP TRIGGER IF EXISTS resources_fts_insert",
+        "DROP TABLE IF EXISTS resources_fts",
+    ],
+}
+
+# Index the rows that existed before the FTS table (a no-op on Postgres,
+# where adding the generated column computes it for every row)
+BACKFILL_RESOURCE_SEARCH = {
+    "sqlite": "INSERT INTO resources_fts (resources_fts) VALUES ('rebuild')",
+}
+
+
+def resource_search_ddl(dialect_name: str) -> List[str]:
+    if dialect_name == "postgresql":
+        return POSTGRESQL_RESOURCE_SEARCH
+    if dialect_name == "sqlite":
+        return SQLITE_RESOURCE_SEARCH
+    raise NotImplementedError(f"Resource search is not supported on {dialect_name}")
+
+
+def has_resource_search(connection) -> bool:
+    if connection.dialect.name == "postgresql":
+        query = (
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'resources' AND column_name = 'search_vector'"
+        )
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resources_fts'"
+    return connection.exec_driver_sql(query).first() is not None
+
+
+def install_resource_search(target, connection, **kw) -> None:
+    """`after_create` listener for the resources table."""
+    try:
+        for statement in resource_search_ddl(connection.dialect.name):
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        if connection.dialect.name != "sqlite":
+            raise
+        # SQLite compiled without FTS5: search falls back to LIKE
+
+
+USER_SEARCH_INDEXES = {
+    "ix_users_full_name_trgm": "full_name",
+    "ix_users_email_trgm": "email",
+}
+
+
+def user_search_ddl(dialect_name: str, *, concurrently: bool = False) -> List[str]:
+    if dialect_name != "postgresql":
+        return []
+    create = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"{create} IF NOT EXISTS {name} ON users USING GIN ({column} gin_trgm_ops)"
+        for name, column in USER_SEARCH_INDEXES.items()
+    ]
+
+
+DROP_USER_SEARCH = {
+    "postgresql": [f"DROP INDEX IF EXISTS {name}" for name in USER_SEARCH_INDEXES],
+}
+
+
+def install_user_search(target, connection, **kw) -> None:
+    """`after_create` listener for the users table."""
+    for statement in user_search_ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
@@ -1,4 +1,9 @@
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -6,12 +11,76 @@ from app.core.config import settings
 
 # Create database engine
 engine = create_engine(settings.DATABASE_URL)
+# Optional read replicas; sessions reach them through app/db/replicas.py
+replica_engines = [create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+
+
+class QueryStats:
+    """Number of statements and total time spent executing them."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+
+# Stats of the request being served; the threadpool that runs sync
+# endpoints copies the context, so their queries are counted too
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the queries run in this context (and threads it starts)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+def _drop_query_timer(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+for _engine in [engine, *replica_engines]:
+    event.listen(_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(_engine, "after_cursor_execute", _stop_query_timer)
+    event.listen(_engine, "handle_error", _drop_query_timer)
+
+# Create a configured "Session" class.
+# Sessions are request-scoped, so objects stay loaded after commit instead of
+# being re-SELECTed on the next attribute access.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+class _ModelBase:
+    # Fetch server-generated values (ids, created_at, onupdate timestamps)
+    # with RETURNING in the same INSERT/UPDATE rather than a later refresh.
+    __mapper_args__ = {"eager_defaults": True}
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create a base class for declarative class definitions
-Base = declarative_base()
+Base = declarative_base(cls=_ModelBase)
 
 def get_db():
     """
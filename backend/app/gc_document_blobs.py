@@ -0,0 +1,96 @@
+"""
+Garbage-collect stored document blobs.
+
+Removes blobs whose reference count has been zero for longer than the grace
+period, objects in the content-addressed tree that have no blob row (an upload
+that died before committing) and abandoned temp objects, on whichever
+storage backend is configured. Safe to run while the app is serving
+uploads; schedule it periodically:
+
+    python -m app.gc_document_blobs [--grace-seconds 3600]
+"""
+import argparse
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.storage import TEMP_PREFIX, Storage, StoredObject, get_storage
+from app.utils.uploads import blob_path, derived_prefix
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# `ab/cd/<name>`; derived files and legacy flat uploads never match
+BLOB_KEY = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([^/]+)$")
+BATCH_SIZE = 1000
+
+
+def _remove_orphans(db: Session, storage: Storage, batch: List[StoredObject]) -> int:
+    known = crud.document.get_known_blobs(
+        db, sha256s=[BLOB_KEY.match(obj.key).group(1) for obj in batch]
+    )
+    orphans = [obj for obj in batch if BLOB_KEY.match(obj.key).group(1) not in known]
+    for obj in orphans:
+        storage.delete(obj.key)
+    return len(orphans)
+
+
+def collect(db: Session, storage: Storage, grace_seconds: int) -> Dict[str, int]:
+    released_before = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    stats = {"unreferenced": 0, "orphaned": 0, "temp": 0}
+
+    # 1. Blobs no Document points at any more
+    while True:
+        batch = crud.document.get_unreferenced_blobs(db, released_before=released_before)
+        if not batch:
+            break
+        for sha256 in batch:
+            if crud.document.delete_unreferenced_blob(
+                db, sha256=sha256, released_before=released_before
+            ):
+                storage.delete(blob_path(sha256))
+                storage.delete_prefix(derived_prefix(sha256))
+                stats["unreferenced"] += 1
+            db.commit()
+
+    # 2. Stored files without a blob row, and stale temp files
+    cutoff = time.time() - grace_seconds
+    candidates: List[StoredObject] = []
+    for obj in storage.list():
+        if obj.modified >= cutoff:
+            continue
+        if obj.key.startswith(TEMP_PREFIX):
+            storage.delete(obj.key)
+            stats["temp"] += 1
+        elif BLOB_KEY.match(obj.key):
+            candidates.append(obj)
+            if len(candidates) >= BATCH_SIZE:
+                stats["orphaned"] += _remove_orphans(db, storage, candidates)
+                candidates = []
+    if candidates:
+        stats["orphaned"] += _remove_orphans(db, storage, candidates)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grace-seconds", type=int, default=settings.BLOB_GC_GRACE_SECONDS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = collect(db, get_storage(), args.grace_seconds)
+    finally:
+        db.close()
+    logger.info("Removed blobs: %s", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+One-time database bootstrap: create tables and seed default data.
+
+Run this once per deploy (release phase / container entrypoint), never from
+the web workers themselves:
+
+    python -m app.initial_data
+"""
+import logging
+
+from sqlalchemy import text
+
+from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for the Postgres advisory lock below
+BOOTSTRAP_LOCK_ID = 872_341_001
+
+
+def init() -> None:
+    if engine.dialect.name != "postgresql":
+        _bootstrap()
+        return
+    # Only one process bootstraps at a time when several containers start
+    # together; the others wait and then no-op. Advisory locks belong to a
+    # connection, and init_db commits (returning the session's connection to
+    # the pool), so the lock is held on a connection of its own.
+    with engine.connect() as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+        lock.commit()
+        try:
+            _bootstrap()
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+            lock.commit()
+
+
+def _bootstrap() -> None:
+    db = SessionLocal()
+    try:
+        init_db(db)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    logger.info("Creating initial data")
+    init()
+    logger.info("Initial data created")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Local background job worker (JOB_BROKER=local): runs due jobs in
+`--processes` worker processes, and enqueues the periodic ones. Needs nothing
+but the database; run one per node next to the web server:
+
+    python -m app.job_worker [--processes 2] [--no-scheduler]
+
+Several nodes can each run one: workers claim different jobs, and each
+period of a periodic job is enqueued once. With JOB_BROKER=celery, run it
+with `--processes 0` for the scheduler alone, and the jobs on Celery workers
+(`celery -A app.worker worker -Q jobs`).
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+from typing import List
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.services import jobs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def work(stop) -> None:
+    """Worker process: run due jobs until `stop` is set."""
+    # Pooled connections were inherited from the parent; never share them
+    engine.dispose(close=False)
+    # The parent sets `stop` on SIGINT/SIGTERM; the current job finishes first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while not stop.is_set():
+        try:
+            ran = jobs.run_next()
+        except Exception:
+            logger.exception("Running the next job failed")
+            ran = False
+        if not ran:
+            stop.wait(settings.JOB_POLL_SECONDS)
+
+
+def _start(stop) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=work, args=(stop,), name="job-worker")
+    process.start()
+    return process
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--no-scheduler", dest="scheduler", action="store_false", help="do not enqueue periodic jobs")
+    args = parser.parse_args()
+
+    stop = multiprocessing.Event()
+    # Setting `stop` itself from a handler can deadlock with a wait on it
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+    workers: List[multiprocessing.Process] = [_start(stop) for _ in range(args.processes)]
+    logger.info("Job worker started: %s processes, scheduler %s", args.processes, "on" if args.scheduler else "off")
+
+    while not stopping.is_set():
+        db = SessionLocal()
+        try:
+            if args.scheduler:
+                jobs.schedule_due(db)
+            jobs.requeue_lost(db)
+        except Exception:
+            logger.exception("Scheduling jobs failed")
+        finally:
+            db.close()
+        for i, process in enumerate(workers):
+            if not process.is_alive():
+                logger.error("Job worker process %s exited (%s); restarting it", process.pid, process.exitcode)
+                workers[i] = _start(stop)
+        stopping.wait(settings.JOB_SCHEDULER_INTERVAL_SECONDS)
+
+    logger.info("Stopping; waiting for running jobs to finish")
+    stop.set()
+    for process in workers:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
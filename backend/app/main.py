@@ -1,21 +1,17 @@
-import os
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from typing import List, Generator
 
 from app.core.config import settings
 from app.db.session import SessionLocal, engine
-from app.db.init_db import init_db
 from app.api.v1.api import api_router
+from app.api.v1.endpoints import documents
+from app.core.responses import FastJSONResponse
+from app.services.document_pipeline import shutdown_pool
 
-# Create database tables
-from app import models  # noqa: F401
-models.Base.metadata.create_all(bind=engine)
-
-# Initialize the database with default data
-init_db(SessionLocal())
+# Schema creation and seeding are a one-time deploy step
+# (`python -m app.initial_data`), not something every worker does on import.
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -26,10 +22,47 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
-# Set up CORS
+if settings.INDEX_ADVISOR_ENABLED:
+    from app.db.index_advisor import IndexAdvisorMiddleware
+
+    app.add_middleware(IndexAdvisorMiddleware, engine=engine)
+
+if settings.QUERY_PROFILER_ENABLED:
+    from app.db.query_profiler import QueryProfilerMiddleware
+
+    app.add_middleware(QueryProfilerMiddleware, engine=engine)
+
+if settings.ETAGS_ENABLED:
+    from app.core.responses import ETagMiddleware
+
+    app.add_middleware(ETagMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    from app.core.responses import CompressionMiddleware
+
+    # Outside the ETags, which are computed on the uncompressed body
+    app.add_middleware(CompressionMiddleware)
+
+if settings.ADMISSION_CONTROL_ENABLED:
+    from app.core.admission import AdmissionControlMiddleware
+
+    # Outside everything but the metrics, so shed requests cost next to nothing
+    app.add_middleware(AdmissionControlMiddleware)
+
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware, metrics_response
+
+    # Outside everything but CORS, so it times everything else
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_response, include_in_schema=False)
+
+# Set up CORS. Added last so it is outermost: responses produced by the other
+# middleware (429/503 from admission control, 304s) carry the CORS headers
+# too, or browsers would hide them from the frontend as network errors.
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -37,14 +70,16 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Retry-After"],
     )
 
-# Ensure upload directory exists
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-app.mount(
-    "/static", 
-    StaticFiles(directory=settings.UPLOAD_DIR), 
-    name="static"
+# Uploads are never served statically (that would bypass the document access
+# checks); old /static/<file> links redirect to the authorised download
+app.add_api_route(
+    "/static/{key:path}",
+    documents.redirect_legacy_upload_link,
+    methods=["GET", "HEAD"],
+    include_in_schema=False,
 )
 
 # Database dependency
@@ -58,6 +93,10 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+@app.on_event("shutdown")
+def stop_document_pipeline() -> None:
+    shutdown_pool()
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
@@ -4,10 +4,20 @@ from app.db.session import Base  # re-export Base for Alembic/metadata access
 from .user import User, EducationalDetail, UserRole, EmploymentStatus  # noqa: F401
 
 # Documents
-from .document import Document, DocumentStatus, DocumentType  # noqa: F401
+from .document import (  # noqa: F401
+    Document,
+    DocumentBlob,
+    DocumentCount,
+    DocumentStatus,
+    DocumentType,
+    ProcessingStatus,
+)
 
 # Analytics
-from .analytics import UserActivity, AnalyticsEvent  # noqa: F401
+from .analytics import UserActivity, AnalyticsEvent, AnalyticsEventRollup  # noqa: F401
+
+# Background jobs
+from .job import Job, JobStatus  # noqa: F401
 
 # Recommendations / Resources
 from .recommendation import (
@@ -25,10 +35,16 @@ __all__ = [
     "UserRole",
     "EmploymentStatus",
     "Document",
+    "DocumentBlob",
+    "DocumentCount",
     "DocumentStatus",
     "DocumentType",
+    "ProcessingStatus",
     "UserActivity",
     "AnalyticsEvent",
+    "AnalyticsEventRollup",
+    "Job",
+    "JobStatus",
     "Resource",
     "UserRecommendation",
     "Tag",
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Float, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Float, Boolean, Enum, Index, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 
+from app.db.rollups import install_event_rollup_triggers
 from app.db.session import Base
 
 class ActivityType(str, enum.Enum):
@@ -18,6 +19,10 @@ class ActivityType(str, enum.Enum):
 
 class UserActivity(Base):
     __tablename__ = "user_activities"
+    __table_args__ = (
+        Index("ix_user_activities_created_at", "created_at"),
+        Index("ix_user_activities_activity_type_created_at", "activity_type", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -60,6 +65,10 @@ class UserSession(Base):
 
 class AnalyticsEvent(Base):
     __tablename__ = "analytics_events"
+    __table_args__ = (
+        Index("ix_analytics_events_created_at", "created_at"),
+        Index("ix_analytics_events_event_name_created_at", "event_name", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     event_name = Column(String(100), nullable=False)
@@ -80,3 +89,19 @@ class AnalyticsEvent(Base):
     
     # Relationships
     user = relationship("User")
+
+
+event.listen(AnalyticsEvent.__table__, "after_create", install_event_rollup_triggers)
+
+
+class AnalyticsEventRollup(Base):
+    """
+    Number of analytics events per (UTC hour, event_name); maintained by
+    triggers on `analytics_events` (see app/db/rollups.py). Never written by
+    the app.
+    """
+    __tablename__ = "analytics_event_rollups"
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    event_name = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
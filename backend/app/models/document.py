@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean, Index, SmallInteger, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 
+from app.db.counters import install_document_count_triggers
 from app.db.session import Base
 
 class DocumentType(str, enum.Enum):
@@ -12,13 +13,44 @@ class DocumentType(str, enum.Enum):
     MARKSHEET = "marksheet"
     OTHER = "other"
 
+# Never served from unsigned public URLs, not even as thumbnails
+SENSITIVE_DOCUMENT_TYPES = frozenset({DocumentType.ID_PROOF, DocumentType.ADDRESS_PROOF})
+
 class DocumentStatus(str, enum.Enum):
     PENDING = "pending"
     VERIFIED = "verified"
     REJECTED = "rejected"
 
+class ProcessingStatus(str, enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # /documents/me: one user's documents, newest first
+        Index("ix_documents_user_id_created_at", "user_id", "created_at", "id"),
+        # Admin list, unfiltered and filtered by status
+        Index("ix_documents_created_at", "created_at", "id"),
+        Index("ix_documents_status_created_at", "status", "created_at", "id"),
+        Index("ix_documents_document_type_created_at", "document_type", "created_at", "id"),
+        # Review queue: only the (small) pending set
+        Index(
+            "ix_documents_pending_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+        # Legacy /static/<file_name> links (see redirect_legacy_upload_link)
+        Index(
+            "ix_documents_legacy_file_path",
+            "file_path",
+            postgresql_where=text("checksum IS NULL"),
+            sqlite_where=text("checksum IS NULL"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -27,12 +59,22 @@ class Document(Base):
     file_name = Column(String, nullable=False)
     file_size = Column(Integer)  # Size in bytes
     mime_type = Column(String)
+    checksum = Column(String(64), nullable=True)  # SHA-256 hex digest; key into document_blobs
+
+    # Filled in by the background pipeline (app/services/document_pipeline.py)
+    processing_status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING, nullable=True)
+    detected_mime_type = Column(String, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    thumbnail_path = Column(String, nullable=True)
+    preview_path = Column(String, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
     status = Column(Enum(DocumentStatus), default=DocumentStatus.PENDING, nullable=False)
     rejection_reason = Column(Text, nullable=True)
     verified_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     verified_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     owner = relationship(
@@ -42,5 +84,94 @@ class Document(Base):
     )
     verifier = relationship("User", foreign_keys=[verified_by])
     
-    def get_absolute_url(self, request):
-        return f"{request.base_url}static/{self.file_path}"
+    def storage_key(self, variant: str = "original"):
+        if variant == "thumbnail":
+            return self.thumbnail_path
+        if variant == "preview":
+            return self.preview_path
+        return self.file_path
+
+    def media_type(self, variant: str = "original"):
+        if variant == "original":
+            return self.detected_mime_type or self.mime_type
+        return "image/jpeg"
+
+    def is_public(self, variant: str = "original") -> bool:
+        """
+        Whether the file may be served from STORAGE_PUBLIC_BASE_URL, where
+        URLs are unsigned and permanent: only thumbnails/previews, and never
+        of identity or address proofs.
+        """
+        return (
+            variant != "original"
+            and self.document_type is not None
+            and self.document_type not in SENSITIVE_DOCUMENT_TYPES
+        )
+
+    def get_absolute_url(self, request=None, variant: str = "original"):
+        """
+        Download URL for the original file or a thumbnail/preview: a
+        presigned object-store URL or CDN URL when the storage backend
+        offers one, else a signed URL of the app's download endpoint
+        (absolute when `request` is given).
+        """
+        from app.core.config import settings
+        from app.core.security import create_download_token
+        from app.services.storage import get_storage
+
+        key = self.storage_key(variant)
+        if not key:
+            return None
+        url = get_storage().url(
+            key,
+            public=self.is_public(variant),
+            filename=self.file_name if variant == "original" else None,
+            content_type=self.media_type(variant),
+        )
+        if url:
+            return url
+        token = create_download_token(self.id, variant)
+        path = f"{settings.API_V1_STR}/documents/{self.id}/file?variant={variant}&token={token}"
+        return str(request.base_url).rstrip("/") + path if request is not None else path
+
+
+class DocumentCount(Base):
+    """
+    Number of documents per (status, document_type), split over `slot`
+    rows that readers sum; maintained by triggers on `documents` (see
+    app/db/counters.py). Never written by the app.
+    """
+    __tablename__ = "document_counts"
+
+    status = Column(Enum(DocumentStatus), primary_key=True)
+    document_type = Column(Enum(DocumentType), primary_key=True)
+    slot = Column(SmallInteger, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+event.listen(Document.__table__, "after_create", install_document_count_triggers)
+
+
+class DocumentBlob(Base):
+    """
+    One stored file, addressed by the SHA-256 of its content.
+
+    `ref_count` is the number of Document rows pointing at it; blobs that
+    drop to zero are removed by `python -m app.gc_document_blobs`.
+    """
+    __tablename__ = "document_blobs"
+    __table_args__ = (
+        # Garbage collection only looks at unreferenced blobs
+        Index(
+            "ix_document_blobs_unreferenced",
+            "updated_at",
+            postgresql_where=text("ref_count = 0"),
+            sqlite_where=text("ref_count = 0"),
+        ),
+    )
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Float, Enum, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.db.session import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"  # waiting for `run_at` and a worker (also between retries)
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # out of attempts
+    CANCELLED = "cancelled"
+
+class Job(Base):
+    """
+    One run of a background job (see app/services/jobs.py), from enqueue to
+    its final status. Workers claim rows by moving them from QUEUED to
+    RUNNING, so the table is also the queue in the "local" mode.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers: the next queued job that is due
+        Index("ix_jobs_status_run_at", "status", "run_at", "id"),
+        # /jobs listing, newest first, optionally by name
+        Index("ix_jobs_created_at", "created_at", "id"),
+        Index("ix_jobs_name_created_at", "name", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    args = Column(JSON, nullable=True)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    # Periodic runs are keyed by schedule slot so each is enqueued once
+    dedupe_key = Column(String(200), nullable=True, unique=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # not before
+    # A RUNNING job whose lease ran out lost its worker and is retried
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    progress_message = Column(String(255), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)  # of the last failed attempt
+
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
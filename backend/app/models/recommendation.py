@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Boolean, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Boolean, JSON, Enum, Index, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 
+from app.db.search import install_resource_search
 from app.db.session import Base
 
 class ResourceType(str, enum.Enum):
@@ -15,6 +16,41 @@ class ResourceType(str, enum.Enum):
 
 class Resource(Base):
     __tablename__ = "resources"
+    __table_args__ = (
+        # Active catalog listing, newest first
+        Index(
+            "ix_resources_active_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Catalog filtered by type, source or location, newest first
+        Index(
+            "ix_resources_active_resource_type_created_at",
+            "resource_type",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_resources_active_source_created_at",
+            "source",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_resources_active_location_created_at",
+            "location",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -39,12 +75,16 @@ class Resource(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     recommendations = relationship("UserRecommendation", back_populates="resource")
     tags = relationship("ResourceTagAssociation", back_populates="resource")
 
+
+# Full-text search index (see app/db/search.py)
+event.listen(Resource.__table__, "after_create", install_resource_search)
+
 class UserRecommendation(Base):
     __tablename__ = "user_recommendations"
     
@@ -64,7 +104,7 @@ class UserRecommendation(Base):
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="recommendations")
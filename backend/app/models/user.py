@@ -1,8 +1,9 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Enum, Text, Float
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Enum, Text, Float, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
+from app.db.search import install_user_search
 from app.db.session import Base
 
 class UserRole(str, enum.Enum):
@@ -29,7 +30,7 @@ class User(Base):
     is_active = Column(Boolean(), default=True)
     is_verified = Column(Boolean(), default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     documents = relationship(
@@ -41,6 +42,8 @@ class User(Base):
     user_activities = relationship("UserActivity", back_populates="user")
     recommendations = relationship("UserRecommendation", back_populates="user")
 
+event.listen(User.__table__, "after_create", install_user_search)
+
 class EducationalDetail(Base):
     __tablename__ = "educational_details"
     
@@ -66,7 +69,7 @@ class EducationalDetail(Base):
     areas_of_interest = Column(Text, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="educational_details")
@@ -20,6 +20,27 @@ from .education import (
     EducationalDetailUpdate,
 )
 
+# Re-export document schemas
+from .document import (
+    DocumentReviewItem,
+    DocumentReviewRequest,
+    DocumentReviewResult,
+    ReviewDecision,
+)
+
+# Re-export analytics schemas
+from .analytics import (
+    AnalyticsFilter,
+    AnalyticsQuery,
+    AnalyticsQueryResult,
+    Dimension,
+    Granularity,
+    Metric,
+)
+
+# Re-export job schemas
+from .job import Job, JobCreate
+
 
 class Msg(BaseModel):
     msg: str
@@ -37,6 +58,18 @@ __all__ = [
     "EducationalDetail",
     "EducationalDetailCreate",
     "EducationalDetailUpdate",
+    "DocumentReviewItem",
+    "DocumentReviewRequest",
+    "DocumentReviewResult",
+    "ReviewDecision",
+    "AnalyticsFilter",
+    "AnalyticsQuery",
+    "AnalyticsQueryResult",
+    "Dimension",
+    "Granularity",
+    "Metric",
+    "Job",
+    "JobCreate",
     "Msg",
 ]
 
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field, validator
+
+
+class Metric(str, Enum):
+    EVENTS = "events"
+    USERS = "users"  # distinct signed-in users
+
+
+class Dimension(str, Enum):
+    EVENT_NAME = "event_name"
+    URL = "url"
+    REFERRER = "referrer"
+    USER_ROLE = "user_role"
+    EMPLOYMENT_STATUS = "employment_status"
+    PU_STREAM = "pu_stream"
+    DEGREE_NAME = "degree_name"
+    SPECIALIZATION = "specialization"
+    UNIVERSITY = "university"
+
+
+class Granularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class AnalyticsFilter(BaseModel):
+    dimension: Dimension
+    values: List[str] = Field(..., min_items=1, max_items=100)
+    exclude: bool = False
+
+
+class AnalyticsQuery(BaseModel):
+    """
+    Event metrics over [`start`, `end`), grouped by `dimensions` and, with a
+    `granularity`, by UTC time bucket. Naive datetimes are UTC; `end`
+    defaults to now.
+    """
+
+    metrics: List[Metric] = Field([Metric.EVENTS], min_items=1, max_items=2)
+    dimensions: List[Dimension] = Field([], max_items=4)
+    filters: List[AnalyticsFilter] = Field([], max_items=10)
+    start: datetime
+    end: Optional[datetime] = None
+    granularity: Optional[Granularity] = None
+    limit: int = Field(1000, ge=1, le=10000)
+
+    @validator("start", "end")
+    def utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        if value is not None:
+            value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        return value
+
+    @validator("metrics", "dimensions")
+    def unique(cls, value: List[Any]) -> List[Any]:
+        if len(set(value)) != len(value):
+            raise ValueError("must not repeat")
+        return value
+
+
+class AnalyticsQueryResult(BaseModel):
+    columns: List[str]
+    rows: List[List[Any]]
+    truncated: bool  # more rows than `limit`
+    source: str  # "rollup" or "events"
+    cached: bool
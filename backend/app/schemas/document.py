@@ -0,0 +1,25 @@
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ReviewDecision(str, Enum):
+    VERIFY = "verify"
+    REJECT = "reject"
+
+
+class DocumentReviewItem(BaseModel):
+    id: int
+    decision: ReviewDecision
+    reason: Optional[str] = None
+
+
+class DocumentReviewRequest(BaseModel):
+    items: List[DocumentReviewItem] = Field(..., min_items=1, max_items=1000)
+
+
+class DocumentReviewResult(BaseModel):
+    verified: List[int] = []
+    rejected: List[int] = []
+    not_found: List[int] = []
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.job import JobStatus
+
+
+class JobCreate(BaseModel):
+    name: str = Field(..., max_length=100)
+    args: Dict[str, Any] = {}
+
+
+class Job(BaseModel):
+    id: int
+    name: str
+    args: Optional[Dict[str, Any]] = None
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    progress: float  # 0..1
+    progress_message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None  # of the last failed attempt
+    run_at: datetime  # not before; the next retry while queued again
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
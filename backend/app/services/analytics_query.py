@@ -0,0 +1,362 @@
+"""
+Declarative analytics queries.
+
+An `AnalyticsQuery` (metrics, dimensions, filters, time range, granularity)
+is compiled by `plan` into one SQL statement:
+
+* against the hourly `analytics_event_rollups` (see app/db/rollups.py) when
+  they can answer it: event counts, by event name and time only. Whole
+  hours are read from the rollups and the partial hours at either end of
+  the range from the events, summed in the same statement;
+* otherwise a GROUP BY over `analytics_events`, joined to users and their
+  education details for the dimensions that need them.
+
+`run_query` enforces the limits -- `ANALYTICS_QUERY_MAX_DAYS` of range,
+`limit` rows (at most `ANALYTICS_QUERY_MAX_ROWS`) and
+`ANALYTICS_QUERY_TIMEOUT_SECONDS` per statement -- and caches results for
+`ANALYTICS_QUERY_CACHE_SECONDS` under a hash of the normalized query, in
+this worker's memory or in Redis (`ANALYTICS_QUERY_CACHE_BACKEND`).
+Time buckets are UTC.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy import and_, distinct, func, literal_column, not_, or_, select, text, union_all
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.crud.pagination import bind_timestamp
+from app.models.analytics import AnalyticsEvent, AnalyticsEventRollup
+from app.models.user import EducationalDetail, EmploymentStatus, User, UserRole
+from app.schemas.analytics import AnalyticsQuery, Dimension, Granularity, Metric
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+# Dimension -> (column, table joined to reach it, enum its values belong to)
+DIMENSIONS = {
+    Dimension.EVENT_NAME: (AnalyticsEvent.event_name, None, None),
+    Dimension.URL: (AnalyticsEvent.url, None, None),
+    Dimension.REFERRER: (AnalyticsEvent.referrer, None, None),
+    Dimension.USER_ROLE: (User.role, User, UserRole),
+    Dimension.EMPLOYMENT_STATUS: (User.employment_status, User, EmploymentStatus),
+    Dimension.PU_STREAM: (EducationalDetail.pu_stream, EducationalDetail, None),
+    Dimension.DEGREE_NAME: (EducationalDetail.degree_name, EducationalDetail, None),
+    Dimension.SPECIALIZATION: (EducationalDetail.specialization, EducationalDetail, None),
+    Dimension.UNIVERSITY: (EducationalDetail.university, EducationalDetail, None),
+}
+JOINS = {
+    User: User.id == AnalyticsEvent.user_id,
+    EducationalDetail: EducationalDetail.user_id == AnalyticsEvent.user_id,
+}
+
+_SQLITE_BUCKETS = {
+    Granularity.HOUR: ("%Y-%m-%d %H:00:00",),
+    Granularity.DAY: ("%Y-%m-%d 00:00:00",),
+    Granularity.WEEK: ("%Y-%m-%d 00:00:00", "-6 days", "weekday 1"),  # Monday
+    Granularity.MONTH: ("%Y-%m-01 00:00:00",),
+}
+
+
+class InvalidQueryError(ValueError):
+    """The query is well-formed but outside what may be run."""
+
+
+class QueryTimeoutError(Exception):
+    """The statement ran past ANALYTICS_QUERY_TIMEOUT_SECONDS."""
+
+
+class Plan(NamedTuple):
+    statement: Select
+    columns: List[str]
+    source: str  # "rollup" or "events"
+
+
+def normalize(query: AnalyticsQuery, now: Optional[datetime] = None) -> AnalyticsQuery:
+    """
+    The query with defaults resolved and filters in a canonical order, so
+    equivalent queries share a cache key. An open `end` is now, to the
+    minute.
+    """
+    end = query.end
+    if end is None:
+        end = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+    filters = sorted(
+        (f.copy(update={"values": sorted(set(f.values))}) for f in query.filters),
+        key=lambda f: (f.dimension.value, f.exclude, f.values),
+    )
+    return query.copy(update={"end": end, "filters": filters})
+
+
+def cache_key(query: AnalyticsQuery) -> str:
+    body = orjson.dumps(query.dict(), option=orjson.OPT_SORT_KEYS)
+    return "analytics-query:" + hashlib.sha256(body).hexdigest()
+
+
+def _bucket(dialect_name: str, granularity: Granularity, column) -> Any:
+    if dialect_name == "postgresql":
+        return func.date_trunc(granularity.value, func.timezone("UTC", column))
+    return func.strftime(*_SQLITE_BUCKETS[granularity][:1], column, *_SQLITE_BUCKETS[granularity][1:])
+
+
+def _filter_values(dimension: Dimension, values: List[str]) -> List[Any]:
+    enum = DIMENSIONS[dimension][2]
+    if enum is None:
+        return values
+    try:
+        return [enum(value) for value in values]
+    except ValueError:
+        allowed = ", ".join(member.value for member in enum)
+        raise InvalidQueryError(f"{dimension.value} filter values must be among: {allowed}")
+
+
+def _conditions(query: AnalyticsQuery, columns: Dict[Dimension, Any]) -> List[Any]:
+    conditions = []
+    for f in query.filters:
+        condition = columns[f.dimension].in_(_filter_values(f.dimension, f.values))
+        conditions.append(not_(condition) if f.exclude else condition)
+    return conditions
+
+
+def _uses_rollups(query: AnalyticsQuery) -> bool:
+    return (
+        query.metrics == [Metric.EVENTS]
+        and set(query.dimensions) <= {Dimension.EVENT_NAME}
+        and all(f.dimension == Dimension.EVENT_NAME for f in query.filters)
+    )
+
+
+def _ceil_hour(value: datetime) -> datetime:
+    floor = value.replace(minute=0, second=0, microsecond=0)
+    return floor if floor == value else floor + HOUR
+
+
+def _plan_rollup(query: AnalyticsQuery, dialect_name: str) -> Optional[Plan]:
+    first_hour = _ceil_hour(query.start)
+    last_hour = query.end.replace(minute=0, second=0, microsecond=0)
+    if first_hour >= last_hour:
+        return None  # not a whole hour inside the range
+
+    def part(model, time_column, count, ranges) -> Select:
+        columns = []
+        if query.granularity is not None:
+            columns.append(_bucket(dialect_name, query.granularity, time_column).label("bucket"))
+        if query.dimensions:
+            columns.append(model.event_name.label("event_name"))
+        within = or_(
+            *(
+                and_(
+                    time_column >= bind_timestamp(dialect_name, lo, time_column.type),
+                    time_column < bind_timestamp(dialect_name, hi, time_column.type),
+                )
+                for lo, hi in ranges
+            )
+        )
+        statement = select(*columns, count.label("events")).where(
+            within, *_conditions(query, {Dimension.EVENT_NAME: model.event_name})
+        )
+        return statement.group_by(*columns) if columns else statement
+
+    parts = [
+        part(
+            AnalyticsEventRollup,
+            AnalyticsEventRollup.bucket,
+            func.sum(AnalyticsEventRollup.count),
+            [(first_hour, last_hour)],
+        )
+    ]
+    edges = [(lo, hi) for lo, hi in ((query.start, first_hour), (last_hour, query.end)) if lo < hi]
+    if edges:
+        parts.append(part(AnalyticsEvent, AnalyticsEvent.created_at, func.count(), edges))
+
+    combined = union_all(*parts).subquery()
+    group = [combined.c[name] for name in ("bucket", "event_name") if name in combined.c]
+    # No rows at all (an empty range) must still count 0, not NULL
+    statement = select(*group, func.coalesce(func.sum(combined.c.events), 0).label("events"))
+    if group:
+        statement = statement.group_by(*group)
+    return Plan(
+        _order(statement, query, group, literal_column("events")),
+        [c.name for c in group] + ["events"],
+        "rollup",
+    )
+
+
+def _plan_events(query: AnalyticsQuery, dialect_name: str) -> Plan:
+    group, names = [], []
+    if query.granularity is not None:
+        group.append(_bucket(dialect_name, query.granularity, AnalyticsEvent.created_at).label("bucket"))
+        names.append("bucket")
+    needed = set()
+    for dimension in query.dimensions + [f.dimension for f in query.filters]:
+        needed.add(DIMENSIONS[dimension][1])
+    for dimension in query.dimensions:
+        group.append(DIMENSIONS[dimension][0].label(dimension.value))
+        names.append(dimension.value)
+
+    metrics = {
+        Metric.EVENTS: func.count().label("events"),
+        Metric.USERS: func.count(distinct(AnalyticsEvent.user_id)).label("users"),
+    }
+    statement = select(*group, *(metrics[m] for m in query.metrics)).select_from(AnalyticsEvent)
+    for table in (User, EducationalDetail):
+        if table in needed:
+            statement = statement.outerjoin(table, JOINS[table])
+    statement = statement.where(
+        AnalyticsEvent.created_at >= bind_timestamp(dialect_name, query.start, AnalyticsEvent.created_at.type),
+        AnalyticsEvent.created_at < bind_timestamp(dialect_name, query.end, AnalyticsEvent.created_at.type),
+        *_conditions(query, {d: DIMENSIONS[d][0] for d in Dimension}),
+    )
+    if group:
+        statement = statement.group_by(*group)
+    first_metric = literal_column(query.metrics[0].value)
+    return Plan(
+        _order(statement, query, group, first_metric),
+        names + [m.value for m in query.metrics],
+        "events",
+    )
+
+
+def _order(statement: Select, query: AnalyticsQuery, group: List[Any], metric) -> Select:
+    # Time first, then the biggest groups, so truncation drops the tail
+    order = [group[0]] if query.granularity is not None else []
+    return statement.order_by(*order, metric.desc()).limit(query.limit + 1)
+
+
+def plan(query: AnalyticsQuery, dialect_name: str) -> Plan:
+    """Compile a normalized query into one statement."""
+    if query.end <= query.start:
+        raise InvalidQueryError("end must be after start")
+    if query.end - query.start > timedelta(days=settings.ANALYTICS_QUERY_MAX_DAYS):
+        raise InvalidQueryError(f"The time range may span at most {settings.ANALYTICS_QUERY_MAX_DAYS} days")
+    if query.limit > settings.ANALYTICS_QUERY_MAX_ROWS:
+        raise InvalidQueryError(f"limit may be at most {settings.ANALYTICS_QUERY_MAX_ROWS}")
+    if _uses_rollups(query):
+        rollup = _plan_rollup(query, dialect_name)
+        if rollup is not None:
+            return rollup
+    return _plan_events(query, dialect_name)
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime):  # Postgres buckets
+        return value.replace(tzinfo=None).isoformat() + "Z"
+    if isinstance(value, str) and len(value) == 19 and value[10] == " ":  # SQLite buckets
+        return value.replace(" ", "T") + "Z"
+    return getattr(value, "value", value)
+
+
+def execute(db: Session, query_plan: Plan) -> List[Tuple]:
+    """Run a plan within ANALYTICS_QUERY_TIMEOUT_SECONDS."""
+    timeout = settings.ANALYTICS_QUERY_TIMEOUT_SECONDS
+    dialect_name = db.get_bind().dialect.name
+    raw = None
+    if dialect_name == "postgresql":
+        db.execute(text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
+    elif dialect_name == "sqlite":
+        raw = db.connection().connection.driver_connection
+        deadline = time.monotonic() + timeout
+        raw.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+    try:
+        return db.execute(query_plan.statement).all()
+    except OperationalError as exc:
+        cancelled = getattr(exc.orig, "pgcode", None) == "57014" or "interrupted" in str(exc.orig)
+        if cancelled:
+            raise QueryTimeoutError("The query took too long; narrow the time range or the dimensions") from exc
+        raise
+    finally:
+        if raw is not None:
+            raw.set_progress_handler(None, 0)
+
+
+class MemoryQueryCache:
+    """Results in this worker's memory, least recently used dropped first."""
+
+    def __init__(self, ttl: float, size: int = 256) -> None:
+        self.ttl = ttl
+        self.size = size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class RedisQueryCache:
+    """Results shared through Redis by every worker and node."""
+
+    def __init__(self, url: str, ttl: float) -> None:
+        import redis
+
+        self.ttl_ms = int(ttl * 1000)
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            body = self._client.get(key)
+        except Exception as exc:
+            logger.warning("Analytics query cache unavailable: %r", exc)
+            return None
+        return orjson.loads(body) if body is not None else None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        try:
+            self._client.set(key, orjson.dumps(result), px=self.ttl_ms)
+        except Exception as exc:
+            logger.warning("Analytics query cache unavailable: %r", exc)
+
+
+def create_query_cache():
+    backend = settings.ANALYTICS_QUERY_CACHE_BACKEND
+    if backend == "redis":
+        return RedisQueryCache(settings.REDIS_URL, settings.ANALYTICS_QUERY_CACHE_SECONDS)
+    if backend == "memory":
+        return MemoryQueryCache(settings.ANALYTICS_QUERY_CACHE_SECONDS)
+    raise ValueError(f"Unknown ANALYTICS_QUERY_CACHE_BACKEND: {backend!r}")
+
+
+query_cache = create_query_cache()
+
+
+def run_query(db: Session, query: AnalyticsQuery) -> Dict[str, Any]:
+    """
+    Plan, run and cache a query. Raises `InvalidQueryError` for queries
+    outside the limits and `QueryTimeoutError`.
+    """
+    query = normalize(query)
+    key = cache_key(query)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    query_plan = plan(query, db.get_bind().dialect.name)
+    rows = execute(db, query_plan)
+    result = {
+        "columns": query_plan.columns,
+        "rows": [[_value(v) for v in row] for row in rows[: query.limit]],
+        "truncated": len(rows) > query.limit,
+        "source": query_plan.source,
+    }
+    query_cache.set(key, result)
+    return {**result, "cached": False}
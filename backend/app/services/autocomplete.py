@@ -0,0 +1,354 @@
+"""
+Search-box suggestions from an in-memory prefix index.
+
+Suggestions are resource titles, tag names and the areas of interest that
+several users share, ranked by popularity:
+
+* resources: views in the last `AUTOCOMPLETE_POPULARITY_DAYS` plus the
+  times they were recommended;
+* tags: active resources carrying the tag;
+* areas of interest: users listing them (at least `MIN_INTEREST_USERS`).
+
+`PrefixIndex` keeps one sorted list of keys -- the normalized text from
+each word onwards, so "sci" finds "Data Science Course" -- with a parallel
+array of entries, and answers a prefix with two binary searches. The best
+entries of every prefix matching more than `SCAN_LIMIT` keys are computed
+when the index is built, so short, common prefixes cost a dict lookup and
+the rest a scan of at most `SCAN_LIMIT` keys: well under a millisecond.
+`python scripts/benchmark_autocomplete.py` measures it.
+
+Each worker builds its own index on first use. After that, lookups never
+wait for the database: a background thread folds resources changed since
+the last refresh into a small overlay every `AUTOCOMPLETE_REFRESH_SECONDS`,
+and rebuilds the whole index, popularity included, every
+`AUTOCOMPLETE_REBUILD_SECONDS` or once the overlay grows past
+`OVERLAY_LIMIT`.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.pagination import bind_timestamp
+from app.db.replicas import read_session
+from app.models.analytics import ActivityType, UserActivity
+from app.models.recommendation import Resource, ResourceTagAssociation, Tag, UserRecommendation
+from app.models.user import EducationalDetail
+
+logger = logging.getLogger(__name__)
+
+# Keys are cut to this many characters; longer prefixes are checked
+# against the full text
+MAX_KEY_CHARS = 24
+SCAN_LIMIT = 256
+MAX_SUGGESTIONS = 20
+MIN_INTEREST_USERS = 2
+OVERLAY_LIMIT = 1000
+
+# When a resource last changed. Rows written before updated_at had a server
+# default may still hold NULL there; fall back to created_at for those.
+_CHANGED_AT = func.coalesce(Resource.updated_at, Resource.created_at)
+
+_WORD = re.compile(r"\w+")
+_END = "\U0010ffff"  # sorts after any character a key contains
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str  # "resource", "tag" or "interest"
+    id: Optional[int]  # resource or tag id
+    score: float
+
+
+def normalize(text: str) -> str:
+    """Lower-cased words without accents, single-spaced."""
+    text = text.casefold()
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_WORD.findall(text))
+
+
+def _word_starts(text: str) -> Iterable[int]:
+    i = 0
+    while i >= 0:
+        yield i
+        i = text.find(" ", i) + 1 or -1
+
+
+def _matches(text: str, prefix: str) -> bool:
+    return any(text.startswith(prefix, i) for i in _word_starts(text))
+
+
+class PrefixIndex:
+    """Immutable; build a new one to change it."""
+
+    def __init__(self, suggestions: Iterable[Suggestion]) -> None:
+        self.suggestions: List[Suggestion] = []
+        self._texts: List[str] = []
+        pairs: List[Tuple[str, int]] = []
+        for suggestion in suggestions:
+            text = normalize(suggestion.text)
+            if not text:
+                continue
+            entry = len(self.suggestions)
+            self.suggestions.append(suggestion)
+            self._texts.append(text)
+            for start in _word_starts(text):
+                pairs.append((text[start:start + MAX_KEY_CHARS], entry))
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._entries = array("I", (entry for _, entry in pairs))
+        del pairs
+        self._top: Dict[str, List[int]] = {}
+        self._precompute()
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def _best(self, lo: int, hi: int, limit: int) -> List[int]:
+        """The `limit` highest-scored distinct entries among keys[lo:hi]."""
+        suggestions, entries = self.suggestions, self._entries
+        by_score = lambda i: suggestions[entries[i]].score  # noqa: E731
+        # An entry has one key per word, so a few candidates more suffice
+        # unless a text repeats a word many times
+        want = limit * 2
+        while True:
+            best: List[int] = []
+            seen = set()
+            for i in heapq.nlargest(want, range(lo, hi), key=by_score):
+                if entries[i] not in seen:
+                    seen.add(entries[i])
+                    best.append(entries[i])
+                    if len(best) == limit:
+                        return best
+            if want >= hi - lo:
+                return best
+            want *= 4
+
+    def _precompute(self, prefix: str = "", lo: int = 0, hi: Optional[int] = None) -> List[int]:
+        """
+        Best entries of keys[lo:hi], which start with `prefix`, recording
+        them for every prefix with more than SCAN_LIMIT keys. A prefix's
+        best are among its children's, so each key is scanned only once.
+        """
+        keys = self._keys
+        if hi is None:
+            hi = len(keys)
+        if hi - lo <= SCAN_LIMIT:
+            return self._best(lo, hi, MAX_SUGGESTIONS)
+        depth = len(prefix)
+        i = lo
+        while i < hi and len(keys[i]) <= depth:  # the prefix itself sorts first
+            i += 1
+        candidates = self._best(lo, i, MAX_SUGGESTIONS)
+        while i < hi:
+            child = keys[i][:depth + 1]
+            j = bisect_left(keys, child + _END, i, hi)
+            candidates.extend(self._precompute(child, i, j))
+            i = j
+        best = sorted(set(candidates), key=lambda e: self.suggestions[e].score, reverse=True)
+        best = best[:MAX_SUGGESTIONS]
+        if prefix:
+            self._top[prefix] = best
+        return best
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """Best suggestions with a word starting with `prefix` (normalized)."""
+        key = prefix[:MAX_KEY_CHARS]
+        if not key:
+            return []
+        cut = len(prefix) > MAX_KEY_CHARS
+        if not cut and key in self._top:
+            best = self._top[key][:limit]
+        else:
+            lo = bisect_left(self._keys, key)
+            hi = bisect_left(self._keys, key + _END, lo)
+            if cut:
+                # Keys stop at MAX_KEY_CHARS; check the rest on the full text
+                best = [e for e in self._best(lo, hi, hi - lo) if _matches(self._texts[e], prefix)][:limit]
+            else:
+                best = self._best(lo, hi, limit)
+        return [self.suggestions[entry] for entry in best]
+
+
+def _resource_popularity(db: Session) -> Counter:
+    since = datetime.now(timezone.utc) - timedelta(days=settings.AUTOCOMPLETE_POPULARITY_DAYS)
+    popularity: Counter = Counter()
+    activity = db.query(UserActivity.entity_id, func.count(UserActivity.id))
+    views = (
+        activity.filter(
+            UserActivity.activity_type == ActivityType.RESOURCE_VIEW,
+            UserActivity.created_at
+            >= bind_timestamp(db.get_bind().dialect.name, since, UserActivity.created_at.type),
+            UserActivity.entity_id.isnot(None),
+        )
+        .group_by(UserActivity.entity_id)
+    )
+    popularity.update(dict(views.all()))
+    recommended = db.query(UserRecommendation.resource_id, func.count(UserRecommendation.id)).group_by(
+        UserRecommendation.resource_id
+    )
+    popularity.update(dict(recommended.all()))
+    return popularity
+
+
+def load_suggestions(db: Session) -> Tuple[List[Suggestion], Counter]:
+    """Everything the index holds, and the resource popularity used."""
+    popularity = _resource_popularity(db)
+    suggestions = [
+        Suggestion(title, "resource", id, popularity[id])
+        for id, title in db.query(Resource.id, Resource.title)
+        .filter(Resource.is_active == True)  # noqa: E712
+        .yield_per(10000)
+    ]
+    tags = (
+        db.query(Tag.id, Tag.name, func.count(Resource.id))
+        .outerjoin(ResourceTagAssociation, ResourceTagAssociation.tag_id == Tag.id)
+        .outerjoin(Resource, (Resource.id == ResourceTagAssociation.resource_id) & (Resource.is_active == True))  # noqa: E712
+        .group_by(Tag.id, Tag.name)
+    )
+    suggestions.extend(Suggestion(name, "tag", id, count) for id, name, count in tags)
+
+    interests: Dict[str, Tuple[str, int]] = {}
+    for (value,) in (
+        db.query(EducationalDetail.areas_of_interest)
+        .filter(EducationalDetail.areas_of_interest.isnot(None))
+        .yield_per(10000)
+    ):
+        for interest in {i.strip() for i in value.split(",") if i.strip()}:
+            key = normalize(interest)
+            text, count = interests.get(key, (interest, 0))
+            interests[key] = (text, count + 1)
+    suggestions.extend(
+        Suggestion(text, "interest", None, count)
+        for text, count in interests.values()
+        if count >= MIN_INTEREST_USERS
+    )
+    return suggestions, popularity
+
+
+class Autocomplete:
+    """A worker's index: built on first use, refreshed in the background."""
+
+    def __init__(self) -> None:
+        self._index: Optional[PrefixIndex] = None
+        self._popularity: Counter = Counter()
+        # Resources changed since the build, by id, with their normalized
+        # title; None if deactivated
+        self._overlay: Dict[int, Optional[Tuple[Suggestion, str]]] = {}
+        self._watermark: Optional[datetime] = None
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def rebuild(self) -> None:
+        db = read_session()
+        try:
+            started = time.perf_counter()
+            watermark = db.query(func.max(_CHANGED_AT)).scalar()
+            suggestions, popularity = load_suggestions(db)
+            index = PrefixIndex(suggestions)
+        finally:
+            db.close()
+        with self._lock:
+            self._index, self._popularity, self._overlay = index, popularity, {}
+            self._watermark = watermark
+            self._built_at = self._refreshed_at = time.monotonic()
+        logger.info(
+            "Autocomplete index rebuilt: %d suggestions in %.0f ms",
+            len(index),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def refresh(self) -> None:
+        """Fold resources changed since the last refresh into the overlay."""
+        db = read_session()
+        try:
+            query = db.query(Resource.id, Resource.title, Resource.is_active, _CHANGED_AT)
+            if self._watermark is not None:
+                # >=: rows written later in the same (second-resolution) tick
+                query = query.filter(
+                    _CHANGED_AT
+                    >= bind_timestamp(db.get_bind().dialect.name, self._watermark, Resource.updated_at.type)
+                )
+            changed = query.all()
+        finally:
+            db.close()
+        with self._lock:
+            for id, title, is_active, changed_at in changed:
+                self._overlay[id] = (
+                    (Suggestion(title, "resource", id, self._popularity[id]), normalize(title))
+                    if is_active
+                    else None
+                )
+                if changed_at is not None and (self._watermark is None or changed_at > self._watermark):
+                    self._watermark = changed_at
+            self._refreshed_at = time.monotonic()
+
+    def _update(self) -> None:
+        try:
+            stale = time.monotonic() - self._built_at > settings.AUTOCOMPLETE_REBUILD_SECONDS
+            if stale or len(self._overlay) > OVERLAY_LIMIT:
+                self.rebuild()
+            else:
+                self.refresh()
+        except Exception:
+            logger.exception("Autocomplete index refresh failed")
+            self._refreshed_at = time.monotonic()  # retry next interval
+        finally:
+            self._refreshing = False
+
+    def _maybe_update(self) -> None:
+        if time.monotonic() - self._refreshed_at < settings.AUTOCOMPLETE_REFRESH_SECONDS:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._update, name="autocomplete-refresh", daemon=True).start()
+
+    def suggest(self, text: str, limit: int = 10) -> List[Suggestion]:
+        if self._index is None:
+            with self._lock:
+                first = self._index is None and not self._refreshing
+                if first:
+                    self._refreshing = True
+            if first:
+                try:
+                    self.rebuild()
+                finally:
+                    self._refreshing = False
+            elif self._index is None:  # another request is building it
+                return []
+        else:
+            self._maybe_update()
+
+        prefix = normalize(text)
+        index, overlay = self._index, self._overlay
+        results = [
+            s
+            for s in index.lookup(prefix, MAX_SUGGESTIONS)
+            if s.kind != "resource" or s.id not in overlay
+        ]
+        if overlay and prefix:
+            results.extend(
+                s for s, title in filter(None, list(overlay.values())) if _matches(title, prefix)
+            )
+            results.sort(key=lambda s: s.score, reverse=True)
+        return results[:limit]
+
+
+autocomplete = Autocomplete()
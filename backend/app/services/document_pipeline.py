@@ -0,0 +1,274 @@
+"""
+Background processing for uploaded documents.
+
+After upload, each Document is analysed off the request path:
+
+* real MIME sniffing of the content (libmagic, with a signature fallback),
+  rejecting files whose content is not an allowed type;
+* oversized JPEG/PNG scans re-encoded to a bounded size, stored as a new
+  content-addressed blob that the Document is re-pointed at;
+* a thumbnail and a compressed preview for images;
+* the page count for PDFs.
+
+`enqueue_document` dispatches according to `DOCUMENT_PIPELINE_BROKER`:
+
+* "local": a process pool owned by this app process (the default; no
+  external services needed);
+* "celery": `app.worker.process_document_task` via the Celery broker;
+* "eager": run inline, in-process. Stand-in for the broker in tests.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.document import Document, DocumentStatus, ProcessingStatus
+from app.services.storage import Storage, get_storage
+from app.utils.uploads import blob_path, derived_prefix
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = {"image/jpeg": "JPEG", "image/png": "PNG"}
+
+_SIGNATURES = [
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def sniff_mime_type(head: bytes) -> str:
+    try:
+        import magic
+
+        return magic.from_buffer(head, mime=True)
+    except (ImportError, OSError):  # python-magic or libmagic not installed
+        for signature, mime in _SIGNATURES:
+            if head.startswith(signature):
+                return mime
+        return "application/octet-stream"
+
+
+def count_pdf_pages(path: str) -> Optional[int]:
+    try:
+        from pypdf import PdfReader
+
+        return len(PdfReader(path).pages)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    # Without a PDF library, count page objects; good enough for scans,
+    # which rarely use compressed object streams.
+    with open(path, "rb") as f:
+        data = f.read()
+    pages = len(re.findall(rb"/Type\s*/Page(?![a-zA-Z])", data))
+    return pages or None
+
+
+def _save_image(image: Any, fmt: str, **params: Any) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def analyze_file(file_path: str, checksum: Optional[str]) -> Dict[str, Any]:
+    """
+    Do the CPU-heavy work for one stored file. Runs in a worker process, so
+    it only touches storage and returns plain data.
+    """
+    storage = get_storage()
+    with storage.local_copy(file_path) as path:
+        return _analyze(storage, path, file_path, checksum)
+
+
+def _analyze(storage: Storage, path: str, file_path: str, checksum: Optional[str]) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        head = f.read(8192)
+    result: Dict[str, Any] = {"mime_type": sniff_mime_type(head)}
+
+    if result["mime_type"] == "application/pdf":
+        result["page_count"] = count_pdf_pages(path)
+        return result
+    if result["mime_type"] not in IMAGE_TYPES:
+        return result
+
+    from PIL import Image, ImageOps
+
+    result["page_count"] = 1
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        fmt = IMAGE_TYPES[result["mime_type"]]
+        max_side = settings.DOCUMENT_MAX_IMAGE_SIDE
+        oversized = (
+            max(image.size) > max_side
+            or os.path.getsize(path) > settings.DOCUMENT_REENCODE_MIN_BYTES
+        )
+        if oversized:
+            normalized = image.copy()
+            normalized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            if fmt == "JPEG":
+                data = _save_image(normalized.convert("RGB"), fmt, quality=85, optimize=True)
+            else:
+                data = _save_image(normalized, fmt, optimize=True)
+            if len(data) < os.path.getsize(path):
+                result["normalized"] = {
+                    "temp_key": storage.put_temp(data),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "size": len(data),
+                }
+                image = normalized
+
+        if "normalized" in result:
+            sha256 = result["normalized"]["sha256"]
+        else:
+            # Legacy uploads predate checksums; key their derivatives by path
+            sha256 = checksum or hashlib.sha256(file_path.encode()).hexdigest()
+        prefix = derived_prefix(sha256)
+        rgb = image.convert("RGB")
+        for name, side, quality in (
+            ("thumbnail", settings.DOCUMENT_THUMBNAIL_SIDE, 75),
+            ("preview", settings.DOCUMENT_PREVIEW_SIDE, 80),
+        ):
+            derived = rgb.copy()
+            derived.thumbnail((side, side), Image.Resampling.LANCZOS)
+            key = f"{prefix}/{name}.jpg"
+            data = _save_image(derived, "JPEG", quality=quality, optimize=True)
+            storage.put(key, data, content_type="image/jpeg")
+            result[f"{name}_path"] = key
+    return result
+
+
+def apply_result(document_id: int, result: Dict[str, Any]) -> None:
+    storage = get_storage()
+    db = SessionLocal()
+    try:
+        doc = db.get(Document, document_id)
+        if doc is None:
+            if "normalized" in result:
+                storage.delete(result["normalized"]["temp_key"])
+            return
+        doc.detected_mime_type = result["mime_type"]
+        doc.page_count = result.get("page_count")
+        doc.thumbnail_path = result.get("thumbnail_path")
+        doc.preview_path = result.get("preview_path")
+        doc.processing_status = ProcessingStatus.DONE
+        doc.processed_at = datetime.now(timezone.utc)
+        if result["mime_type"] not in settings.ALLOWED_FILE_TYPES:
+            doc.status = DocumentStatus.REJECTED
+            doc.rejection_reason = f"Unsupported file content ({result['mime_type']})"
+
+        normalized = result.get("normalized")
+        if normalized:
+            crud.document.acquire_blob(db, sha256=normalized["sha256"], size=normalized["size"])
+            if doc.checksum:
+                crud.document.release_blob(db, sha256=doc.checksum)
+            doc.checksum = normalized["sha256"]
+            doc.file_path = blob_path(normalized["sha256"])
+            doc.file_size = normalized["size"]
+        try:
+            db.commit()
+        except BaseException:
+            if normalized:
+                storage.delete(normalized["temp_key"])
+            raise
+        # Only after the reference is committed, so blob GC cannot race us
+        if normalized:
+            storage.promote(normalized["temp_key"], doc.file_path, content_type=result["mime_type"])
+    finally:
+        db.close()
+
+
+def mark_failed(document_id: int, error: BaseException) -> None:
+    logger.error("Processing document %s failed: %r", document_id, error)
+    db = SessionLocal()
+    try:
+        doc = db.get(Document, document_id)
+        if doc is not None:
+            doc.processing_status = ProcessingStatus.FAILED
+            db.commit()
+    finally:
+        db.close()
+
+
+def process_document(document_id: int) -> None:
+    """Analyse one document synchronously (Celery task body / eager mode)."""
+    db = SessionLocal()
+    try:
+        doc = db.get(Document, document_id)
+        if doc is None:
+            return
+        file_path, checksum = doc.file_path, doc.checksum
+    finally:
+        db.close()
+    try:
+        result = analyze_file(file_path, checksum)
+    except Exception as exc:
+        mark_failed(document_id, exc)
+        raise
+    apply_result(document_id, result)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Not "fork": forking a threaded server process (threadpool,
+            # logging and DB pool locks) can deadlock the child
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.DOCUMENT_PIPELINE_WORKERS, mp_context=context
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _on_done(document_id: int, future: Future) -> None:
+    # Runs on the pool's management thread, never on the event loop
+    try:
+        error = future.exception()
+        if error is not None:
+            mark_failed(document_id, error)
+        else:
+            apply_result(document_id, future.result())
+    except Exception:
+        logger.exception("Storing results for document %s failed", document_id)
+
+
+def enqueue_document(document: Document) -> None:
+    """Schedule background processing for a freshly committed Document."""
+    broker = settings.DOCUMENT_PIPELINE_BROKER
+    if broker == "eager":
+        try:
+            process_document(document.id)
+        except Exception:
+            # The upload itself is stored; like the pool path, a processing
+            # failure is only recorded on the document
+            logger.exception("Processing document %s failed", document.id)
+    elif broker == "celery":
+        from app.worker import process_document_task
+
+        process_document_task.delay(document.id)
+    else:
+        future = _get_pool().submit(analyze_file, document.file_path, document.checksum)
+        future.add_done_callback(lambda f, document_id=document.id: _on_done(document_id, f))
@@ -0,0 +1,376 @@
+"""
+Background jobs.
+
+A job is a function registered with `@job` (the definitions live in
+app/tasks.py) and run off the request path with `enqueue`. Every run is a
+row in `jobs` holding its arguments, status, attempts, progress and result;
+the /jobs API reads them from there.
+
+`enqueue` dispatches according to `JOB_BROKER`:
+
+* "local": nothing to send; `python -m app.job_worker` processes poll the
+  jobs table for due runs (the default; needs nothing but the database);
+* "celery": `app.worker.run_job_task` via the Celery broker;
+* "eager": run inline, in-process, retries included and without waiting.
+  Stand-in for the broker in tests.
+
+A failed attempt is retried after `backoff * 2 ** (attempt - 1)` seconds,
+jittered and capped at `max_backoff`, until `max_attempts` have been made.
+A running job renews a lease every `JOB_LEASE_SECONDS / 3`; one whose lease
+ran out lost its worker and counts as a failed attempt. Jobs registered with
+`every=` are enqueued once per period by the scheduler in `app.job_worker`,
+keyed by period, so a scheduler on every node still runs each period once.
+"""
+import inspect
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import upsert_insert
+from app.db.session import SessionLocal
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobDefinition(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+    max_attempts: int
+    backoff: float  # seconds before the first retry
+    max_backoff: float
+    every: Optional[float]  # seconds between scheduled runs
+
+
+class InvalidJobError(ValueError):
+    """Raised for an unknown job name or arguments the job does not take."""
+
+
+registry: Dict[str, JobDefinition] = {}
+
+
+def job(
+    name: Optional[str] = None,
+    *,
+    max_attempts: int = 3,
+    backoff: float = 30.0,
+    max_backoff: float = 60 * 60,
+    every: Optional[float] = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Register a function as a job. It is called with a `JobContext` and the
+    job's (JSON) arguments as keywords, and returns a JSON-serializable
+    result or None.
+    """
+
+    def register(func: Callable[..., Any]) -> Callable[..., Any]:
+        job_name = name or func.__name__
+        registry[job_name] = JobDefinition(job_name, func, max_attempts, backoff, max_backoff, every)
+        return func
+
+    return register
+
+
+def definitions() -> List[JobDefinition]:
+    import app.tasks  # noqa: F401  (registers the jobs)
+
+    return sorted(registry.values(), key=lambda definition: definition.name)
+
+
+def get_definition(name: str) -> JobDefinition:
+    import app.tasks  # noqa: F401
+
+    try:
+        return registry[name]
+    except KeyError:
+        raise InvalidJobError(f"Unknown job: {name!r}") from None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease_until() -> datetime:
+    return _now() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def _update(job_id: int, current: JobStatus, **values: Any) -> bool:
+    """Set `values` on the job if its status is still `current`."""
+    db = SessionLocal()
+    try:
+        updated = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == current).values(**values)
+        ).rowcount
+        db.commit()
+        return updated == 1
+    finally:
+        db.close()
+
+
+class JobContext:
+    """Handed to a running job, to report its progress."""
+
+    def __init__(self, job_id: int, attempt: int) -> None:
+        self.job_id = job_id
+        self.attempt = attempt
+        self._reported_at = 0.0
+
+    def progress(self, done: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """
+        Record progress: `done` of `total`, or `done` as a fraction. Written
+        at most once per JOB_PROGRESS_INTERVAL_SECONDS; the rest are dropped.
+        """
+        now = time.monotonic()
+        if now - self._reported_at < settings.JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = now
+        if total is not None:
+            done = done / total if total else 1.0
+        values: Dict[str, Any] = {"progress": min(max(done, 0.0), 1.0)}
+        if message is not None:
+            values["progress_message"] = message[:255]
+        _update(self.job_id, JobStatus.RUNNING, **values)
+
+
+class _Lease(threading.Thread):
+    """Renews a running job's lease until stopped."""
+
+    def __init__(self, job_id: int) -> None:
+        super().__init__(name=f"job-lease-{job_id}", daemon=True)
+        self.job_id = job_id
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(settings.JOB_LEASE_SECONDS / 3):
+            try:
+                _update(self.job_id, JobStatus.RUNNING, lease_expires_at=_lease_until())
+            except Exception:
+                logger.exception("Renewing the lease of job %s failed", self.job_id)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def _dispatch(job_id: int, delay: float = 0) -> None:
+    broker = settings.JOB_BROKER
+    if broker == "eager":
+        run_job(job_id)
+    elif broker == "celery":
+        from app.worker import run_job_task
+
+        run_job_task.apply_async((job_id,), countdown=delay)
+    # "local": the workers find it in the table
+
+
+def _backoff(definition: Optional[JobDefinition], attempt: int) -> float:
+    if definition is None:
+        return 0.0
+    delay = min(definition.backoff * 2 ** (attempt - 1), definition.max_backoff)
+    return random.uniform(delay / 2, delay)
+
+
+def _retry_or_fail(job: Job, error: str, *where: Any) -> None:
+    """Record a failed attempt of a RUNNING job: queue the next one, or give up."""
+    try:
+        definition: Optional[JobDefinition] = get_definition(job.name)
+    except InvalidJobError:
+        definition = None
+    now = _now()
+    db = SessionLocal()
+    try:
+        statement = update(Job).where(Job.id == job.id, Job.status == JobStatus.RUNNING, *where)
+        if definition is not None and job.attempts < job.max_attempts:
+            delay = _backoff(definition, job.attempts)
+            values: Dict[str, Any] = {
+                "status": JobStatus.QUEUED,
+                "run_at": now + timedelta(seconds=delay),
+            }
+        else:
+            delay, values = None, {"status": JobStatus.FAILED, "finished_at": now}
+        updated = db.execute(statement.values(error=error, lease_expires_at=None, **values)).rowcount
+        db.commit()
+    finally:
+        db.close()
+    if updated and delay is not None:
+        logger.info("Job %s (%s) attempt %s failed; retrying in %.0fs", job.id, job.name, job.attempts, delay)
+        _dispatch(job.id, delay)
+
+
+def _claim(db: Session, job_id: int) -> Optional[Job]:
+    """Move a queued job to RUNNING for this worker; None if someone else has it."""
+    now = _now()
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            started_at=now,
+            lease_expires_at=_lease_until(),
+        )
+    ).rowcount
+    db.commit()
+    return db.get(Job, job_id, populate_existing=True) if claimed else None
+
+
+def _execute(job: Job) -> None:
+    try:
+        definition = get_definition(job.name)
+    except InvalidJobError as exc:
+        _retry_or_fail(job, str(exc))
+        return
+    lease = _Lease(job.id)
+    lease.start()
+    try:
+        result = definition.func(JobContext(job.id, job.attempts), **(job.args or {}))
+    except Exception as exc:
+        lease.stop()
+        logger.exception("Job %s (%s) failed", job.id, job.name)
+        _retry_or_fail(job, f"{type(exc).__name__}: {exc}")
+        return
+    lease.stop()
+    _update(
+        job.id,
+        JobStatus.RUNNING,
+        status=JobStatus.SUCCEEDED,
+        result=result,
+        progress=1.0,
+        error=None,
+        lease_expires_at=None,
+        finished_at=_now(),
+    )
+
+
+def run_job(job_id: int) -> None:
+    """Run one attempt of a queued job (Celery task body / eager mode)."""
+    db = SessionLocal()
+    try:
+        job = _claim(db, job_id)
+    finally:
+        db.close()
+    if job is not None:  # otherwise already taken, cancelled or deleted
+        _execute(job)
+
+
+def run_next() -> bool:
+    """Claim and run the next due job ("local" workers). False when none is due."""
+    db = SessionLocal()
+    try:
+        while True:
+            job_id = db.execute(
+                select(Job.id)
+                .where(Job.status == JobStatus.QUEUED, Job.run_at <= _now())
+                .order_by(Job.run_at, Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar()
+            if job_id is None:
+                db.commit()
+                return False
+            job = _claim(db, job_id)
+            if job is not None:
+                break
+    finally:
+        db.close()
+    _execute(job)
+    return True
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    args: Optional[Dict[str, Any]] = None,
+    *,
+    delay: float = 0,
+    created_by: Optional[int] = None,
+) -> Job:
+    """
+    Record a run of job `name` and dispatch it. Commits `db`. Raises
+    `InvalidJobError` for an unknown job or arguments it does not take.
+    """
+    definition = get_definition(name)
+    args = args or {}
+    try:
+        inspect.signature(definition.func).bind(None, **args)
+    except TypeError as exc:
+        raise InvalidJobError(f"Invalid arguments for {name}: {exc}") from None
+    job = Job(
+        name=name,
+        args=args,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=definition.max_attempts,
+        run_at=_now() + timedelta(seconds=delay),
+        progress=0.0,
+        created_by=created_by,
+    )
+    db.add(job)
+    db.commit()
+    _dispatch(job.id, delay)
+    if settings.JOB_BROKER == "eager":
+        db.refresh(job)
+    return job
+
+
+def cancel(db: Session, job_id: int) -> bool:
+    """Cancel a job that has not started (or is waiting to retry). Running jobs finish."""
+    cancelled = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(status=JobStatus.CANCELLED, finished_at=_now())
+    ).rowcount
+    db.commit()
+    return cancelled == 1
+
+
+def schedule_due(db: Session, now: Optional[datetime] = None) -> List[int]:
+    """
+    Enqueue this period's run of every periodic job, unless already
+    enqueued (here or by another node's scheduler). Returns the new job ids.
+    """
+    now = now or _now()
+    insert = upsert_insert(db)
+    created = []
+    for definition in definitions():
+        if definition.every is None:
+            continue
+        period = int(now.timestamp() // definition.every)
+        job_id = db.execute(
+            insert(Job)
+            .values(
+                name=definition.name,
+                args={},
+                status=JobStatus.QUEUED,
+                dedupe_key=f"{definition.name}@{period}",
+                attempts=0,
+                max_attempts=definition.max_attempts,
+                run_at=now,
+                progress=0.0,
+            )
+            .on_conflict_do_nothing(index_elements=["dedupe_key"])
+            .returning(Job.id)
+        ).scalar()
+        if job_id is not None:
+            created.append(job_id)
+    db.commit()
+    for job_id in created:
+        _dispatch(job_id)
+    return created
+
+
+def requeue_lost(db: Session) -> int:
+    """Retry, or fail, running jobs whose worker stopped renewing the lease."""
+    now = _now()
+    lost = db.query(Job).filter(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now).all()
+    for job in lost:
+        logger.warning("Job %s (%s) lost its worker", job.id, job.name)
+        _retry_or_fail(job, "Worker lost (lease expired)", Job.lease_expires_at < now)
+    return len(lost)
@@ -0,0 +1,204 @@
+"""
+Live dashboard figures pushed to subscribers.
+
+Each worker runs one `LiveAnalytics` aggregator while at least one client is
+subscribed. Every `LIVE_ANALYTICS_INTERVAL_SECONDS` it reads what changed
+since its last pass -- new analytics events, user activities and users by
+primary key range, document status totals from the trigger-maintained
+`document_counts` table -- and publishes the differences to every
+subscriber. The database therefore sees one set of small queries per
+worker per interval, however many dashboards are open. The full summary is
+re-read every `LIVE_ANALYTICS_SNAPSHOT_SECONDS` (employment status changes
+in place and has no cheap delta) and sent as a new snapshot.
+
+Messages are dicts with a "type" of "snapshot" (totals: new subscribers get
+the latest one first) or "delta" (changes since the previous message).
+Each subscriber has a queue of `LIVE_ANALYTICS_QUEUE_SIZE` messages; a
+client that falls that far behind is dropped rather than buffered, and
+resynchronises from a snapshot when it reconnects.
+
+Rows whose primary key was allocated before, but committed after, a
+higher one already read are not counted; the periodic snapshot corrects
+the totals.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.replicas import read_session
+from app.models.analytics import AnalyticsEvent, UserActivity
+from app.models.document import DocumentCount, DocumentStatus
+from app.models.user import EmploymentStatus, User
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+
+def user_summary(db: Session) -> Dict[str, int]:
+    total = db.query(func.count(User.id)).scalar() or 0
+    employed = db.query(func.count(User.id)).filter(User.employment_status == EmploymentStatus.EMPLOYED).scalar() or 0
+    unemployed = db.query(func.count(User.id)).filter(User.employment_status == EmploymentStatus.UNEMPLOYED).scalar() or 0
+    return {"total_users": total, "employed": employed, "unemployed": unemployed}
+
+
+def document_summary(db: Session) -> Dict[str, int]:
+    by_status = {s.value: 0 for s in DocumentStatus}
+    for status, count in db.query(DocumentCount.status, func.sum(DocumentCount.count)).group_by(DocumentCount.status):
+        by_status[status.value] = int(count or 0)
+    return by_status
+
+
+def _new_rows(db: Session, column, id_column, after: int) -> tuple:
+    """Counts per `column` value of rows with an id above `after`, and the highest id."""
+    counts: Dict[str, int] = {}
+    last = after
+    for value, count, max_id in (
+        db.query(column, func.count(id_column), func.max(id_column)).filter(id_column > after).group_by(column)
+    ):
+        counts[getattr(value, "value", value)] = count
+        last = max(last, max_id)
+    return counts, last
+
+
+class Subscriber:
+    def __init__(self, size: int) -> None:
+        self.queue: "asyncio.Queue[Optional[Message]]" = asyncio.Queue(maxsize=size)
+
+    def close(self) -> None:
+        """End the subscription: discard what is pending, then a None."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class LiveAnalytics:
+    def __init__(self) -> None:
+        self._subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[Message] = None
+        self._snapshot_at = 0.0
+        # Highest ids already counted
+        self._last_event = self._last_activity = self._last_user = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(settings.LIVE_ANALYTICS_QUEUE_SIZE)
+        self._subscribers.add(subscriber)
+        if self._snapshot is not None:
+            subscriber.queue.put_nowait(self._snapshot)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._task is not None:
+            # Nobody watching: stop querying until someone subscribes again
+            self._task.cancel()
+            self._task = None
+            self._snapshot = None
+
+    def close(self) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+            self.unsubscribe(subscriber)
+
+    def _publish(self, message: Message) -> None:
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.info("Dropping a live analytics subscriber that fell behind")
+                subscriber.close()
+                self._subscribers.discard(subscriber)
+
+    def _read_snapshot(self) -> Message:
+        db = read_session()
+        try:
+            # Ids first: rows landing while the totals are read are then
+            # counted again by the next delta rather than missed
+            self._last_event = db.query(func.max(AnalyticsEvent.id)).scalar() or 0
+            self._last_activity = db.query(func.max(UserActivity.id)).scalar() or 0
+            self._last_user = db.query(func.max(User.id)).scalar() or 0
+            return {
+                "type": "snapshot",
+                "users": user_summary(db),
+                "documents": document_summary(db),
+            }
+        finally:
+            db.close()
+
+    def _read_delta(self) -> Message:
+        db = read_session()
+        try:
+            events, self._last_event = _new_rows(
+                db, AnalyticsEvent.event_name, AnalyticsEvent.id, self._last_event
+            )
+            activities, self._last_activity = _new_rows(
+                db, UserActivity.activity_type, UserActivity.id, self._last_activity
+            )
+            new_users, last_user = db.query(func.count(User.id), func.max(User.id)).filter(
+                User.id > self._last_user
+            ).one()
+            self._last_user = last_user or self._last_user
+            documents = document_summary(db)
+        finally:
+            db.close()
+        message: Message = {"type": "delta"}
+        if events:
+            message["events"] = events
+        if activities:
+            message["activities"] = activities
+        if new_users:
+            message["users"] = {"total_users": new_users}
+        previous = self._snapshot["documents"]
+        changed = {status: n - previous[status] for status, n in documents.items() if n != previous[status]}
+        if changed:
+            message["documents"] = changed
+        return message
+
+    def _apply(self, delta: Message) -> None:
+        """Fold a delta into the snapshot sent to new subscribers."""
+        snapshot = {**self._snapshot, "users": dict(self._snapshot["users"])}
+        snapshot["documents"] = {
+            status: n + delta.get("documents", {}).get(status, 0)
+            for status, n in self._snapshot["documents"].items()
+        }
+        snapshot["users"]["total_users"] += delta.get("users", {}).get("total_users", 0)
+        snapshot["at"] = delta["at"]
+        self._snapshot = snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                now = time.monotonic()
+                if self._snapshot is None or now - self._snapshot_at >= settings.LIVE_ANALYTICS_SNAPSHOT_SECONDS:
+                    message = await run_in_threadpool(self._read_snapshot)
+                    message["at"] = datetime.now(timezone.utc)
+                    self._snapshot, self._snapshot_at = message, now
+                    self._publish(message)
+                else:
+                    message = await run_in_threadpool(self._read_delta)
+                    message["at"] = datetime.now(timezone.utc)
+                    if len(message) > 2:  # more than type and at
+                        self._apply(message)
+                        self._publish(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live analytics update failed")
+            await asyncio.sleep(settings.LIVE_ANALYTICS_INTERVAL_SECONDS)
+
+
+live_analytics = LiveAnalytics()
@@ -0,0 +1,529 @@
+"""
+File storage backends.
+
+Everything the app stores (document blobs, thumbnails, previews) is
+addressed by a relative key such as `ab/cd/<sha256>`; a `Storage` maps keys
+to bytes. Select the backend with `STORAGE_BACKEND`:
+
+* "local": a directory (`UPLOAD_DIR`); needs a shared filesystem to run
+  more than one app node;
+* "s3": any S3-compatible object store (AWS, MinIO, R2, ...). Uploads are
+  streamed with multipart upload and downloads use presigned URLs, so file
+  bytes never pass through the app servers. Needs `boto3`. Add a bucket
+  lifecycle rule that aborts incomplete multipart uploads after a day;
+* "memory": an in-process dict, for tests. Only usable with the "eager"
+  document pipeline, as worker processes would not share it.
+
+When `STORAGE_PUBLIC_BASE_URL` is set (a CDN in front of the bucket or the
+upload directory), download URLs of objects the caller marks `public` point
+there instead. Those URLs are unsigned and never expire, so callers only
+mark derived, non-sensitive files public (see `Document.is_public`).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.core.security import download_url_expiry
+
+TEMP_PREFIX = ".upload-"
+# Every stored key is content-addressed, so it never changes once written
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+# Presigned URLs kept per process (see S3Storage.url)
+PRESIGNED_URL_CACHE_SIZE = 10_000
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    modified: float  # POSIX timestamp
+
+
+class PendingUpload:
+    """
+    A file being written to storage whose final key is not known yet
+    (content-addressed keys need the digest of the whole body). `write`
+    the chunks, `close`, then either `commit` it under its key or `abort`.
+    All methods block; call them from a thread.
+    """
+
+    def write(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def commit(self, key: str, *, content_type: Optional[str] = None) -> None:
+        """Store the body under `key`, or drop it if `key` already exists."""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        raise NotImplementedError
+
+
+class Storage:
+    def open_upload(self) -> PendingUpload:
+        raise NotImplementedError
+
+    def put(self, key: str, data: bytes, *, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def put_temp(self, data: bytes) -> str:
+        """Store `data` under a fresh temporary key and return the key."""
+        key = TEMP_PREFIX + uuid.uuid4().hex
+        self.put(key, data)
+        return key
+
+    def promote(self, temp_key: str, key: str, *, content_type: Optional[str] = None) -> None:
+        """Move a `put_temp` object to `key`, or drop it if `key` exists."""
+        if not self.exists(key):
+            self.put(key, self.read(temp_key), content_type=content_type)
+        self.delete(temp_key)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Yield a filesystem path holding the object's bytes."""
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(self.read(key))
+            yield path
+        finally:
+            os.remove(path)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this machine, if the backend keeps one."""
+        return None
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> None:
+        for obj in list(self.list(prefix)):
+            self.delete(obj.key)
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        raise NotImplementedError
+
+    def url(
+        self,
+        key: str,
+        *,
+        public: bool = False,
+        expires: int = settings.DOWNLOAD_URL_TTL_SECONDS,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        A URL clients can fetch the object from directly, or None when it
+        has to be served by the app. Only `public` objects get a (permanent,
+        unsigned) CDN URL; backends that sign URLs keep each one stable for
+        a window of `expires` seconds.
+        """
+        if public and settings.STORAGE_PUBLIC_BASE_URL:
+            return settings.STORAGE_PUBLIC_BASE_URL.rstrip("/") + "/" + quote(key)
+        return None
+
+
+class _LocalUpload(PendingUpload):
+    def __init__(self, storage: "LocalStorage") -> None:
+        self.storage = storage
+        os.makedirs(storage.root, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=storage.root, prefix=TEMP_PREFIX)
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.file.write(chunk)
+
+    def close(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def commit(self, key: str, *, content_type: Optional[str] = None) -> None:
+        final_path = self.storage.local_path(key)
+        if os.path.exists(final_path):
+            os.remove(self.path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self.path, final_path)
+
+    def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def open_upload(self) -> PendingUpload:
+        return _LocalUpload(self)
+
+    def put(self, key: str, data: bytes, *, content_type: Optional[str] = None) -> None:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TEMP_PREFIX)
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.local_path(key))
+
+    def promote(self, temp_key: str, key: str, *, content_type: Optional[str] = None) -> None:
+        final_path = self.local_path(key)
+        if os.path.exists(final_path):
+            self.delete(temp_key)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self.local_path(temp_key), final_path)
+
+    def read(self, key: str) -> bytes:
+        with open(self.local_path(key), "rb") as f:
+            return f.read()
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield self.local_path(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix: str) -> None:
+        shutil.rmtree(self.local_path(prefix), ignore_errors=True)
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        for directory, _, files in os.walk(self.local_path(prefix)):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield StoredObject(key, stat.st_size, stat.st_mtime)
+
+
+class _S3Upload(PendingUpload):
+    """
+    Buffers up to one part in memory; bodies smaller than a part are sent
+    with a single PUT on commit, larger ones as a multipart upload to a
+    temporary key that is copied server-side to the final key.
+    """
+
+    def __init__(self, storage: "S3Storage") -> None:
+        self.storage = storage
+        self.buffer = bytearray()
+        self.temp_key = TEMP_PREFIX + uuid.uuid4().hex
+        self.upload_id: Optional[str] = None
+        self.parts: List[Dict[str, object]] = []
+        self.completed = False
+
+    def _flush_part(self) -> None:
+        client = self.storage.client
+        if self.upload_id is None:
+            self.upload_id = client.create_multipart_upload(
+                Bucket=self.storage.bucket, Key=self.storage.prefix + self.temp_key
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = client.upload_part(
+            Bucket=self.storage.bucket,
+            Key=self.storage.prefix + self.temp_key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+        self.buffer.clear()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        if len(self.buffer) >= self.storage.part_size:
+            self._flush_part()
+
+    def close(self) -> None:
+        if self.upload_id is None:
+            return  # small body: sent whole on commit
+        if self.buffer:
+            self._flush_part()
+        self.storage.client.complete_multipart_upload(
+            Bucket=self.storage.bucket,
+            Key=self.storage.prefix + self.temp_key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        self.completed = True
+
+    def commit(self, key: str, *, content_type: Optional[str] = None) -> None:
+        if self.upload_id is None:
+            if not self.storage.exists(key):
+                self.storage.put(key, bytes(self.buffer), content_type=content_type)
+            self.buffer.clear()
+            return
+        self.storage.promote(self.temp_key, key, content_type=content_type)
+        self.upload_id = None
+        self.completed = False
+
+    def abort(self) -> None:
+        if self.completed:
+            self.storage.delete(self.temp_key)
+        elif self.upload_id is not None:
+            self.storage.client.abort_multipart_upload(
+                Bucket=self.storage.bucket,
+                Key=self.storage.prefix + self.temp_key,
+                UploadId=self.upload_id,
+            )
+        self.upload_id = None
+        self.completed = False
+        self.buffer.clear()
+
+
+class S3Storage(Storage):
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        part_size: int = settings.S3_MULTIPART_CHUNK_SIZE,
+    ) -> None:
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        # S3 rejects parts under 5 MiB (except the last one)
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        # Clients are thread-safe; one per process is shared by all requests
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(signature_version="s3v4", max_pool_connections=50),
+        )
+        self._presigned: "OrderedDict[tuple, str]" = OrderedDict()
+        self._presigned_lock = threading.Lock()
+
+    @staticmethod
+    def object_params(content_type: Optional[str]) -> Dict[str, str]:
+        params = {"CacheControl": IMMUTABLE_CACHE}
+        if content_type:
+            params["ContentType"] = content_type
+        return params
+
+    def open_upload(self) -> PendingUpload:
+        return _S3Upload(self)
+
+    def put(self, key: str, data: bytes, *, content_type: Optional[str] = None) -> None:
+        self.client.put_object(
+            Bucket=self.bucket, Key=self.prefix + key, Body=data, **self.object_params(content_type)
+        )
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def promote(self, temp_key: str, key: str, *, content_type: Optional[str] = None) -> None:
+        if not self.exists(key):
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self.prefix + key,
+                CopySource={"Bucket": self.bucket, "Key": self.prefix + temp_key},
+                MetadataDirective="REPLACE",
+                **self.object_params(content_type),
+            )
+        self.delete(temp_key)
+
+    def read(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                self.client.download_fileobj(self.bucket, self.prefix + key, out)
+            yield path
+        finally:
+            os.remove(path)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = [{"Key": self.prefix + obj.key} for obj in self.list(prefix)]
+        for start in range(0, len(keys), 1000):  # DeleteObjects takes up to 1000 keys
+            self.client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": keys[start:start + 1000], "Quiet": True}
+            )
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    item["Key"][len(self.prefix):],
+                    item["Size"],
+                    item["LastModified"].timestamp(),
+                )
+
+    def url(
+        self,
+        key: str,
+        *,
+        public: bool = False,
+        expires: int = settings.DOWNLOAD_URL_TTL_SECONDS,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        cdn = super().url(key, public=public, expires=expires, filename=filename, content_type=content_type)
+        if cdn:
+            return cdn
+        # A presigned URL embeds its signing time, so signing again on every
+        # listing would give every client a new URL (and a cache miss) each
+        # time. Sign once per window and hand out that URL until it ends.
+        expires_at = download_url_expiry(expires)
+        cache_key = (key, filename, content_type, expires_at)
+        with self._presigned_lock:
+            url = self._presigned.get(cache_key)
+            if url is not None:
+                self._presigned.move_to_end(cache_key)
+                return url
+        params = {"Bucket": self.bucket, "Key": self.prefix + key}
+        if filename:
+            params["ResponseContentDisposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        if content_type:
+            params["ResponseContentType"] = content_type
+        # Presigning is a local HMAC computation; no request is made
+        url = self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=expires_at - int(time.time())
+        )
+        with self._presigned_lock:
+            self._presigned[cache_key] = url
+            while len(self._presigned) > PRESIGNED_URL_CACHE_SIZE:
+                self._presigned.popitem(last=False)
+        return url
+
+
+class _MemoryUpload(PendingUpload):
+    def __init__(self, storage: "InMemoryStorage") -> None:
+        self.storage = storage
+        self.buffer = bytearray()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+
+    def close(self) -> None:
+        pass
+
+    def commit(self, key: str, *, content_type: Optional[str] = None) -> None:
+        if not self.storage.exists(key):
+            self.storage.put(key, bytes(self.buffer), content_type=content_type)
+        self.buffer.clear()
+
+    def abort(self) -> None:
+        self.buffer.clear()
+
+
+class InMemoryStorage(Storage):
+    """Process-local fake with the same semantics as the real backends."""
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def open_upload(self) -> PendingUpload:
+        return _MemoryUpload(self)
+
+    def put(self, key: str, data: bytes, *, content_type: Optional[str] = None) -> None:
+        with self._lock:
+            self.objects[key] = (data, time.time())
+
+    def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def read(self, key: str) -> bytes:
+        try:
+            return self.objects[key][0]
+        except KeyError:
+            raise FileNotFoundError(key) from None
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        with self._lock:
+            items = [(k, v) for k, v in self.objects.items() if k.startswith(prefix)]
+        for key, (data, modified) in items:
+            yield StoredObject(key, len(data), modified)
+
+
+_storage: Optional[Storage] = None
+_storage_pid: Optional[int] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage() -> Storage:
+    backend = settings.STORAGE_BACKEND
+    if backend == "s3":
+        return S3Storage(
+            settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    if backend == "memory":
+        return InMemoryStorage()
+    return LocalStorage(settings.UPLOAD_DIR)
+
+
+def get_storage() -> Storage:
+    """The configured backend; one instance per process (not shared across fork)."""
+    global _storage, _storage_pid
+    with _storage_lock:
+        if _storage is None or _storage_pid != os.getpid():
+            _storage, _storage_pid = create_storage(), os.getpid()
+        return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> None:
+    """Swap the backend (tests); None resets to the configured one."""
+    global _storage, _storage_pid
+    with _storage_lock:
+        _storage, _storage_pid = storage, os.getpid() if storage else None
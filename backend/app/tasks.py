@@ -0,0 +1,89 @@
+"""
+Background job definitions. See app/services/jobs.py for how they are
+enqueued, retried and scheduled, and /api/v1/jobs to run or follow them.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.db.counters import BACKFILL_DOCUMENT_COUNTS
+from app.db.rollups import BACKFILL_EVENT_ROLLUPS
+from app.db.session import SessionLocal
+from app.models.document import Document, ProcessingStatus
+from app.services.jobs import JobContext, job
+
+
+@job(every=60 * 60)
+def gc_document_blobs(ctx: JobContext, grace_seconds: Optional[int] = None) -> Dict[str, int]:
+    """Remove stored blobs nothing refers to (see app/gc_document_blobs.py)."""
+    from app.gc_document_blobs import collect
+    from app.services.storage import get_storage
+
+    db = SessionLocal()
+    try:
+        if grace_seconds is None:
+            grace_seconds = settings.BLOB_GC_GRACE_SECONDS
+        return collect(db, get_storage(), grace_seconds)
+    finally:
+        db.close()
+
+
+# Not scheduled: the triggers keep both tables exact, and the rebuild
+# blocks writers on Postgres, so it is only run by hand when needed
+@job(max_attempts=1)
+def reconcile_counters(ctx: JobContext) -> Dict[str, int]:
+    """
+    Rebuild the trigger-maintained `document_counts` and
+    `analytics_event_rollups` from their source tables, repairing drift
+    from writes made while the triggers were missing. On Postgres uploads,
+    reviews and event tracking wait while their table is rebuilt; run it at
+    a quiet time.
+    """
+    db = SessionLocal()
+    try:
+        dialect_name = db.get_bind().dialect.name
+        steps = [
+            ("document_counts", "documents", BACKFILL_DOCUMENT_COUNTS),
+            ("analytics_event_rollups", "analytics_events", BACKFILL_EVENT_ROLLUPS[dialect_name]),
+        ]
+        rows = {}
+        for i, (table, source, backfill) in enumerate(steps):
+            ctx.progress(i, len(steps), f"Rebuilding {table}")
+            # One transaction per table; on Postgres writers wait meanwhile
+            # so nothing is counted twice or missed
+            if dialect_name == "postgresql":
+                db.execute(text(f"LOCK TABLE {source} IN SHARE ROW EXCLUSIVE MODE"))
+            db.execute(text(f"DELETE FROM {table}"))
+            rows[table] = db.execute(text(backfill)).rowcount
+            db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+@job(max_attempts=1)
+def reprocess_documents(ctx: JobContext, status: str = "failed", limit: int = 1000) -> Dict[str, int]:
+    """Run the document pipeline again for documents whose processing failed (or is pending)."""
+    from app.services.document_pipeline import process_document
+
+    processing_status = ProcessingStatus(status)
+    db = SessionLocal()
+    try:
+        ids = db.execute(
+            select(Document.id)
+            .where(Document.processing_status == processing_status)
+            .order_by(Document.id)
+            .limit(limit)
+        ).scalars().all()
+    finally:
+        db.close()
+    stats = {"processed": 0, "failed": 0}
+    for i, document_id in enumerate(ids):
+        try:
+            process_document(document_id)
+            stats["processed"] += 1
+        except Exception:
+            stats["failed"] += 1  # marked FAILED by the pipeline
+        ctx.progress(i + 1, len(ids), f"{i + 1} of {len(ids)} documents")
+    return stats
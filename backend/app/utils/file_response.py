@@ -0,0 +1,163 @@
+import os
+import re
+from email.utils import formatdate
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE = "private, no-cache"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison
+    strip = lambda tag: tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+    return any(tag.strip() == "*" or strip(tag) == strip(etag) for tag in header.split(","))
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (malformed or several
+    ranges, answered with the full body) and raises ValueError when the
+    range cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """
+    File response with Range, conditional GET and cache header support.
+
+    * `etag` should be a strong, content-derived tag (e.g. the SHA-256 of a
+      content-addressed blob); `immutable` then marks the response as
+      cacheable forever.
+    * Bodies go out with the ASGI zero-copy extension when the server offers
+      it, or via `X-Accel-Redirect` to `accel_redirect` (nginx sendfile)
+      when set; otherwise they are streamed in chunks off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        request_headers: Mapping[str, str],
+        media_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        immutable: bool = False,
+        filename: Optional[str] = None,
+        accel_redirect: Optional[str] = None,
+        method: str = "GET",
+    ) -> None:
+        super().__init__(status_code=200, media_type=media_type or "application/octet-stream")
+        self.path = path
+        self.accel_redirect = accel_redirect
+        self.send_body = method != "HEAD"
+        self.start, self.end = 0, -1
+
+        stat = os.stat(path)
+        size = stat.st_size
+        if etag is None:
+            etag = f'W/"{int(stat.st_mtime):x}-{size:x}"'
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            "accept-ranges": "bytes",
+        }
+        if filename:
+            headers["content-disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        self.headers.update(headers)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            self.status_code = 304
+            self.send_body = False
+            del self.headers["content-length"]
+            return
+
+        if accel_redirect:
+            # The proxy serves the bytes, including any Range request
+            self.headers["x-accel-redirect"] = accel_redirect
+            self.send_body = False
+            return
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                self.status_code = 416
+                self.send_body = False
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                return
+        if byte_range:
+            self.start, self.end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        else:
+            self.start, self.end = 0, size - 1
+        self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        count = self.end - self.start + 1
+        if not self.send_body or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f.fileno(),
+                        "offset": self.start,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
+            if remaining > 0:  # file shrank underneath us; end the body
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,75 @@
+import hashlib
+from typing import NamedTuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.storage import PendingUpload, Storage
+
+
+class FileTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(f"File exceeds the maximum size of {max_size} bytes")
+        self.max_size = max_size
+
+
+class StoredFile(NamedTuple):
+    upload: PendingUpload
+    size: int
+    sha256: str
+
+
+def blob_path(sha256: str) -> str:
+    """
+    Storage key for content with this digest: `ab/cd/<sha256>`.
+
+    Two levels of 256-way sharding keep every directory small even with
+    millions of stored files.
+    """
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def derived_prefix(sha256: str) -> str:
+    """Key prefix of the thumbnails/previews generated from a blob."""
+    return f"derived/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _write_chunk(upload: PendingUpload, digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    upload.write(chunk)
+
+
+async def save_upload(
+    upload: UploadFile,
+    storage: Storage,
+    *,
+    max_size: int = settings.MAX_FILE_SIZE,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+) -> StoredFile:
+    """
+    Stream `upload` into `storage` without holding it in memory.
+
+    Chunks are hashed and written from the threadpool, so the event loop
+    never blocks on disk or network I/O. The returned upload is complete;
+    `commit` it under `blob_path(sha256)` (or `abort` it) once the metadata
+    is committed. Raises `FileTooLargeError` as soon as more than
+    `max_size` bytes have been read, leaving nothing behind in storage.
+    """
+    pending = await run_in_threadpool(storage.open_upload)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLargeError(max_size)
+            await run_in_threadpool(_write_chunk, pending, digest, chunk)
+        await run_in_threadpool(pending.close)
+    except BaseException:
+        await run_in_threadpool(pending.abort)
+        raise
+    return StoredFile(upload=pending, size=size, sha256=digest.hexdigest())
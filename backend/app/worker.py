@@ -0,0 +1,18 @@
+"""
+Celery worker entry point:
+
+    celery -A app.worker worker -Q documents,jobs
+"""
+from app.core.celery_app import celery_app
+from app.services.document_pipeline import process_document
+from app.services.jobs import run_job
+
+
+@celery_app.task
+def process_document_task(document_id: int) -> None:
+    process_document(document_id)
+
+
+@celery_app.task
+def run_job_task(job_id: int) -> None:
+    run_job(job_id)
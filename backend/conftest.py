@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def query_profiler(request):
+    """
+    Profile every query the test runs and fail it on a suspected N+1
+    (see app/db/query_profiler.py). Adjust per test with
+    `@pytest.mark.query_profiler(threshold=..., slow_ms=...)`; the
+    returned profile can also be inspected (`.total`, `.groups`) or
+    checked early with `.check()`.
+    """
+    # Imported here: the app (and its engine) should only load for tests that need it
+    from app.core.config import settings
+    from app.db import query_profiler as profiler
+    from app.db.session import engine
+
+    marker = request.node.get_closest_marker("query_profiler")
+    options = dict(marker.kwargs) if marker else {}
+    profiler.install(engine)
+    profile = profiler.start_global_profile(
+        request.node.nodeid,
+        threshold=options.get("threshold", settings.QUERY_PROFILER_REPEAT_THRESHOLD),
+        slow_ms=options.get("slow_ms", settings.QUERY_PROFILER_SLOW_MS),
+    )
+    try:
+        yield profile
+    finally:
+        profiler.stop_global_profile()
+    profile.report()
+    profile.check()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_profiler(threshold, slow_ms): options for the query_profiler fixture"
+    )
@@ -1,7 +1,171 @@
-bind = "0.0.0.0:8000"
-workers = 2
-threads = 2
-timeout = 120
+"""
+Production server profile: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn_conf.py app.main:app
+
+Sizing
+    One async worker per available core (cgroup CPU quota and affinity
+    aware), capped by what fits in memory at `WORKER_MEMORY_MB` per worker
+    after `MEMORY_RESERVE_MB` is set aside for the master, the document
+    processing pool and the OS. `WEB_CONCURRENCY` overrides the result.
+
+Preload
+    The app is imported once in the master and workers are forked from it,
+    so modules, models and indexes loaded at import time are shared
+    copy-on-write. The heap is frozen before forking so the garbage
+    collector's bookkeeping does not touch (and copy) those pages. Anything
+    holding sockets -- the database pool -- is reset in each worker.
+
+Reloads
+    `kill -HUP <master>` replaces workers gracefully with the configuration
+    re-read, but with preload the code stays what the master imported. To
+    deploy new code without dropping connections send USR2 (a new master
+    and workers start next to the old ones), then QUIT to the old master;
+    or restart the container behind the load balancer.
+
+Benchmark: see "Production server" in the README.
+"""
+import gc
+import multiprocessing
+import os
+import sys
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cgroup_cpus():
+    """CPU quota of the container (cgroup v2, then v1), or None."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        cpus = multiprocessing.cpu_count()
+    quota = _cgroup_cpus()
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota + 0.5)))
+    return cpus
+
+
+def available_memory_mb():
+    """Memory limit of the container, else the machine's total, or None."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if value != "max" and int(value) < 1 << 60:
+            return int(value) // (1024 * 1024)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def worker_count():
+    if os.environ.get("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    # Async workers do not block on I/O, so more workers than cores only
+    # adds context switches and memory
+    workers = available_cpus()
+    memory = available_memory_mb()
+    if memory is not None:
+        usable = memory - _env_int("MEMORY_RESERVE_MB", 512)
+        workers = min(workers, usable // _env_int("WORKER_MEMORY_MB", 256))
+    return max(1, workers)
+
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = worker_count()
+preload_app = True
+
+# Longer than the load balancer's idle timeout (60s on most), so the
+# balancer, not us, closes idle connections and never races a reuse
+keepalive = _env_int("KEEPALIVE", 75)
+# Seconds a worker may go without heartbeat before it is killed; uploads
+# stream off the event loop, so this only catches a wedged worker
+timeout = _env_int("TIMEOUT", 120)
+# Time in-flight requests get to finish on reload or shutdown
+graceful_timeout = _env_int("GRACEFUL_TIMEOUT", 30)
+
+# Recycle workers now and then to bound slow leaks and fragmentation; the
+# jitter keeps them from all restarting at once
+max_requests = _env_int("MAX_REQUESTS", 10000)
+max_requests_jitter = _env_int("MAX_REQUESTS_JITTER", max_requests // 10)
+
+# Heartbeat files on tmpfs: a slow overlay/disk filesystem otherwise
+# stalls workers and gets them killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Proxies whose X-Forwarded-For/-Proto uvicorn trusts (comma-separated
+# addresses, no CIDR ranges). Behind a load balancer this must list its
+# addresses: the request's client IP then comes from X-Forwarded-For, and
+# per-IP rate limits (app/core/admission.py) apply to real clients rather
+# than to the proxy. "*" trusts the first X-Forwarded-For entry, so use it
+# only when the app is reachable solely through a proxy that overwrites
+# the header (nginx: proxy_set_header X-Forwarded-For $remote_addr).
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
 accesslog = "-"
 errorlog = "-"
 
+
+def on_starting(server):
+    # Metric files left by a previous run would be summed with ours
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir and os.path.isdir(multiproc_dir):
+        for name in os.listdir(multiproc_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(multiproc_dir, name))
+
+
+def when_ready(server):
+    server.log.info("Serving with %d %s workers", server.num_workers, worker_class)
+    # The app is loaded; move everything alive now to the permanent
+    # generation so collections in the workers leave these pages shared
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    session = sys.modules.get("app.db.session")
+    if session is not None:
+        # Connections opened in the master must not be shared with children;
+        # close=False leaves them to the master instead of closing them here
+        for engine in [session.engine, *session.replica_engines]:
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,78 @@
+"""
+Build and lookup cost of the autocomplete prefix index.
+
+Builds a `PrefixIndex` over `--size` synthetic resource titles with
+Zipf-like popularity (no database needed), then times lookups of prefixes
+typed the way a search box sends them: the first 1..8 characters of a
+random word of a random title.
+
+    python scripts/benchmark_autocomplete.py --size 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# The index never touches the database, but importing the app creates an engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.autocomplete import PrefixIndex, Suggestion, normalize  # noqa: E402
+
+WORDS = (
+    "national state district rural urban skill development apprenticeship training "
+    "scholarship merit women youth digital data science engineering nursing welding "
+    "electrician plumbing tailoring agriculture dairy farming finance accounting "
+    "banking retail logistics driver computer python excel teacher assistant "
+    "programme scheme course workshop internship fellowship certificate diploma"
+).split()
+
+
+def titles(size: int, rng: random.Random):
+    for i in range(size):
+        yield " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 6))) + f" {i}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--memory", action="store_true", help="also trace the index's memory (slow)")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    suggestions = [
+        Suggestion(title, "resource", i, 1000 / (1 + rng.paretovariate(1.2)))
+        for i, title in enumerate(titles(args.size, rng))
+    ]
+    start = time.perf_counter()
+    index = PrefixIndex(suggestions)
+    print(f"Built {len(index):,} suggestions in {time.perf_counter() - start:.2f} s")
+    if args.memory:
+        tracemalloc.start()
+        PrefixIndex(suggestions)
+        print(f"  {tracemalloc.get_traced_memory()[0] / 2**20:.0f} MiB")
+        tracemalloc.stop()
+
+    prefixes = []
+    for _ in range(args.lookups):
+        word = rng.choice(normalize(rng.choice(suggestions).text).split())
+        prefixes.append(word[: rng.randint(1, 8)])
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.lookup(prefix, 10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    for p in (50, 95, 99, 99.9):
+        value = timings[int(len(timings) * p / 100)]
+        print(f"  p{p:<5} {value * 1000:7.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Serialization and compression cost of a list response.
+
+Builds an admin document listing of `--rows` rows (the shape
+GET /documents/admin returns) and times, per response:
+
+* FastAPI's default path: `response_model` validation, `jsonable_encoder`,
+  stdlib JSON rendering;
+* the same with orjson rendering (FastJSONResponse as the default class);
+* rows returned directly as a FastJSONResponse (what the list endpoints do);
+
+then the size and time of gzip and brotli on the resulting body.
+
+    python scripts/benchmark_responses.py --rows 500
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.core.responses import FastJSONResponse, brotli  # noqa: E402
+from app.models.document import DocumentStatus, DocumentType  # noqa: E402
+
+
+def payload(rows: int) -> dict:
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    items = [
+        {
+            "id": i,
+            "userId": 1000 + i % 97,
+            "userName": f"Applicant {i % 97}",
+            "userEmail": f"applicant{i % 97}@example.com",
+            "type": list(DocumentType)[i % len(DocumentType)],
+            "status": list(DocumentStatus)[i % len(DocumentStatus)],
+            "uploadedAt": now - timedelta(minutes=i),
+            "fileUrl": f"/api/v1/documents/{i}/file?variant=original&token=eyJhbGciOiJIUzI1NiJ9.{i:08d}",
+            "thumbnailUrl": f"/api/v1/documents/{i}/file?variant=thumbnail&token=eyJhbGciOiJIUzI1NiJ9.{i:08d}",
+            "previewUrl": f"/api/v1/documents/{i}/file?variant=preview&token=eyJhbGciOiJIUzI1NiJ9.{i:08d}",
+            "pageCount": 1 + i % 5,
+            "fileType": "pdf",
+            "fileSize": str(200_000 + i),
+            "reviewedBy": None,
+            "rejectionReason": None,
+        }
+        for i in range(rows)
+    ]
+    return {"items": items, "facets": {"status": {"pending": rows}}, "nextCursor": None}
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-3 mean milliseconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    content = payload(args.rows)
+    field = create_response_field(name="Response_list_documents_admin", type_=dict)
+    loop = asyncio.new_event_loop()
+
+    def fastapi_default(response_class=JSONResponse) -> bytes:
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return response_class(encoded).body
+
+    serializers = [
+        ("response_model + jsonable_encoder + json", fastapi_default),
+        ("response_model + jsonable_encoder + orjson", lambda: fastapi_default(FastJSONResponse)),
+        ("FastJSONResponse returned directly", lambda: FastJSONResponse(content).body),
+    ]
+    print(f"Serializing {args.rows} admin rows")
+    baseline = None
+    for name, fn in serializers:
+        ms = timed(fn, args.repeat)
+        baseline = baseline or ms
+        print(f"  {name:<44}{ms:>9.2f} ms  {baseline / ms:>5.1f}x")
+
+    body = FastJSONResponse(content).body
+    compressors = [("gzip -6", lambda: gzip.compress(body, 6))]
+    if brotli is not None:
+        compressors.append(("brotli -q4", lambda: brotli.compress(body, quality=4)))
+    print(f"\nCompressing {len(body):,} bytes")
+    for name, fn in compressors:
+        ms = timed(fn, args.repeat)
+        size = len(fn())
+        print(f"  {name:<12}{size:>10,} bytes  {len(body) / size:>5.1f}x smaller  {ms:>7.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
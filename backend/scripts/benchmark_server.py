@@ -0,0 +1,103 @@
+"""
+Throughput per core of the production server profile.
+
+Starts gunicorn with gunicorn_conf.py at increasing worker counts, drives
+each with the load test (scripts/loadtest.py --url) and reports requests
+per second, per worker and p95 latency:
+
+    python scripts/benchmark_server.py --workers 1 2 4 --users 50
+
+Uses DATABASE_URL when set (use Postgres for numbers that mean anything:
+SQLite serializes writes across workers), otherwise a throwaway SQLite
+database.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from gunicorn_conf import available_cpus  # noqa: E402
+
+
+def wait_until_up(url: str, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+def bench(workers: int, args: argparse.Namespace, env: dict, workdir: str) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+        cwd=BACKEND_DIR,
+        env=dict(env, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{args.port}"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(url, time.monotonic() + 60)
+        results = os.path.join(workdir, f"results-{workers}.json")
+        subprocess.run(
+            [
+                sys.executable, os.path.join(BACKEND_DIR, "scripts", "loadtest.py"),
+                "--url", url, "--users", str(args.users), "--iterations", str(args.iterations),
+                "--json", results,
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=False,
+        )
+        with open(results) as f:
+            return json.load(f)["TOTAL"]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 1 .. cores)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{workdir}/benchmark.db")
+    env.setdefault("UPLOAD_DIR", os.path.join(workdir, "uploads"))
+    env.setdefault("STORAGE_BACKEND", "local")
+    env.setdefault("DOCUMENT_PIPELINE_BROKER", "eager")
+    env.setdefault("FIRST_SUPERUSER_EMAIL", "loadtest-admin@example.com")
+    env.setdefault("FIRST_SUPERUSER_PASSWORD", "LoadTest123")
+    subprocess.run([sys.executable, "-m", "app.initial_data"], cwd=BACKEND_DIR, env=env, check=True)
+
+    cores = available_cpus()
+    counts = args.workers or list(range(1, cores + 1))
+    print(f"{cores} cores available")
+    print(f"{'workers':>8}{'requests':>10}{'errors':>8}{'rps':>10}{'rps/worker':>12}{'p95_ms':>10}")
+    for workers in counts:
+        total = bench(workers, args, env, workdir)
+        print(
+            f"{workers:>8}{total['requests']:>10}{total['errors']:>8}{total['rps']:>10}"
+            f"{total['rps'] / workers:>12.2f}{total['p95_ms']:>10}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Import-time profile check for the ASGI app.
+
+Imports `app.main` in a fresh interpreter and fails if worker start-up is
+slow or drags in heavy ML libraries that should only load on first use.
+
+    python scripts/check_import_time.py [--budget 1.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be imported just by booting a web worker
+FORBIDDEN_MODULES = ("tensorflow", "pandas", "sklearn", "torch")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import app.main  # noqa: F401
+elapsed = time.perf_counter() - start
+loaded = [m for m in {forbidden!r} if m in sys.modules]
+print(f"{{elapsed:.4f}}")
+print(",".join(loaded))
+"""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=1.0, help="max seconds to import app.main")
+    args = parser.parse_args()
+
+    cmd = [sys.executable, "-c", PROBE.format(forbidden=FORBIDDEN_MODULES)]
+    # Time a clean import first; `-X importtime` itself adds overhead
+    timed = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if timed.returncode != 0:
+        sys.stderr.write(timed.stderr)
+        return timed.returncode
+    elapsed_line, loaded_line = timed.stdout.splitlines()[-2:]
+    elapsed = float(elapsed_line)
+    loaded = [m for m in loaded_line.split(",") if m]
+
+    # `-X importtime` writes "self | cumulative | name" rows to stderr
+    profiled = subprocess.run(
+        cmd[:1] + ["-X", "importtime"] + cmd[1:], cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in profiled.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if parts[1].isdigit():
+            rows.append((int(parts[1]), parts[2]))
+    print("Slowest imports (cumulative, profiled run):")
+    for cumulative, name in sorted(rows, reverse=True)[:15]:
+        print(f"  {cumulative / 1e6:8.3f}s  {name}")
+    print(f"app.main imported in {elapsed:.3f}s (budget {args.budget:.3f}s)")
+
+    ok = True
+    if loaded:
+        print(f"FAIL: heavy modules loaded at import time: {', '.join(loaded)}")
+        ok = False
+    if elapsed > args.budget:
+        print("FAIL: import time over budget")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
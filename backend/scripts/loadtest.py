@@ -0,0 +1,311 @@
+"""
+End-to-end load test for the API.
+
+Virtual users run scripted journeys concurrently (register, login, save
+education details, fetch recommendations, upload a document, track
+events, list their documents) while admins work the review queue (filtered
+listing, bulk verify). Reports throughput and latency percentiles per
+endpoint and compares them with a baseline file; a regression beyond the
+tolerance, or any failed request, makes the run exit non-zero. Requests
+shed by admission control (429/503 with Retry-After) are retried after the
+advertised delay and counted in the "shed" column.
+
+Login and register hash passwords with bcrypt, which is slow on purpose:
+with every virtual user signing in at once they queue behind the login
+concurrency cap, and their latency measures that queue. They (and TOTAL,
+whose upper percentiles they dominate) are checked on throughput instead
+of p95.
+
+`/analytics/track` (the "track_event" rows) is still a stub that echoes the
+event without touching the database; its numbers will change once events
+are persisted.
+
+In-process, over ASGI, against a throwaway SQLite database (or whatever
+DATABASE_URL points at, e.g. a local Postgres):
+
+    python scripts/loadtest.py --users 20 --iterations 5
+
+Against a running server (e.g. the gunicorn profile); the admin account is
+FIRST_SUPERUSER_EMAIL / FIRST_SUPERUSER_PASSWORD unless given:
+
+    python scripts/loadtest.py --url http://localhost:8000 --users 50
+
+Record a new baseline on the machine that runs the check:
+
+    python scripts/loadtest.py --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "scripts", "loadtest_baseline.json")
+API = "/api/v1"
+PASSWORD = "LoadTest123"
+MAX_ATTEMPTS = 3  # per request, when shed by admission control
+PDF = b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF\n"
+# Compared on requests per second rather than p95 latency (see above)
+THROUGHPUT_GATED = {"login", "register", "TOTAL"}
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.shed: Dict[str, int] = defaultdict(int)
+        self.failures: List[str] = []
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Latency includes waiting out 429/503 Retry-After, as a real client would."""
+        start = time.perf_counter()
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError as exc:
+                response, detail = None, repr(exc)
+                break
+            detail = f"{response.status_code} {response.text[:200]}"
+            retry_after = response.headers.get("retry-after")
+            if response.status_code not in (429, 503) or retry_after is None:
+                break
+            self.shed[name] += 1
+            if attempt + 1 < MAX_ATTEMPTS:
+                await asyncio.sleep(float(retry_after))
+        self.latencies[name].append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+            if len(self.failures) < 20:
+                self.failures.append(f"{name}: {detail}")
+            return None
+        return response
+
+
+async def login(client: httpx.AsyncClient, rec: Recorder, email: str, password: str) -> Optional[Dict[str, str]]:
+    response = await rec.call(
+        client, "login", "POST", f"{API}/auth/login/access-token",
+        data={"username": email, "password": password},
+    )
+    if response is None:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def user_journey(client: httpx.AsyncClient, rec: Recorder, iterations: int, events: int) -> None:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    registered = await rec.call(
+        client, "register", "POST", f"{API}/auth/register",
+        json={"email": email, "password": PASSWORD, "full_name": "Load Test",
+              "phone_number": str(uuid.uuid4().int)[:10]},
+    )
+    if registered is None:
+        return
+    for i in range(iterations):
+        headers = await login(client, rec, email, PASSWORD)
+        if headers is None:
+            return
+        await rec.call(
+            client, "upsert_education", "PUT", f"{API}/users/me/education", headers=headers,
+            json={"degree_name": "B.Tech", "specialization": "computer science",
+                  "areas_of_interest": "react, data, marketing", "degree_year": 2020 + i},
+        )
+        await rec.call(client, "recommendations", "GET", f"{API}/recommendations/me", headers=headers)
+        await rec.call(
+            client, "upload_document", "POST", f"{API}/documents/upload", headers=headers,
+            files={"file": (f"doc-{i}.pdf", PDF + uuid.uuid4().bytes, "application/pdf")},
+        )
+        for n in range(events):
+            await rec.call(
+                client, "track_event", "POST", f"{API}/analytics/track", headers=headers,
+                json={"event_name": "page_view", "page_url": f"/resources/{n}"},
+            )
+        await rec.call(client, "my_documents", "GET", f"{API}/documents/me", headers=headers)
+
+
+async def admin_journey(
+    client: httpx.AsyncClient, rec: Recorder, users_done: asyncio.Event, email: str, password: str
+) -> None:
+    headers = await login(client, rec, email, password)
+    if headers is None:
+        return
+    # Work the review queue for as long as users keep uploading
+    while not users_done.is_set():
+        listing = await rec.call(
+            client, "admin_documents", "GET", f"{API}/documents/admin",
+            headers=headers, params={"status_filter": "pending", "limit": 50},
+        )
+        if listing is None:
+            continue
+        items = listing.json()["items"][:20]
+        if items:
+            await rec.call(
+                client, "review_documents", "POST", f"{API}/documents/review", headers=headers,
+                json={"items": [{"id": item["id"], "decision": "verify"} for item in items]},
+            )
+        await asyncio.sleep(0.2)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(rec: Recorder, wall: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for name, values in sorted(rec.latencies.items()):
+        values = sorted(values)
+        summary[name] = {
+            "requests": len(values),
+            "errors": rec.errors.get(name, 0),
+            "shed": rec.shed.get(name, 0),
+            "rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p90_ms": round(percentile(values, 90) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    total = sum(len(v) for v in rec.latencies.values())
+    everything = sorted(v for values in rec.latencies.values() for v in values)
+    summary["TOTAL"] = {
+        "requests": total,
+        "errors": sum(rec.errors.values()),
+        "shed": sum(rec.shed.values()),
+        "rps": round(total / wall, 2),
+        "p50_ms": round(percentile(everything, 50) * 1000, 2),
+        "p90_ms": round(percentile(everything, 90) * 1000, 2),
+        "p95_ms": round(percentile(everything, 95) * 1000, 2),
+        "p99_ms": round(percentile(everything, 99) * 1000, 2),
+        "max_ms": round(everything[-1] * 1000, 2) if everything else 0.0,
+    }
+    return summary
+
+
+def print_table(summary: Dict[str, Dict[str, float]]) -> None:
+    columns = ["requests", "errors", "shed", "rps", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"{'endpoint':<18}" + "".join(f"{c:>10}" for c in columns))
+    for name, row in summary.items():
+        print(f"{name:<18}" + "".join(f"{row.get(c, 0):>10}" for c in columns))
+
+
+def compare(summary: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    Regressions by more than `tolerance`: p95 latency up, or for
+    THROUGHPUT_GATED rows, requests per second down.
+    """
+    problems = []
+    for name, base in baseline.items():
+        row = summary.get(name)
+        if row is None:
+            continue
+        if name in THROUGHPUT_GATED:
+            if row["rps"] < base["rps"] * (1 - tolerance):
+                problems.append(f"{name}: throughput {row['rps']} req/s < baseline {base['rps']} req/s")
+        elif row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {row['p95_ms']}ms > baseline {base['p95_ms']}ms")
+    return problems
+
+
+def setup_in_process() -> Any:
+    """Boot the app against a fresh local database and storage."""
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/loadtest.db")
+    os.environ.setdefault("UPLOAD_DIR", os.path.join(workdir, "uploads"))
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+    # Process documents inline: upload latency then includes processing, and
+    # no background work competes with the next run
+    os.environ.setdefault("DOCUMENT_PIPELINE_BROKER", "eager")
+    os.environ.setdefault("FIRST_SUPERUSER_EMAIL", "loadtest-admin@example.com")
+    os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", PASSWORD)
+    sys.path.insert(0, BACKEND_DIR)
+    from app.initial_data import init
+    from app.main import app
+
+    init()
+    return app
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    limits = httpx.Limits(max_connections=args.users + args.admins)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits)
+    else:
+        # Server errors become 500 responses, as they would over the network
+        transport = httpx.ASGITransport(app=setup_in_process(), raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60)
+    admin_email = args.admin_email or os.environ.get("FIRST_SUPERUSER_EMAIL")
+    admin_password = args.admin_password or os.environ.get("FIRST_SUPERUSER_PASSWORD")
+
+    rec = Recorder()
+    async with client:
+        # Warm up connections, caches and lazy imports outside the measurement
+        await client.get("/api/health")
+        start = time.perf_counter()
+        users_done = asyncio.Event()
+        admins = []
+        if admin_email and admin_password:
+            admins = [
+                asyncio.ensure_future(admin_journey(client, rec, users_done, admin_email, admin_password))
+                for _ in range(args.admins)
+            ]
+        await asyncio.gather(*(user_journey(client, rec, args.iterations, args.events) for _ in range(args.users)))
+        users_done.set()
+        await asyncio.gather(*admins)
+        wall = time.perf_counter() - start
+    return summarize(rec, wall), rec
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process ASGI)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent reviewers")
+    parser.add_argument("--iterations", type=int, default=5, help="journeys per virtual user")
+    parser.add_argument("--events", type=int, default=5, help="tracked events per journey")
+    parser.add_argument("--admin-email")
+    parser.add_argument("--admin-password")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed regression (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    summary, rec = asyncio.run(run(args))
+    print_table(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if rec.failures:
+        print("\nFailed requests:", *rec.failures, sep="\n  ")
+        return 1
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        problems = compare(summary, json.load(f), args.tolerance)
+    if problems:
+        print("\nRegressions:", *problems, sep="\n  ")
+        return 1
+    print("\nWithin baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
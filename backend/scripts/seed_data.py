@@ -0,0 +1,676 @@
+"""
+Fill a database with synthetic data for benchmarks.
+
+Generates users with education details, documents, activities, analytics
+events and recommendations, and the resource catalog with its tags. The
+distributions are skewed the way real traffic is: a few popular resources
+and very active users, sign-ups growing over time, most activity recent and
+in Indian daytime. All foreign keys are valid.
+
+    python scripts/seed_data.py --users 1000000 --workers 4
+
+The schema is created first if needed (as `python -m app.initial_data`) and
+rows are added after the existing ids. Every seeded user has the password
+`--password`, hashed once. Each table is generated in chunks, every chunk
+from its own random stream, so the same `--seed`, `--end` and sizes give
+the same rows whatever the number of workers. On Postgres each worker loads
+its chunks with COPY, in parallel (ids of rows nothing refers to then
+interleave differently from run to run). Elsewhere the workers only
+generate, and this process inserts, in order, since SQLite takes one writer
+at a time.
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import multiprocessing
+import operator
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from bisect import bisect
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.sql import sqltypes  # noqa: E402
+
+from app.core.security import get_password_hash  # noqa: E402
+from app.db.session import Base, engine  # noqa: E402
+from app.models.analytics import ActivityType  # noqa: E402
+from app.models.document import DocumentStatus, DocumentType, ProcessingStatus  # noqa: E402
+from app.models.recommendation import ResourceType  # noqa: E402
+from app.models.user import EmploymentStatus, UserRole  # noqa: E402
+
+Row = Tuple[Any, ...]
+
+FIRST_NAMES = (
+    "Aarav Amandeep Amrit Anjali Arjun Baljit Gurpreet Harleen Harpreet Ishaan Jaspreet "
+    "Jasleen Karan Kavya Manpreet Navdeep Neha Parminder Pooja Priya Rahul Rajveer "
+    "Ravneet Rohit Sandeep Simran Sukhmani Tanvir Vikram Yuvraj"
+).split()
+LAST_NAMES = (
+    "Bajwa Brar Chahal Dhillon Gill Grewal Kaur Kumar Mann Randhawa Sandhu Sharma Sidhu "
+    "Singh Sodhi Toor Verma Virk"
+).split()
+DISTRICTS = (
+    "Amritsar Barnala Bathinda Faridkot Fazilka Ferozepur Gurdaspur Hoshiarpur Jalandhar "
+    "Kapurthala Ludhiana Mansa Moga Mohali Pathankot Patiala Rupnagar Sangrur Tarn-Taran"
+).split()
+PORTALS = [
+    "pgrkam.com", "punjabjobs.gov.in", "scholarships.punjab.gov.in", "skills.punjab.gov.in",
+    "employment.punjab.gov.in", "edu.punjab.gov.in", "psdm.gov.in", "agri.punjab.gov.in",
+    "health.punjab.gov.in", "it.punjab.gov.in", "women.punjab.gov.in", "youth.punjab.gov.in",
+    "ncs.gov.in", "apprenticeship.gov.in", "digitalindia.gov.in",
+]
+TOPICS = (
+    "Data Science|Web Development|Nursing|Welding|Electrician|Plumbing|Tailoring|Dairy Farming|"
+    "Organic Agriculture|Accounting|Banking|Retail Sales|Logistics|Driving|Computer Basics|"
+    "Python Programming|Excel|Teaching|Digital Marketing|Mobile Repair|Solar Installation|"
+    "Hospitality|Beauty & Wellness|Food Processing|Civil Services|Police Recruitment|Army Agniveer"
+).split("|")
+ADJECTIVES = "Advanced Basic Certified Free Intensive Online Paid Rural State-level Weekend Women's Youth".split()
+TYPE_LABELS = {
+    ResourceType.JOB: "Jobs",
+    ResourceType.COURSE: "Course",
+    ResourceType.SCHOLARSHIP: "Scholarship",
+    ResourceType.WORKSHOP: "Workshop",
+    ResourceType.GOVERNMENT_SCHEME: "Scheme",
+    ResourceType.OTHER: "Programme",
+}
+STREAMS = [("Science", 40), ("Commerce", 30), ("Arts", 25), ("Vocational", 5)]
+DEGREES = {
+    "B.Tech": ["Computer Science", "Mechanical", "Civil", "Electrical", "Electronics"],
+    "B.Sc": ["Physics", "Chemistry", "Mathematics", "Agriculture", "Nursing"],
+    "B.Com": ["Accounting", "Finance", "Banking"],
+    "B.A.": ["English", "Economics", "History", "Political Science", "Punjabi"],
+    "BCA": ["Computer Applications"],
+    "BBA": ["Marketing", "Human Resources"],
+    "Diploma": ["Mechanical", "Electrical", "Civil", "Computer Science"],
+}
+UNIVERSITIES = [
+    "Panjab University", "Punjabi University", "Guru Nanak Dev University",
+    "Punjab Agricultural University", "I.K. Gujral Punjab Technical University",
+    "Thapar Institute", "Lovely Professional University", "Chitkara University",
+]
+INTERESTS = [t.lower() for t in TOPICS] + ["government jobs", "scholarships", "abroad studies", "startups"]
+PAGES = ["/", "/jobs", "/scholarships", "/courses", "/resources", "/profile", "/documents", "/search", "/login"]
+REFERRERS = [None, None, None, "https://www.google.com/", "https://www.facebook.com/", "https://t.co/", "https://punjab.gov.in/"]
+USER_AGENTS = [
+    "Mozilla/5.0 (Linux; Android 13; SM-A145F) AppleWebKit/537.36 Chrome/118.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; Redmi Note 11) AppleWebKit/537.36 Chrome/117.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/118.0 Safari/537.36",
+]
+ACTIVITY_TYPES = [
+    (ActivityType.PAGE_VIEW, 50), (ActivityType.RESOURCE_VIEW, 20), (ActivityType.SEARCH, 10),
+    (ActivityType.LOGIN, 8), (ActivityType.LOGOUT, 5), (ActivityType.DOWNLOAD, 3),
+    (ActivityType.DOCUMENT_UPLOAD, 2), (ActivityType.SHARE, 1), (ActivityType.DOCUMENT_VERIFIED, 1),
+]
+EVENT_NAMES = [
+    ("page_view", 45), ("click", 20), ("resource_view", 12), ("search", 10), ("scroll", 6),
+    ("login", 4), ("apply_click", 2), ("signup", 1),
+]
+EMPLOYMENT = [
+    (EmploymentStatus.STUDENT, 30), (EmploymentStatus.SEEKING, 25),
+    (EmploymentStatus.UNEMPLOYED, 20), (EmploymentStatus.EMPLOYED, 20), (None, 5),
+]
+DOCUMENT_TYPES = [
+    (DocumentType.ID_PROOF, 30), (DocumentType.EDUCATIONAL_CERTIFICATE, 25),
+    (DocumentType.MARKSHEET, 20), (DocumentType.ADDRESS_PROOF, 15), (DocumentType.OTHER, 10),
+]
+RESOURCE_TYPES = [
+    (ResourceType.JOB, 35), (ResourceType.COURSE, 25), (ResourceType.SCHOLARSHIP, 15),
+    (ResourceType.WORKSHOP, 10), (ResourceType.GOVERNMENT_SCHEME, 10), (ResourceType.OTHER, 5),
+]
+# Share of traffic per UTC hour: Indian daytime (UTC+5:30) and evening
+HOUR_WEIGHTS = [4, 6, 8, 9, 9, 9, 8, 8, 8, 9, 10, 10, 11, 12, 11, 9, 7, 5, 3, 2, 1, 1, 1, 2]
+
+SEEDED_FILE_PREFIX = "seed"  # documents point at files that do not exist
+
+
+class Plan(NamedTuple):
+    seed: int
+    end: datetime
+    days: int
+    users: int
+    resources: int
+    tags: int
+    documents_per_user: float
+    activities_per_user: float
+    events_per_user: float
+    recommendations_per_user: float
+    first_user_id: int
+    first_resource_id: int
+    first_tag_id: int
+    password_hash: str
+    batch_size: int
+    copy: bool  # load with COPY in the workers (Postgres)
+
+
+# -- randomness ------------------------------------------------------------------------
+
+_MASK = (1 << 64) - 1
+
+
+def _unit(seed: int, i: int) -> float:
+    """A uniform float in [0, 1) fixed by (seed, i) (splitmix64)."""
+    x = (seed * 0x9E3779B97F4A7C15 + i + 1) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return (x ^ (x >> 31)) / 2.0**64
+
+
+def _user_created_at(plan: Plan, i: int) -> datetime:
+    # Density grows linearly over the window: more recent sign-ups
+    return plan.end - timedelta(days=plan.days) * (1 - math.sqrt(_unit(plan.seed, i)))
+
+
+def _after(rng: random.Random, plan: Plan, start: datetime) -> datetime:
+    """A time between `start` and the end, leaning recent and to busy hours."""
+    at = start + (plan.end - start) * math.sqrt(rng.random())
+    hour = _hour(rng)
+    moved = at.replace(hour=hour)
+    return moved if start < moved < plan.end else at
+
+
+@lru_cache(maxsize=None)
+def _zipf(n: int, s: float = 1.1) -> List[float]:
+    return list(accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+
+def _popular(rng: random.Random, n: int, k: int) -> List[int]:
+    """k offsets in range(n), Zipf-distributed; rank r is offset r * P mod n."""
+    ranks = rng.choices(range(n), cum_weights=_zipf(n), k=k)
+    return [rank * 1_000_003 % n for rank in ranks]
+
+
+def _ip(rng: random.Random) -> str:
+    bits = rng.getrandbits(24)
+    return f"10.{bits >> 16}.{bits >> 8 & 255}.{bits & 255 or 1}"
+
+
+def _heavy_tail(rng: random.Random, mean: float) -> int:
+    """A count with the given mean, most small and a few very large."""
+    if mean <= 0:
+        return 0
+    return min(int(mean * rng.paretovariate(2.0) / 2), int(mean * 50))
+
+
+class Weighted:
+    """Draws one of `choices`, (value, weight) pairs."""
+
+    def __init__(self, choices: Sequence[Tuple[Any, float]]) -> None:
+        self.values = [value for value, _ in choices]
+        self.cum_weights = list(accumulate(weight for _, weight in choices))
+
+    def __call__(self, rng: random.Random) -> Any:
+        return self.values[bisect(self.cum_weights, rng.random() * self.cum_weights[-1])]
+
+
+_employment = Weighted(EMPLOYMENT)
+_stream = Weighted(STREAMS)
+_document_type = Weighted(DOCUMENT_TYPES)
+_activity_type = Weighted(ACTIVITY_TYPES)
+_event_name = Weighted(EVENT_NAMES)
+_resource_type = Weighted(RESOURCE_TYPES)
+_hour = Weighted(list(enumerate(HOUR_WEIGHTS)))
+
+
+# -- tables ----------------------------------------------------------------------------
+
+def _users(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    for i in range(start, stop):
+        user_id = plan.first_user_id + i
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created_at = _user_created_at(plan, i)
+        yield (
+            user_id,
+            f"{first}.{last}.{user_id}@example.com".lower(),
+            plan.password_hash,
+            f"{first} {last}",
+            f"9{user_id:09d}",
+            UserRole.VERIFIER if i % 1000 == 0 else UserRole.USER,
+            _employment(rng),
+            rng.random() < 0.98,
+            rng.random() < 0.6,
+            created_at,
+            created_at,
+        )
+
+
+def _verifier(plan: Plan, rng: random.Random) -> int:
+    return plan.first_user_id + 1000 * rng.randrange((plan.users + 999) // 1000)
+
+
+def _educational_details(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    for i in range(start, stop):
+        if rng.random() >= 0.85:
+            continue
+        created_at = _user_created_at(plan, i)
+        pu_year = created_at.year - rng.randint(0, 10)
+        degree = specialization = university = degree_marks = degree_year = None
+        if rng.random() < 0.7:
+            degree = rng.choice(list(DEGREES))
+            specialization = rng.choice(DEGREES[degree])
+            university = rng.choice(UNIVERSITIES)
+            degree_marks = round(min(max(rng.gauss(68, 10), 40), 98), 1)
+            degree_year = pu_year + rng.randint(3, 5)
+        yield (
+            plan.first_user_id + i,
+            round(min(max(rng.gauss(72, 12), 35), 99.5), 1),
+            _stream(rng),
+            pu_year,
+            degree,
+            degree_marks,
+            degree_year,
+            specialization,
+            university,
+            ", ".join(rng.sample(INTERESTS, rng.randint(1, 4))),
+            created_at,
+            created_at,
+        )
+
+
+def _documents(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    recent = plan.end - timedelta(days=14)
+    for i in range(start, stop):
+        user_created_at = _user_created_at(plan, i)
+        for _ in range(_heavy_tail(rng, plan.documents_per_user)):
+            created_at = _after(rng, plan, user_created_at)
+            is_pdf = rng.random() < 0.6
+            # Recent uploads are mostly still waiting for review
+            if created_at > recent and rng.random() < 0.7:
+                status, verified_by, verified_at = DocumentStatus.PENDING, None, None
+            else:
+                status = DocumentStatus.VERIFIED if rng.random() < 0.85 else DocumentStatus.REJECTED
+                verified_by = _verifier(plan, rng)
+                verified_at = min(created_at + timedelta(hours=rng.expovariate(1 / 30)), plan.end)
+            name = f"{rng.getrandbits(64):016x}.{'pdf' if is_pdf else 'jpg'}"
+            yield (
+                plan.first_user_id + i,
+                _document_type(rng),
+                f"{SEEDED_FILE_PREFIX}/{name}",
+                name,
+                rng.randint(50_000, 4_000_000),
+                "application/pdf" if is_pdf else "image/jpeg",
+                ProcessingStatus.DONE,
+                "application/pdf" if is_pdf else "image/jpeg",
+                rng.randint(1, 6) if is_pdf else 1,
+                created_at,
+                status,
+                "Document is not legible" if status == DocumentStatus.REJECTED else None,
+                verified_by,
+                verified_at,
+                created_at,
+                verified_at or created_at,
+            )
+
+
+def _user_activities(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    for i in range(start, stop):
+        user_created_at = _user_created_at(plan, i)
+        for _ in range(_heavy_tail(rng, plan.activities_per_user)):
+            activity_type = _activity_type(rng)
+            entity_type = entity_id = None
+            if activity_type in (ActivityType.RESOURCE_VIEW, ActivityType.SHARE, ActivityType.DOWNLOAD):
+                entity_type = "resource"
+                entity_id = plan.first_resource_id + _popular(rng, plan.resources, 1)[0]
+            elif activity_type == ActivityType.PAGE_VIEW:
+                entity_type = "page"
+            yield (
+                plan.first_user_id + i,
+                activity_type,
+                entity_type,
+                entity_id,
+                _ip(rng),
+                rng.choice(USER_AGENTS),
+                rng.choice(REFERRERS),
+                _after(rng, plan, user_created_at),
+            )
+
+
+def _analytics_events(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    def event(user_id, anonymous_id, since):
+        name = _event_name(rng)
+        data = None
+        if name == "page_view":
+            data = {"duration_ms": int(rng.lognormvariate(9, 1))}
+        elif name == "resource_view":
+            data = {"resource_id": plan.first_resource_id + _popular(rng, plan.resources, 1)[0]}
+        return (
+            name,
+            data,
+            user_id,
+            anonymous_id,
+            _ip(rng),
+            rng.choice(USER_AGENTS),
+            rng.choice(PAGES),
+            rng.choice(REFERRERS),
+            _after(rng, plan, since),
+        )
+
+    window_start = plan.end - timedelta(days=plan.days)
+    for i in range(start, stop):
+        user_created_at = _user_created_at(plan, i)
+        for _ in range(_heavy_tail(rng, plan.events_per_user)):
+            yield event(plan.first_user_id + i, None, user_created_at)
+        # About 30% of the traffic is from visitors who are not signed in
+        if rng.random() < 0.43:
+            anonymous_id = f"anon-{rng.getrandbits(64):016x}"
+            for _ in range(_heavy_tail(rng, plan.events_per_user)):
+                yield event(None, anonymous_id, window_start)
+
+
+def _user_recommendations(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    for i in range(start, stop):
+        if rng.random() >= 0.6:
+            continue
+        user_created_at = _user_created_at(plan, i)
+        wanted = min(_heavy_tail(rng, plan.recommendations_per_user / 0.6), plan.resources)
+        resources = dict.fromkeys(_popular(rng, plan.resources, wanted * 2))
+        for offset in list(resources)[:wanted]:
+            is_viewed = rng.random() < 0.4
+            created_at = _after(rng, plan, user_created_at)
+            yield (
+                plan.first_user_id + i,
+                plan.first_resource_id + offset,
+                round(rng.betavariate(2, 5), 4),
+                "v1",
+                is_viewed,
+                is_viewed and rng.random() < 0.1,
+                is_viewed and rng.random() < 0.15,
+                rng.randint(1, 5) if is_viewed and rng.random() < 0.05 else None,
+                created_at,
+                created_at,
+            )
+
+
+def _resources(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    window_start = plan.end - timedelta(days=plan.days)
+    for i in range(start, stop):
+        resource_id = plan.first_resource_id + i
+        resource_type = _resource_type(rng)
+        topic = rng.choice(TOPICS)
+        district = rng.choice(DISTRICTS)
+        portal = rng.choice(PORTALS)
+        created_at = _after(rng, plan, window_start)
+        start_date = created_at + timedelta(days=rng.randint(0, 30))
+        yield (
+            resource_id,
+            f"{rng.choice(ADJECTIVES)} {topic} {TYPE_LABELS[resource_type]} - {district}",
+            f"{topic} {TYPE_LABELS[resource_type].lower()} offered in {district} through {portal}. "
+            f"Open to candidates with an interest in {rng.choice(INTERESTS)}.",
+            resource_type,
+            portal,
+            f"https://{portal}/r/{resource_id}",
+            rng.choice(["10th", "12th", "Graduate", "Diploma", "Postgraduate"]),
+            rng.sample(INTERESTS, rng.randint(1, 4)),
+            f"Residents of Punjab aged {rng.randint(16, 21)}-{rng.randint(28, 45)}",
+            start_date,
+            start_date + timedelta(days=rng.randint(7, 180)),
+            district,
+            rng.random() < 0.85,
+            created_at,
+            created_at,
+        )
+
+
+def _tags(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    words = [topic.lower() for topic in TOPICS] + DISTRICTS
+    for i in range(start, stop):
+        tag_id = plan.first_tag_id + i
+        # Unique by id: "welding", then "welding 2", "welding 3", ...
+        n, word = divmod(tag_id - 1, len(words))
+        category = "location" if words[word] in DISTRICTS else rng.choice(["skill", "industry"])
+        yield (tag_id, words[word] if n == 0 else f"{words[word]} {n + 1}", None, category)
+
+
+def _resource_tags(plan: Plan, rng: random.Random, start: int, stop: int) -> Iterator[Row]:
+    for i in range(start, stop):
+        for offset in dict.fromkeys(_popular(rng, plan.tags, rng.randint(1, 5))):
+            yield (plan.first_resource_id + i, plan.first_tag_id + offset, round(rng.random(), 3))
+
+
+class Table(NamedTuple):
+    name: str
+    columns: List[str]
+    generate: Callable[[Plan, random.Random, int, int], Iterator[Row]]
+
+
+TABLES = {
+    table.name: table
+    for table in [
+        Table("users", [
+            "id", "email", "hashed_password", "full_name", "phone_number", "role", "employment_status",
+            "is_active", "is_verified", "created_at", "updated_at",
+        ], _users),
+        Table("resources", [
+            "id", "title", "description", "resource_type", "source", "url", "min_education_level",
+            "required_skills", "eligibility_criteria", "start_date", "end_date", "location", "is_active",
+            "created_at", "updated_at",
+        ], _resources),
+        Table("tags", ["id", "name", "description", "category"], _tags),
+        Table("educational_details", [
+            "user_id", "pu_marks", "pu_stream", "pu_year", "degree_name", "degree_marks", "degree_year",
+            "specialization", "university", "areas_of_interest", "created_at", "updated_at",
+        ], _educational_details),
+        Table("documents", [
+            "user_id", "document_type", "file_path", "file_name", "file_size", "mime_type",
+            "processing_status", "detected_mime_type", "page_count", "processed_at", "status",
+            "rejection_reason", "verified_by", "verified_at", "created_at", "updated_at",
+        ], _documents),
+        Table("user_activities", [
+            "user_id", "activity_type", "entity_type", "entity_id", "ip_address", "user_agent", "referrer",
+            "created_at",
+        ], _user_activities),
+        Table("analytics_events", [
+            "event_name", "event_data", "user_id", "anonymous_id", "ip_address", "user_agent", "url",
+            "referrer", "created_at",
+        ], _analytics_events),
+        Table("user_recommendations", [
+            "user_id", "resource_id", "score", "model_version", "is_viewed", "is_applied", "is_saved",
+            "feedback_score", "created_at", "updated_at",
+        ], _user_recommendations),
+        Table("resource_tags", ["resource_id", "tag_id", "relevance_score"], _resource_tags),
+    ]
+}
+# Referenced tables first; each phase is loaded in parallel
+PHASES = [
+    ["users", "resources", "tags"],
+    ["educational_details", "documents", "user_activities", "analytics_events", "user_recommendations", "resource_tags"],
+]
+
+
+def _rows_per_item(plan: Plan, name: str) -> float:
+    return {
+        "documents": plan.documents_per_user,
+        "user_activities": plan.activities_per_user,
+        "analytics_events": plan.events_per_user * 1.43,
+        "user_recommendations": plan.recommendations_per_user,
+        "resource_tags": 3,
+    }.get(name, 1)
+
+
+def _chunks(plan: Plan, name: str) -> List[Tuple[str, int, int, int]]:
+    total = {"resources": plan.resources, "tags": plan.tags, "resource_tags": plan.resources}.get(name, plan.users)
+    size = max(1, int(plan.batch_size / max(_rows_per_item(plan, name), 1)))
+    return [(name, k, start, min(start + size, total)) for k, start in enumerate(range(0, total, size))]
+
+
+# -- loading ---------------------------------------------------------------------------
+
+def _plain_rows(name: str, rows: List[Row], copy: bool) -> List[Row]:
+    """
+    `rows` with values as the driver stores them for SQLAlchemy's column
+    types: enums by name, JSON as text, and timestamps as UTC text (naive on
+    SQLite, like SQLAlchemy writes them there).
+    """
+    if copy:
+        timestamp = lambda value: value.isoformat(" ", "microseconds")  # noqa: E731
+    else:
+        timestamp = lambda value: value.replace(tzinfo=None).isoformat(" ", "microseconds")  # noqa: E731
+    columns = Base.metadata.tables[name].c
+    converters = []
+    for i, column in enumerate(TABLES[name].columns):
+        type_ = columns[column].type
+        if isinstance(type_, sqltypes.Enum):
+            converters.append((i, operator.attrgetter("name")))
+        elif isinstance(type_, sqltypes.JSON):
+            converters.append((i, json.dumps))
+        elif isinstance(type_, sqltypes.DateTime):
+            converters.append((i, timestamp))
+    plain = []
+    for row in rows:
+        row = list(row)
+        for i, convert in converters:
+            if row[i] is not None:
+                row[i] = convert(row[i])
+        plain.append(row)
+    return plain
+
+
+def _copy(name: str, rows: List[Row]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            columns = ", ".join(TABLES[name].columns)
+            cursor.copy_expert(f"COPY {name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _insert(name: str, rows: List[Row]) -> None:
+    columns = TABLES[name].columns
+    statement = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    connection = engine.raw_connection()
+    try:
+        # A benchmark database: losing it to a power cut beats an fsync per chunk
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.cursor().executemany(statement, rows)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+_plan: Plan
+
+
+def _init_worker(plan: Plan) -> None:
+    global _plan
+    _plan = plan
+    engine.dispose(close=False)  # never share the parent's connections
+
+
+def _generate(chunk: Tuple[str, int, int, int]) -> Tuple[str, int, List[Row]]:
+    name, k, start, stop = chunk
+    rng = random.Random(f"{_plan.seed}:{name}:{k}")
+    rows = _plain_rows(name, list(TABLES[name].generate(_plan, rng, start, stop)), _plan.copy)
+    if _plan.copy:
+        _copy(name, rows)
+        return name, len(rows), []
+    return name, len(rows), rows
+
+
+def _next_id(table: str) -> int:
+    with engine.connect() as connection:
+        return (connection.execute(select(func.max(Base.metadata.tables[table].c.id))).scalar() or 0) + 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--resources", type=int, help="default: one per 50 users, at least 100")
+    parser.add_argument("--tags", type=int, default=300)
+    parser.add_argument("--documents-per-user", type=float, default=1.2)
+    parser.add_argument("--activities-per-user", type=float, default=20)
+    parser.add_argument("--events-per-user", type=float, default=30, help="plus anonymous visitors' events")
+    parser.add_argument("--recommendations-per-user", type=float, default=6)
+    parser.add_argument("--days", type=int, default=365, help="history spread over this many days")
+    parser.add_argument("--end", type=date.fromisoformat, default=datetime.now(timezone.utc).date(),
+                        help="last day of the history (default: today, UTC)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--password", default="Passw0rd!")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=20_000, help="rows per chunk")
+    args = parser.parse_args()
+
+    from app.initial_data import init
+
+    init()
+    dialect_name = engine.dialect.name
+    plan = Plan(
+        seed=args.seed,
+        end=datetime.combine(args.end, datetime.min.time(), timezone.utc) + timedelta(days=1),
+        days=args.days,
+        users=args.users,
+        resources=args.resources or max(100, args.users // 50),
+        tags=args.tags,
+        documents_per_user=args.documents_per_user,
+        activities_per_user=args.activities_per_user,
+        events_per_user=args.events_per_user,
+        recommendations_per_user=args.recommendations_per_user,
+        first_user_id=_next_id("users"),
+        first_resource_id=_next_id("resources"),
+        first_tag_id=_next_id("tags"),
+        password_hash=get_password_hash(args.password),
+        batch_size=args.batch_size,
+        copy=dialect_name == "postgresql",
+    )
+    print(f"Seeding {dialect_name} with {plan.users:,} users and {plan.resources:,} resources "
+          f"(seed {plan.seed}, {args.workers} workers)")
+
+    pool = multiprocessing.Pool(args.workers, _init_worker, (plan,)) if args.workers > 1 else None
+    if pool is None:
+        _init_worker(plan)
+    started = time.perf_counter()
+    try:
+        for phase in PHASES:
+            chunks = [chunk for name in phase for chunk in _chunks(plan, name)]
+            counts: Dict[str, int] = dict.fromkeys(phase, 0)
+            phase_started = time.perf_counter()
+            # COPY chunks load as they finish; inserted ones keep their order
+            if pool is None:
+                results = map(_generate, chunks)
+            elif plan.copy:
+                results = pool.imap_unordered(_generate, chunks)
+            else:
+                results = pool.imap(_generate, chunks)
+            for name, count, rows in results:
+                if rows:
+                    _insert(name, rows)
+                counts[name] += count
+            elapsed = time.perf_counter() - phase_started
+            for name, count in counts.items():
+                print(f"  {name:<22} {count:>12,} rows")
+            print(f"  ({sum(counts.values()) / elapsed:,.0f} rows/s)")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    with engine.begin() as connection:
+        if dialect_name == "postgresql":
+            # Ids were assigned here; move the sequences past them
+            for table in ("users", "resources", "tags"):
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+        connection.execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - started:.1f} s; every seeded user's password is {args.password!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Fixtures for the API and CRUD tests.
+
+The suite runs against a throwaway SQLite database and upload directory,
+configured here before anything imports the app (settings are read once, on
+import). Set TEST_DATABASE_URL to run it against a scratch Postgres database
+instead. Document processing and background jobs run inline ("eager").
+"""
+import os
+import tempfile
+import uuid
+
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="pgrkam-tests-")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{_SCRATCH_DIR}/test.db"
+)
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["UPLOAD_DIR"] = os.path.join(_SCRATCH_DIR, "uploads")
+os.environ["DOCUMENT_PIPELINE_BROKER"] = "eager"
+os.environ["JOB_BROKER"] = "eager"
+os.environ["FIRST_SUPERUSER_EMAIL"] = "admin@example.com"
+os.environ["FIRST_SUPERUSER_PASSWORD"] = "Adm1nPassw0rd"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from app.initial_data import init
+
+    init()
+    yield
+
+
+@pytest.fixture
+def db():
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    return TestClient(app)
+
+
+def _auth_headers(user) -> dict:
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer token headers for a user: `auth_headers(user)`."""
+    return _auth_headers
+
+
+@pytest.fixture
+def superuser(db):
+    from app import crud
+
+    return crud.user.get_by_email(db, email=os.environ["FIRST_SUPERUSER_EMAIL"])
+
+
+@pytest.fixture
+def superuser_headers(superuser):
+    return _auth_headers(superuser)
+
+
+@pytest.fixture
+def make_user(db):
+    """Create an active user with a unique email: `make_user(**fields)`."""
+    from app.models import User, UserRole
+
+    def make(**fields):
+        user = User(
+            email=f"user-{uuid.uuid4().hex[:12]}@example.com",
+            hashed_password="not-a-real-hash",
+            full_name="Test User",
+            role=UserRole.USER,
+            is_active=True,
+        )
+        for field, value in fields.items():
+            setattr(user, field, value)
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_document(db):
+    """
+    Insert a Document row (no file behind it) for `user`:
+    `make_document(user, **fields)`.
+    """
+    from app.models import Document, DocumentStatus, DocumentType
+
+    def make(user, **fields):
+        doc = Document(
+            user_id=user.id,
+            document_type=DocumentType.OTHER,
+            file_path=f"tests/{uuid.uuid4().hex}.pdf",
+            file_name="scan.pdf",
+            file_size=1024,
+            mime_type="application/pdf",
+            status=DocumentStatus.PENDING,
+        )
+        for field, value in fields.items():
+            setattr(doc, field, value)
+        db.add(doc)
+        db.commit()
+        return doc
+
+    return make
@@ -0,0 +1,88 @@
+import asyncio
+import io
+
+import pytest
+from starlette.datastructures import Headers
+
+from app.core.admission import ConcurrencyLimit, MemoryRateLimiter, RoutePolicy, client_key, queue_time
+
+ORIGIN = "http://localhost:3000"
+
+
+def test_rate_limited_requests_get_retry_after_and_cors_headers(client, make_user, auth_headers):
+    headers = {**auth_headers(make_user()), "Origin": ORIGIN}
+    # Rejected by the route (unsupported type), but still counted by the limiter
+    for _ in range(30):
+        response = client.post(
+            "/api/v1/documents/upload",
+            headers=headers,
+            files={"file": ("notes.txt", io.BytesIO(b"x"), "text/plain")},
+        )
+        if response.status_code == 429:
+            break
+    else:
+        pytest.fail("upload rate limit never applied")
+
+    assert int(response.headers["retry-after"]) >= 1
+    # CORS is outermost, so the browser gets to read the rejection
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert "Retry-After" in response.headers["access-control-expose-headers"]
+
+
+def _scope(client_host, authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return {"type": "http", "client": (client_host, 443), "headers": headers}
+
+
+def test_anonymous_clients_are_keyed_by_address():
+    policy = RoutePolicy("POST", "/login", rate=1, key="ip")
+    first, second = _scope("203.0.113.7"), _scope("198.51.100.2")
+
+    assert client_key(policy, Headers(scope=first), first) == "ip:203.0.113.7"
+    assert client_key(policy, Headers(scope=second), second) == "ip:198.51.100.2"
+
+
+def test_only_verified_tokens_get_a_user_bucket(auth_headers, make_user):
+    user = make_user()
+    policy = RoutePolicy("POST", "/upload", rate=1)
+    signed = _scope("203.0.113.7", auth_headers(user)["Authorization"])
+    forged = _scope("203.0.113.7", "Bearer not.a.token")
+
+    assert client_key(policy, Headers(scope=signed), signed) == f"user:{user.id}"
+    assert client_key(policy, Headers(scope=forged), forged) == "ip:203.0.113.7"
+
+
+def test_token_bucket_allows_burst_then_asks_to_wait():
+    limiter = MemoryRateLimiter()
+
+    async def take(n):
+        return [await limiter.take("key", rate=1, burst=3) for _ in range(n)]
+
+    waits = asyncio.run(take(4))
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert 0 < waits[3] <= 1
+
+
+def test_concurrency_limit_sheds_after_max_wait_and_hands_over_slots():
+    async def run():
+        limit = ConcurrencyLimit(1)
+        assert await limit.acquire(0.01)
+        assert not await limit.acquire(0.01)
+        waiter = asyncio.ensure_future(limit.acquire(1))
+        await asyncio.sleep(0)
+        limit.release()
+        assert await waiter
+        assert limit.in_flight == 1
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "header", ["t=1700000000.5", "1700000000500", "1700000000500000"]
+)
+def test_queue_time_units(header):
+    assert queue_time(header, 1700000002.5) == pytest.approx(2.0)
+
+
+def test_queue_time_ignores_garbage():
+    assert queue_time("yesterday", 1700000000.0) is None
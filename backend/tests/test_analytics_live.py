@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect
+
+from app.api import deps
+from app.core.security import create_access_token
+
+
+def test_live_stream_is_for_superusers_only(client, make_user, auth_headers):
+    assert client.get("/api/v1/analytics/live").status_code == 401
+    response = client.get("/api/v1/analytics/live", headers=auth_headers(make_user()))
+    assert response.status_code == 400
+
+
+def test_streaming_superuser_is_checked_and_detached(superuser, make_user):
+    user = deps.get_streaming_superuser(create_access_token(superuser.id))
+    assert user.id == superuser.id
+    # Its session is closed before the stream starts
+    assert inspect(user).detached
+
+    with pytest.raises(HTTPException) as exc:
+        deps.get_streaming_superuser(create_access_token(make_user().id))
+    assert exc.value.status_code == 400
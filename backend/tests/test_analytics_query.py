@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models import AnalyticsEvent
+from app.schemas.analytics import AnalyticsFilter, AnalyticsQuery, Dimension, Granularity, Metric
+from app.services.analytics_query import InvalidQueryError, cache_key, execute, normalize, plan
+
+# A day no other test writes events on
+DAY = datetime(2020, 3, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def events(db):
+    """Insert events at fixed hours of DAY: `events(name, *hours)`."""
+
+    def add(name, *hours):
+        for hour in hours:
+            db.add(AnalyticsEvent(event_name=name, created_at=DAY + timedelta(hours=hour)))
+        db.commit()
+
+    return add
+
+
+def _run(db, **fields):
+    query = normalize(AnalyticsQuery(**fields))
+    query_plan = plan(query, db.get_bind().dialect.name)
+    return query_plan, [list(row) for row in execute(db, query_plan)]
+
+
+def test_rollup_plan_matches_a_scan_of_the_events(db, events):
+    name = f"view-{uuid.uuid4().hex[:8]}"
+    # Partial hours at both ends of the range and whole hours between
+    events(name, 1.25, 1.75, 2.5, 3.1, 5.9, 6.2, 6.7)
+    fields = {
+        "start": DAY + timedelta(hours=1.5),
+        "end": DAY + timedelta(hours=6.5),
+        "dimensions": [Dimension.EVENT_NAME],
+        "filters": [AnalyticsFilter(dimension=Dimension.EVENT_NAME, values=[name])],
+    }
+
+    rollup_plan, from_rollups = _run(db, **fields)
+    events_plan, from_events = _run(db, metrics=[Metric.EVENTS, Metric.USERS], **fields)
+
+    assert (rollup_plan.source, events_plan.source) == ("rollup", "events")
+    assert from_rollups == [[name, 5]]
+    assert [row[:2] for row in from_events] == from_rollups
+
+
+def test_rollup_plan_buckets_by_time(db, events):
+    name = f"click-{uuid.uuid4().hex[:8]}"
+    events(name, 0.5, 1.5, 1.6, 23.9)
+
+    query_plan, rows = _run(
+        db,
+        start=DAY,
+        end=DAY + timedelta(days=1),
+        granularity=Granularity.HOUR,
+        filters=[AnalyticsFilter(dimension=Dimension.EVENT_NAME, values=[name])],
+    )
+
+    assert query_plan.source == "rollup"
+    assert [count for _, count in rows] == [1, 2, 1]
+
+
+def test_empty_range_counts_zero(db):
+    query_plan, rows = _run(
+        db,
+        start=DAY - timedelta(days=30),
+        end=DAY - timedelta(days=29),
+        filters=[AnalyticsFilter(dimension=Dimension.EVENT_NAME, values=["never-sent"])],
+    )
+
+    assert query_plan.source == "rollup"
+    assert rows == [[0]]
+
+
+def test_ranges_without_a_whole_hour_scan_the_events(db, events):
+    name = f"scroll-{uuid.uuid4().hex[:8]}"
+    events(name, 0.1, 0.5, 0.9)
+
+    query_plan, rows = _run(
+        db,
+        start=DAY + timedelta(minutes=10),
+        end=DAY + timedelta(minutes=50),
+        filters=[AnalyticsFilter(dimension=Dimension.EVENT_NAME, values=[name])],
+    )
+
+    assert query_plan.source == "events"
+    assert rows == [[1]]
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"start": DAY, "end": DAY},
+        {"start": DAY, "end": DAY + timedelta(days=settings.ANALYTICS_QUERY_MAX_DAYS + 1)},
+        {"start": DAY, "end": DAY + timedelta(days=1), "limit": 11},
+    ],
+)
+def test_queries_outside_the_limits_are_refused(fields, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_QUERY_MAX_ROWS", 10)
+    query = normalize(AnalyticsQuery(**fields))
+    with pytest.raises(InvalidQueryError):
+        plan(query, "sqlite")
+
+
+def test_equivalent_queries_share_a_cache_key():
+    filters = [
+        AnalyticsFilter(dimension=Dimension.URL, values=["/b", "/a", "/a"]),
+        AnalyticsFilter(dimension=Dimension.EVENT_NAME, values=["view"]),
+    ]
+    first = normalize(AnalyticsQuery(start=DAY, end=DAY + timedelta(days=1), filters=filters))
+    second = normalize(AnalyticsQuery(start=DAY, end=DAY + timedelta(days=1), filters=filters[::-1]))
+
+    assert cache_key(first) == cache_key(second)
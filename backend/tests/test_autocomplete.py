@@ -0,0 +1,75 @@
+import uuid
+
+from sqlalchemy import update
+
+from app.models import Resource, ResourceType
+from app.services.autocomplete import MAX_KEY_CHARS, SCAN_LIMIT, Autocomplete, PrefixIndex, Suggestion
+
+
+def _resource(text, score=0.0, id=None):
+    return Suggestion(text, "resource", id, score)
+
+
+def test_lookup_matches_any_word_of_the_text():
+    index = PrefixIndex([_resource("Data Science Course", id=1), _resource("Scholarship for Girls", id=2)])
+
+    assert [s.id for s in index.lookup("sci")] == [1]
+    assert [s.id for s in index.lookup("course")] == [1]
+    assert [s.id for s in index.lookup("girls")] == [2]
+    # Only from the start of a word
+    assert index.lookup("ience") == []
+
+
+def test_lookup_ranks_by_score_and_respects_the_limit():
+    index = PrefixIndex(
+        [_resource("Python basics", 1, id=1), _resource("Python advanced", 5, id=2), _resource("Pythonic style", 3, id=3)]
+    )
+
+    assert [s.id for s in index.lookup("python")] == [2, 3, 1]
+    assert [s.id for s in index.lookup("python", limit=2)] == [2, 3]
+
+
+def test_prefixes_longer_than_a_key_are_checked_on_the_full_text():
+    shared = "x" * MAX_KEY_CHARS
+    index = PrefixIndex([_resource(f"{shared}alpha", 2, id=1), _resource(f"{shared}beta", 1, id=2)])
+
+    assert [s.id for s in index.lookup(shared)] == [1, 2]
+    assert [s.id for s in index.lookup(f"{shared}b")] == [2]
+    assert index.lookup(f"{shared}c") == []
+
+
+def test_precomputed_prefixes_agree_with_a_scan():
+    suggestions = [_resource(f"Course {n:04d}", score=n % 97, id=n) for n in range(SCAN_LIMIT * 3)]
+    index = PrefixIndex(suggestions)
+    by_score = sorted(suggestions, key=lambda s: s.score, reverse=True)
+
+    assert "c" in index._top
+    assert [s.score for s in index.lookup("c", 10)] == [s.score for s in by_score[:10]]
+    assert [s.score for s in index.lookup("0", 10)] == [s.score for s in by_score[:10]]
+
+
+def _add_resource(db, title, **fields):
+    resource = Resource(title=title, url="https://example.com", resource_type=ResourceType.COURSE, **fields)
+    db.add(resource)
+    db.commit()
+    return resource
+
+
+def test_refresh_overlays_new_and_deactivated_resources(db):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    kept = _add_resource(db, f"{word} kept")
+    retired = _add_resource(db, f"{word} retired")
+    service = Autocomplete()
+    service.rebuild()
+    assert {s.id for s in service.suggest(word)} == {kept.id, retired.id}
+
+    retired.is_active = False
+    added = _add_resource(db, f"{word} added")
+    # Written before updated_at had a server default
+    legacy = _add_resource(db, f"{word} legacy")
+    db.execute(update(Resource).where(Resource.id == legacy.id).values(updated_at=None))
+    db.commit()
+    service.refresh()
+
+    assert {s.id for s in service.suggest(word)} == {kept.id, added.id, legacy.id}
+    assert service._overlay[retired.id] is None
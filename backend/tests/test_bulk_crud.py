@@ -0,0 +1,75 @@
+from app import crud, schemas
+from app.crud.base import CRUDBase
+from app.models import Resource, ResourceType, Tag, User
+
+tags = CRUDBase(Tag)
+
+
+def _resource(title, **fields):
+    return dict(title=title, url="https://example.com", resource_type=ResourceType.JOB, **fields)
+
+
+def test_create_many_reports_ids_in_input_order(db):
+    titles = [f"bulk create {n}" for n in range(7)]
+    # Rows with different column sets go through separate statements
+    rows = [_resource(t, source="Bulk") if n % 2 else _resource(t) for n, t in enumerate(titles)]
+
+    results = crud.resource.create_many(db, objs_in=rows, chunk_size=3)
+
+    assert [r.index for r in results] == list(range(7))
+    assert all(r.ok for r in results)
+    assert [db.get(Resource, r.id).title for r in results] == titles
+
+
+def test_create_many_isolates_failing_rows(db):
+    emails = ["bulk-a@example.com", "bulk-b@example.com", "bulk-a@example.com", "bulk-c@example.com"]
+    users = [schemas.UserCreate(email=e, password="Passw0rd1") for e in emails]
+
+    results = crud.user.create_many(db, objs_in=users)
+
+    assert [r.ok for r in results] == [True, True, False, True]
+    assert "unique" in results[2].error.lower()
+    assert [db.get(User, results[i].id).email for i in (0, 1, 3)] == [emails[0], emails[1], emails[3]]
+
+
+def test_upsert_many_maps_ids_of_inserted_and_updated_rows(db):
+    existing = tags.create_many(db, objs_in=[{"name": "upsert-b", "category": "old"}])[0].id
+    names = ["upsert-c", "upsert-b", "upsert-a"]
+
+    results = tags.upsert_many(
+        db, objs_in=[{"name": n, "category": "new"} for n in names], index_elements=["name"]
+    )
+
+    assert all(r.ok for r in results)
+    assert results[1].id == existing
+    db.expire_all()
+    assert [(db.get(Tag, r.id).name, db.get(Tag, r.id).category) for r in results] == [
+        (n, "new") for n in names
+    ]
+
+
+def test_update_many_reports_missing_unknown_and_failing_rows(db):
+    ids = [r.id for r in crud.resource.create_many(db, objs_in=[_resource(f"bulk update {n}") for n in range(3)])]
+
+    results = crud.resource.update_many(
+        db,
+        objs_in=[
+            {"title": "no id"},
+            {"id": ids[0], "title": "updated"},
+            {"id": 10 ** 9, "title": "unknown"},
+            {"id": ids[1], "url": None},  # NOT NULL
+            {"id": ids[2], "is_active": False},
+        ],
+    )
+
+    assert [(r.index, r.id, r.error) for r in results[:3]] == [
+        (0, None, "Missing id"),
+        (1, ids[0], None),
+        (2, None, "Not found"),
+    ]
+    assert not results[3].ok and "null" in results[3].error.lower()
+    assert results[4].ok
+    db.expire_all()
+    assert db.get(Resource, ids[0]).title == "updated"
+    assert db.get(Resource, ids[1]).url == "https://example.com"
+    assert db.get(Resource, ids[2]).is_active is False
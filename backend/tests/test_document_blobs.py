@@ -0,0 +1,113 @@
+import hashlib
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from PIL import Image
+from sqlalchemy import update
+
+from app import crud
+from app.core.config import settings
+from app.gc_document_blobs import collect
+from app.models import Document, DocumentBlob
+from app.services.storage import LocalStorage, set_storage
+from app.utils.uploads import blob_path, derived_prefix
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """An empty local storage for this test only."""
+    storage = LocalStorage(str(tmp_path / "storage"))
+    set_storage(storage)
+    yield storage
+    set_storage(None)
+
+
+def _png() -> bytes:
+    # A colour of its own, so no other test stored the same content
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), tuple(random.randrange(256) for _ in range(3))).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(client, headers, data):
+    return client.post(
+        "/api/v1/documents/upload", headers=headers, files={"file": ("scan.png", io.BytesIO(data), "image/png")}
+    )
+
+
+def _release_hours_ago(db, sha256, hours):
+    db.execute(
+        update(DocumentBlob)
+        .where(DocumentBlob.sha256 == sha256)
+        .values(updated_at=datetime.now(timezone.utc) - timedelta(hours=hours))
+    )
+    db.commit()
+
+
+def test_oversized_upload_is_refused_and_leaves_no_file(client, db, storage, make_user, auth_headers):
+    user = make_user()
+
+    response = _upload(client, auth_headers(user), b"\0" * (settings.MAX_FILE_SIZE + 1))
+
+    assert response.status_code == 413
+    assert list(storage.list()) == []
+    assert db.query(Document).filter(Document.user_id == user.id).count() == 0
+
+
+def test_identical_uploads_share_one_sharded_blob(client, db, storage, make_user, auth_headers):
+    data = _png()
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    ids = [_upload(client, auth_headers(make_user()), data).json()["id"] for _ in range(2)]
+
+    docs = [db.get(Document, id) for id in ids]
+    assert {doc.file_path for doc in docs} == {f"{sha256[:2]}/{sha256[2:4]}/{sha256}"}
+    assert storage.read(blob_path(sha256)) == data
+    assert db.get(DocumentBlob, sha256).ref_count == 2
+
+
+def test_gc_keeps_referenced_and_recently_released_blobs(client, db, storage, make_user, auth_headers):
+    data = _png()
+    sha256 = hashlib.sha256(data).hexdigest()
+    ids = [_upload(client, auth_headers(make_user()), data).json()["id"] for _ in range(2)]
+    assert list(storage.list(derived_prefix(sha256)))
+
+    crud.document.remove(db, id=ids[0])
+    _release_hours_ago(db, sha256, 2)
+    collect(db, storage, grace_seconds=0)
+    # Still referenced by the second document
+    assert storage.exists(blob_path(sha256))
+
+    crud.document.remove(db, id=ids[1])
+    _release_hours_ago(db, sha256, 2)
+    collect(db, storage, grace_seconds=3 * 3600)
+    assert storage.exists(blob_path(sha256))
+
+    stats = collect(db, storage, grace_seconds=3600)
+    assert stats["unreferenced"] >= 1
+    assert not storage.exists(blob_path(sha256))
+    assert list(storage.list(derived_prefix(sha256))) == []
+    db.expire_all()
+    assert db.get(DocumentBlob, sha256) is None
+
+
+def test_gc_removes_old_orphans_and_temp_files_only(db, storage):
+    old, new = hashlib.sha256(b"old").hexdigest(), hashlib.sha256(b"new").hexdigest()
+    storage.put(blob_path(old), b"old")
+    storage.put(blob_path(new), b"new")
+    pending = storage.open_upload()
+    pending.write(b"partial")
+    an_hour_ago = time.time() - 3600
+    for obj in storage.list():
+        if obj.key != blob_path(new):
+            os.utime(storage.local_path(obj.key), (an_hour_ago, an_hour_ago))
+
+    stats = collect(db, storage, grace_seconds=60)
+
+    assert (stats["orphaned"], stats["temp"]) == (1, 1)
+    assert [obj.key for obj in storage.list()] == [blob_path(new)]
+    pending.abort()
@@ -0,0 +1,153 @@
+import io
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.models import Document
+
+DATA = b"%PDF-1.4\n" + os.urandom(50_000)
+
+
+@pytest.fixture
+def uploaded(client, db, make_user, auth_headers):
+    owner = make_user()
+    response = client.post(
+        "/api/v1/documents/upload",
+        headers=auth_headers(owner),
+        files={"file": ("scan.pdf", io.BytesIO(DATA), "application/pdf")},
+    )
+    assert response.status_code == 200
+    return owner, db.get(Document, response.json()["id"])
+
+
+def test_signed_url_serves_file_with_immutable_caching(client, uploaded):
+    _, doc = uploaded
+    response = client.get(doc.get_absolute_url())
+
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["etag"] == f'"{doc.checksum}-original"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_conditional_get_answers_not_modified(client, uploaded):
+    _, doc = uploaded
+    url = doc.get_absolute_url()
+    etag = client.get(url).headers["etag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.parametrize(
+    "range_header, expected, content_range",
+    [
+        ("bytes=10-19", DATA[10:20], f"bytes 10-19/{len(DATA)}"),
+        ("bytes=-5", DATA[-5:], f"bytes {len(DATA) - 5}-{len(DATA) - 1}/{len(DATA)}"),
+        ("bytes=49000-", DATA[49000:], f"bytes 49000-{len(DATA) - 1}/{len(DATA)}"),
+    ],
+)
+def test_range_requests(client, uploaded, range_header, expected, content_range):
+    _, doc = uploaded
+    response = client.get(doc.get_absolute_url(), headers={"Range": range_header})
+
+    assert response.status_code == 206
+    assert response.content == expected
+    assert response.headers["content-range"] == content_range
+
+
+def test_unsatisfiable_and_stale_ranges(client, uploaded):
+    _, doc = uploaded
+    url = doc.get_absolute_url()
+
+    response = client.get(url, headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+    # If-Range with an outdated validator: the whole file, not the range
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+def test_access_needs_token_owner_or_verifier(client, uploaded, make_user, auth_headers, superuser_headers):
+    owner, doc = uploaded
+    path = f"/api/v1/documents/{doc.id}/file"
+
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers=auth_headers(make_user())).status_code == 403
+    assert client.get(path, headers=auth_headers(owner)).status_code == 200
+    assert client.get(path, headers=superuser_headers).status_code == 200
+    # A token is bound to its document and variant
+    other_variant = doc.get_absolute_url().replace("variant=original", "variant=preview")
+    assert client.get(other_variant).status_code == 403
+
+
+def test_uploads_are_not_served_statically(client, uploaded):
+    _, doc = uploaded
+    assert os.path.isfile(os.path.join(settings.UPLOAD_DIR, doc.file_path))
+
+    assert client.get(f"/static/{doc.file_path}").status_code == 404
+
+
+def test_legacy_static_link_redirects_to_checked_download(client, db, make_user, make_document, auth_headers):
+    owner = make_user()
+    name = f"legacy-{owner.id}.pdf"
+    with open(os.path.join(settings.UPLOAD_DIR, name), "wb") as f:
+        f.write(DATA)
+    doc = make_document(owner, file_path=name, checksum=None)
+
+    response = client.get(f"/static/{name}", allow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"] == f"/api/v1/documents/{doc.id}/file"
+
+    assert client.get(f"/static/{name}").status_code == 403
+    assert client.get(f"/static/{name}", headers=auth_headers(owner)).content == DATA
+
+
+def test_public_base_url_only_serves_derived_non_sensitive_files(db, make_user, make_document, monkeypatch):
+    from app.models import DocumentType
+
+    monkeypatch.setattr(settings, "STORAGE_PUBLIC_BASE_URL", "https://cdn.example.com")
+    owner = make_user()
+    other = make_document(owner, thumbnail_path="ab/cd/thumb.jpg")
+    id_proof = make_document(owner, document_type=DocumentType.ID_PROOF, thumbnail_path="ab/cd/id.jpg")
+
+    assert other.get_absolute_url(variant="thumbnail") == "https://cdn.example.com/ab/cd/thumb.jpg"
+    assert other.get_absolute_url().startswith(f"/api/v1/documents/{other.id}/file?")
+    assert id_proof.get_absolute_url(variant="thumbnail").startswith(f"/api/v1/documents/{id_proof.id}/file?")
+
+
+def test_presigned_urls_are_stable_within_a_window(monkeypatch):
+    import time
+    from urllib.parse import parse_qs, urlsplit
+
+    from app.services.storage import S3Storage
+
+    storage = S3Storage(
+        "documents",
+        endpoint_url="https://s3.example.com",
+        region="us-east-1",
+        access_key_id="test",
+        secret_access_key="test",
+    )
+    signed = []
+    presign = storage.client.generate_presigned_url
+    monkeypatch.setattr(
+        storage.client, "generate_presigned_url", lambda *a, **kw: signed.append(kw) or presign(*a, **kw)
+    )
+
+    url = storage.url("ab/cd/blob", filename="scan.pdf", content_type="application/pdf")
+    assert storage.url("ab/cd/blob", filename="scan.pdf", content_type="application/pdf") == url
+    assert len(signed) == 1
+    window = settings.DOWNLOAD_URL_TTL_SECONDS
+    assert window <= int(parse_qs(urlsplit(url).query)["X-Amz-Expires"][0]) <= 2 * window
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + window)
+    storage.url("ab/cd/blob", filename="scan.pdf", content_type="application/pdf")
+    assert len(signed) == 2
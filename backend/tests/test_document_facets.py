@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import crud
+from app.db.counters import DOCUMENT_COUNT_SLOTS
+from app.models import Document, DocumentCount, DocumentStatus, DocumentType
+
+
+def _counts_by_scan(db):
+    rows = db.execute(
+        select(Document.status, Document.document_type, func.count()).group_by(
+            Document.status, Document.document_type
+        )
+    )
+    by_status = {s.value: 0 for s in DocumentStatus}
+    by_type = {t.value: 0 for t in DocumentType}
+    for status, document_type, count in rows:
+        by_status[status.value] += count
+        by_type[document_type.value] += count
+    return {"status": by_status, "type": by_type}
+
+
+def test_sharded_counters_match_the_documents_table(db, make_user, make_document):
+    user = make_user()
+    docs = [make_document(user) for _ in range(DOCUMENT_COUNT_SLOTS + 4)]
+    for doc in docs[:5]:
+        doc.status = DocumentStatus.VERIFIED
+    db.delete(docs[5])
+    db.commit()
+
+    slots = db.execute(
+        select(DocumentCount.slot).where(
+            DocumentCount.status == DocumentStatus.PENDING,
+            DocumentCount.document_type == DocumentType.OTHER,
+        )
+    ).scalars().all()
+    assert len(slots) == DOCUMENT_COUNT_SLOTS
+    assert crud.document.get_facets(db) == _counts_by_scan(db)
+
+
+def test_each_facet_applies_every_other_filter(db, make_user, make_document):
+    user = make_user()
+    make_document(user, status=DocumentStatus.VERIFIED, document_type=DocumentType.ID_PROOF)
+    make_document(user, status=DocumentStatus.VERIFIED, document_type=DocumentType.MARKSHEET)
+    make_document(user, status=DocumentStatus.PENDING, document_type=DocumentType.ID_PROOF)
+    make_document(make_user(), status=DocumentStatus.VERIFIED, document_type=DocumentType.ID_PROOF)
+
+    facets = crud.document.get_facets(
+        db, status=DocumentStatus.VERIFIED, document_type=DocumentType.ID_PROOF, user_id=user.id
+    )
+
+    # Status tabs: this user's ID proofs; type chips: this user's verified documents
+    assert facets["status"] == {"pending": 1, "verified": 1, "rejected": 0}
+    assert facets["type"]["id_proof"] == 1
+    assert facets["type"]["marksheet"] == 1
+    assert sum(facets["type"].values()) == 2
+
+
+def test_date_filter_narrows_the_facets(db, make_user, make_document):
+    user = make_user()
+    now = datetime.now(timezone.utc)
+    make_document(user, created_at=now - timedelta(days=10))
+    make_document(user, created_at=now - timedelta(days=1))
+
+    facets = crud.document.get_facets(
+        db, user_id=user.id, created_from=now - timedelta(days=2)
+    )
+
+    assert facets["status"]["pending"] == 1
+    assert facets["type"]["other"] == 1
+
+
+def test_admin_listing_facets_follow_the_owner_search(
+    client, make_user, make_document, superuser_headers
+):
+    name = f"Searchable {uuid.uuid4().hex[:8]}"
+    user = make_user(full_name=name)
+    make_document(user, status=DocumentStatus.REJECTED)
+    make_document(user)
+
+    response = client.get(
+        "/api/v1/documents/admin",
+        params={"q": name.split()[1], "status_filter": "rejected"},
+        headers=superuser_headers,
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["userId"] for item in body["items"]] == [user.id]
+    assert body["facets"]["status"] == {"pending": 1, "verified": 0, "rejected": 1}
+    assert sum(body["facets"]["type"].values()) == 1
+
+
+def test_admin_search_needs_three_characters(client, superuser_headers):
+    response = client.get("/api/v1/documents/admin", params={"q": "ab"}, headers=superuser_headers)
+    assert response.status_code == 422
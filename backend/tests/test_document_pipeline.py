@@ -0,0 +1,82 @@
+import io
+import time
+
+from PIL import Image
+
+from app.core.config import settings
+from app.models import Document, DocumentStatus, ProcessingStatus
+from app.services import document_pipeline
+
+
+def _png(size, color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(client, headers, data, name="scan.png", content_type="image/png"):
+    return client.post(
+        "/api/v1/documents/upload", headers=headers, files={"file": (name, io.BytesIO(data), content_type)}
+    )
+
+
+def test_upload_is_processed_and_oversized_scan_reencoded(
+    client, db, make_user, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(settings, "DOCUMENT_MAX_IMAGE_SIDE", 200)
+    user = make_user()
+    data = _png((900, 600))
+
+    response = _upload(client, auth_headers(user), data)
+
+    assert response.status_code == 200
+    assert "checksum" not in response.json()  # would be stale after re-encoding
+    doc = db.get(Document, response.json()["id"])
+    assert doc.processing_status == ProcessingStatus.DONE
+    assert doc.detected_mime_type == "image/png"
+    assert doc.page_count == 1
+    assert doc.thumbnail_path and doc.preview_path
+    assert doc.file_size < len(data)
+    with Image.open(io.BytesIO(client.get(doc.get_absolute_url()).content)) as stored:
+        assert max(stored.size) == 200
+
+
+def test_content_that_is_not_an_allowed_type_is_rejected(client, db, make_user, auth_headers):
+    data = b"MZ\x90\x00 not a scan"
+    response = _upload(client, auth_headers(make_user()), data, name="x.pdf", content_type="application/pdf")
+
+    doc = db.get(Document, response.json()["id"])
+    assert doc.processing_status == ProcessingStatus.DONE
+    assert doc.status == DocumentStatus.REJECTED
+
+
+def test_processing_failure_does_not_fail_the_upload(client, db, make_user, auth_headers, monkeypatch):
+    def broken(file_path, checksum):
+        raise RuntimeError("decoder crashed")
+
+    monkeypatch.setattr(document_pipeline, "analyze_file", broken)
+
+    response = _upload(client, auth_headers(make_user()), _png((40, 40)))
+
+    assert response.status_code == 200
+    doc = db.get(Document, response.json()["id"])
+    assert doc.processing_status == ProcessingStatus.FAILED
+
+
+def test_process_pool(client, db, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_PIPELINE_BROKER", "local")
+    try:
+        response = _upload(client, auth_headers(make_user()), _png((64, 64)))
+        assert response.status_code == 200
+        deadline = time.monotonic() + 60
+        while True:
+            db.expire_all()
+            doc = db.get(Document, response.json()["id"])
+            if doc.processing_status != ProcessingStatus.PENDING or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+    finally:
+        document_pipeline.shutdown_pool()
+    assert doc.processing_status == ProcessingStatus.DONE
+    assert doc.thumbnail_path
+
@@ -0,0 +1,99 @@
+from sqlalchemy import func, select
+
+from app.models import Document, DocumentStatus, UserActivity
+from app.models.analytics import ActivityType
+
+
+def _review(client, headers, *items):
+    response = client.post("/api/v1/documents/review", json={"items": list(items)}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _verified_activities(db, doc_ids):
+    return db.execute(
+        select(UserActivity.entity_id, func.count())
+        .where(
+            UserActivity.activity_type == ActivityType.DOCUMENT_VERIFIED,
+            UserActivity.entity_id.in_(doc_ids),
+        )
+        .group_by(UserActivity.entity_id)
+    ).all()
+
+
+def test_review_verifies_and_rejects_in_one_request(client, db, make_user, make_document, superuser, superuser_headers):
+    owner = make_user()
+    to_verify = make_document(owner)
+    blurry = make_document(owner)
+    expired = make_document(owner)
+    missing_id = expired.id + 10_000
+
+    result = _review(
+        client,
+        superuser_headers,
+        {"id": to_verify.id, "decision": "verify"},
+        {"id": blurry.id, "decision": "reject", "reason": "Blurry scan"},
+        {"id": expired.id, "decision": "reject", "reason": "Expired"},
+        {"id": missing_id, "decision": "verify"},
+    )
+
+    assert result["verified"] == [to_verify.id]
+    assert sorted(result["rejected"]) == sorted([blurry.id, expired.id])
+    assert result["not_found"] == [missing_id]
+
+    db.expire_all()
+    rows = {
+        doc.id: doc
+        for doc in db.scalars(select(Document).where(Document.id.in_([to_verify.id, blurry.id, expired.id])))
+    }
+    assert rows[to_verify.id].status == DocumentStatus.VERIFIED
+    assert rows[to_verify.id].verified_by == superuser.id
+    assert rows[to_verify.id].verified_at is not None
+    assert rows[to_verify.id].rejection_reason is None
+    assert (rows[blurry.id].status, rows[blurry.id].rejection_reason) == (DocumentStatus.REJECTED, "Blurry scan")
+    assert rows[expired.id].rejection_reason == "Expired"
+    assert _verified_activities(db, [to_verify.id, blurry.id, expired.id]) == [(to_verify.id, 1)]
+
+
+def test_verifying_again_changes_nothing(client, db, make_user, make_document, superuser_headers):
+    docs = [make_document(make_user()) for _ in range(2)]
+    items = [{"id": doc.id, "decision": "verify"} for doc in docs]
+
+    first = _review(client, superuser_headers, *items)
+    stamped = db.execute(select(Document.id, Document.verified_at).where(Document.id.in_(first["verified"]))).all()
+    second = _review(client, superuser_headers, *items)
+
+    assert sorted(second["verified"]) == sorted(first["verified"]) == sorted(doc.id for doc in docs)
+    assert db.execute(select(Document.id, Document.verified_at).where(Document.id.in_(first["verified"]))).all() == stamped
+    assert sorted(_verified_activities(db, first["verified"])) == sorted((doc.id, 1) for doc in docs)
+
+
+def test_rejected_document_can_be_verified_later(client, db, make_user, make_document, superuser_headers):
+    doc = make_document(make_user())
+    _review(client, superuser_headers, {"id": doc.id, "decision": "reject", "reason": "Cropped"})
+
+    response = client.post(f"/api/v1/documents/{doc.id}/verify", headers=superuser_headers)
+
+    assert response.status_code == 200
+    db.refresh(doc)
+    assert (doc.status, doc.rejection_reason) == (DocumentStatus.VERIFIED, None)
+    assert _verified_activities(db, [doc.id]) == [(doc.id, 1)]
+    # Verifying an already verified document is not an error
+    assert client.post(f"/api/v1/documents/{doc.id}/verify", headers=superuser_headers).status_code == 200
+    assert _verified_activities(db, [doc.id]) == [(doc.id, 1)]
+
+
+def test_single_review_endpoints_report_missing_documents(client, superuser_headers):
+    assert client.post("/api/v1/documents/999999/verify", headers=superuser_headers).status_code == 404
+    assert client.post("/api/v1/documents/999999/reject", headers=superuser_headers).status_code == 404
+
+
+def test_review_is_for_superusers(client, make_user, make_document, auth_headers):
+    owner = make_user()
+    doc = make_document(owner)
+    response = client.post(
+        "/api/v1/documents/review",
+        json={"items": [{"id": doc.id, "decision": "verify"}]},
+        headers=auth_headers(owner),
+    )
+    assert response.status_code == 400
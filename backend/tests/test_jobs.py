@@ -0,0 +1,92 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app import crud
+from app.models import DocumentCount, DocumentStatus, DocumentType, Job, JobStatus
+from app.services import jobs
+
+
+@pytest.fixture
+def register_job(monkeypatch):
+    """Register a throwaway job for one test: `register_job(func, **options)`."""
+
+    def register(func, **options):
+        name = f"test-{uuid.uuid4().hex[:8]}"
+        monkeypatch.setitem(jobs.registry, name, None)
+        jobs.job(name, backoff=0, **options)(func)
+        return name
+
+    return register
+
+
+def test_reconcile_counters_is_run_by_hand_only(db):
+    assert jobs.get_definition("reconcile_counters").every is None
+
+    created = jobs.schedule_due(db)
+    names = {db.get(Job, job_id).name for job_id in created}
+    assert "reconcile_counters" not in names
+
+
+def test_reconcile_counters_repairs_drift(client, db, make_user, make_document, superuser_headers):
+    make_document(make_user())
+    expected = crud.document.get_facets(db)
+    db.execute(
+        update(DocumentCount)
+        .where(DocumentCount.status == DocumentStatus.PENDING, DocumentCount.document_type == DocumentType.OTHER)
+        .values(count=DocumentCount.count + 7)
+    )
+    db.commit()
+    assert crud.document.get_facets(db) != expected
+
+    response = client.post("/api/v1/jobs/", json={"name": "reconcile_counters"}, headers=superuser_headers)
+
+    assert response.status_code == 202, response.text
+    assert response.json()["status"] == "succeeded"
+    assert crud.document.get_facets(db) == expected
+
+
+def test_failed_attempts_are_retried(db, register_job):
+    attempts = []
+
+    def flaky(ctx):
+        attempts.append(ctx.attempt)
+        if ctx.attempt < 2:
+            raise RuntimeError("try again")
+        return {"ok": True}
+
+    job = jobs.enqueue(db, register_job(flaky, max_attempts=3))
+
+    assert attempts == [1, 2]
+    assert (job.status, job.attempts, job.result) == (JobStatus.SUCCEEDED, 2, {"ok": True})
+
+
+def test_job_fails_once_out_of_attempts(db, register_job):
+    def broken(ctx):
+        raise RuntimeError("always")
+
+    job = jobs.enqueue(db, register_job(broken, max_attempts=2))
+
+    assert (job.status, job.attempts) == (JobStatus.FAILED, 2)
+    assert job.error == "RuntimeError: always"
+
+
+def test_unknown_jobs_and_arguments_are_refused(client, superuser_headers):
+    unknown = client.post("/api/v1/jobs/", json={"name": "no_such_job"}, headers=superuser_headers)
+    bad_args = client.post(
+        "/api/v1/jobs/", json={"name": "reconcile_counters", "args": {"table": "users"}}, headers=superuser_headers
+    )
+
+    assert unknown.status_code == 400
+    assert bad_args.status_code == 400
+
+
+def test_scheduled_runs_are_enqueued_once_per_period(db):
+    # A period no other test has scheduled
+    now = datetime(2031, 1, 1, tzinfo=timezone.utc)
+    first = jobs.schedule_due(db, now=now)
+
+    assert first
+    assert jobs.schedule_due(db, now=now + timedelta(seconds=1)) == []
@@ -0,0 +1,66 @@
+import pytest
+
+from app.db.query_profiler import NPlusOneError, QueryProfile, statement_shape
+from app.models import Resource, ResourceTagAssociation, ResourceType, Tag
+
+
+@pytest.fixture
+def documents_of_many_users(make_user, make_document):
+    # Created before `query_profiler` starts: fixtures set up in argument order
+    docs = []
+    for n in range(12):
+        user = make_user(full_name=f"Applicant {n}")
+        docs += [make_document(user), make_document(user)]
+    return docs
+
+
+@pytest.fixture
+def tagged_resources(db):
+    tag = Tag(name="profiler-test", category="test")
+    resources = [
+        Resource(title=f"Profiled resource {n}", url="https://example.com", resource_type=ResourceType.JOB)
+        for n in range(15)
+    ]
+    db.add_all([tag, *resources])
+    db.flush()
+    db.add_all(ResourceTagAssociation(resource_id=r.id, tag_id=tag.id) for r in resources)
+    db.commit()
+    return resources
+
+
+def test_admin_document_listing_has_no_n_plus_one(
+    client, superuser_headers, documents_of_many_users, query_profiler
+):
+    response = client.get("/api/v1/documents/admin", params={"limit": 500}, headers=superuser_headers)
+    assert response.status_code == 200
+    listed = {item["id"]: item for item in response.json()["items"]}
+    for doc in documents_of_many_users:
+        assert listed[doc.id]["userName"].startswith("Applicant ")
+    # The owners come with the page (a join), not one query per row
+    assert query_profiler.total < 15
+
+
+def test_resource_listing_has_no_n_plus_one(client, tagged_resources, query_profiler):
+    response = client.get("/api/v1/resources/", params={"limit": 200})
+    assert response.status_code == 200
+    listed = {item["id"] for item in response.json()["items"]}
+    assert {r.id for r in tagged_resources} <= listed
+    assert query_profiler.total < 15
+
+
+def test_profile_flags_repeated_statement_shapes():
+    profile = QueryProfile("test", threshold=3, slow_ms=1000)
+    for user_id in range(4):
+        profile.record("SELECT * FROM users WHERE users.id = ?", (user_id,), 0.001)
+    profile.record("SELECT * FROM documents WHERE id IN (1, 2, 3)", (), 0.001)
+    assert profile.total == 5
+    assert [group.count for group in profile.repeated()] == [4]
+    with pytest.raises(NPlusOneError):
+        profile.check()
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT 1\n  FROM t WHERE id IN (1, 2, 3)") == "SELECT 1 FROM t WHERE id IN (...)"
+    assert statement_shape("SELECT 1 FROM t WHERE id IN (?, ?)") == statement_shape(
+        "SELECT 1 FROM t WHERE id IN (?)"
+    )
@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import InvalidRequestError
+
+from app.db import replicas
+from app.db.session import SessionLocal
+from app.models import Resource, ResourceType
+
+
+@pytest.fixture
+def replica_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_set(monkeypatch, replica_engine):
+    """Route reads to one replica, with a fresh read-your-writes memory."""
+    replica_set = replicas.ReplicaSet([replica_engine], max_lag=5, check_interval=3600)
+    monkeypatch.setattr(replicas, "replicas", replica_set)
+    monkeypatch.setattr(replicas, "recent_writes", replicas.MemoryRecentWrites(60))
+    return replica_set
+
+
+def test_reads_go_to_the_replica_until_the_user_writes(replica_set, replica_engine, db, make_user):
+    user = make_user()
+    read = replicas.read_session(user.id)
+    assert read.get_bind() is replica_engine
+    assert read.info["read_only"]
+    read.close()
+
+    # A commit that wrote something keeps the writer on the primary
+    session = SessionLocal()
+    session.info["user_id"] = user.id
+    session.get(type(user), user.id).full_name = "Renamed"
+    session.commit()
+    session.close()
+
+    read = replicas.read_session(user.id)
+    assert read.get_bind() is db.get_bind()
+    assert not read.info.get("read_only")
+    read.close()
+    # Other users and anonymous reads still use the replica
+    assert replicas.read_session(make_user().id).get_bind() is replica_engine
+    assert replicas.read_session().get_bind() is replica_engine
+
+
+def test_a_read_only_commit_does_not_pin_the_user(replica_set, replica_engine, make_user):
+    user = make_user()
+    session = SessionLocal()
+    session.info["user_id"] = user.id
+    session.get(type(user), user.id)
+    session.commit()
+    session.close()
+
+    assert replicas.read_session(user.id).get_bind() is replica_engine
+
+
+def test_replica_sessions_refuse_to_write(replica_set):
+    read = replicas.read_session()
+    try:
+        read.add(Resource(title="Nope", url="https://example.com", resource_type=ResourceType.JOB))
+        with pytest.raises(InvalidRequestError):
+            read.flush()
+        read.rollback()
+        with pytest.raises(InvalidRequestError):
+            read.execute(update(Resource).values(is_active=False))
+    finally:
+        read.close()
+
+
+def test_pick_skips_unreachable_and_lagging_replicas(tmp_path, replica_engine):
+    unreachable = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    lagging = create_engine(f"sqlite:///{tmp_path}/lagging.db")
+    replica_set = replicas.ReplicaSet([unreachable, lagging, replica_engine], max_lag=5, check_interval=3600)
+
+    assert replica_set.pick() in (lagging, replica_engine)
+    assert not replica_set.replicas[0].healthy
+    replica_set.replicas[1].lag = 30.0
+
+    assert {replica_set.pick() for _ in range(4)} == {replica_engine}
+
+    replica_set.replicas[2].healthy = False
+    assert replica_set.pick() is None
@@ -0,0 +1,106 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import crud
+from app.models import Resource, ResourceType
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def catalog(db):
+    """A handful of resources under a source no other test uses."""
+    source = f"portal-{uuid.uuid4().hex[:8]}"
+
+    def add(title, **fields):
+        fields = {"source": source, "resource_type": ResourceType.JOB, "url": "https://example.com", **fields}
+        resource = Resource(title=title, **fields)
+        db.add(resource)
+        db.commit()
+        return resource
+
+    add.source = source
+    return add
+
+
+def _list(client, **params):
+    response = client.get("/api/v1/resources/", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _ids(body):
+    return {item["id"] for item in body["items"]}
+
+
+def test_full_text_search_matches_stems_across_columns(client, db, catalog):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    teaching = catalog(f"{word} teaching assistant")
+    described = catalog("Library clerk", description=f"Cataloguing {word} archives")
+    catalog(f"{word} driver")
+
+    # Stemmed: neither is a substring of the stored text
+    assert _ids(_list(client, q=f"{word} teaches", source=catalog.source)) == {teaching.id}
+    assert _ids(_list(client, q=f"{word} archived", source=catalog.source)) == {described.id}
+    assert crud.resource._search_index[str(db.get_bind().url)]
+    # Query syntax in the input is treated as words
+    assert _ids(_list(client, q=f'{word} "OR*', source=catalog.source)) == set()
+
+
+def test_search_falls_back_to_like_without_the_index(monkeypatch, db, catalog):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    nurse = catalog(f"Nurse {word}x")
+    catalog(f"Nurse {word[:-1]}")
+    monkeypatch.setitem(crud.resource._search_index, str(db.get_bind().url), False)
+
+    resources, _ = crud.resource.search(db, search=f"nurse {word}", source=catalog.source)
+
+    assert [r.id for r in resources] == [nurse.id]
+
+
+def test_each_filter_narrows_the_listing(client, catalog):
+    job = catalog("Clerk", location="Ludhiana")
+    course = catalog("Welding", resource_type=ResourceType.COURSE, location="Amritsar")
+    closed = catalog("Old fair", location="Ludhiana", end_date=NOW - timedelta(days=30))
+    upcoming = catalog("Future fair", location="Ludhiana", start_date=NOW + timedelta(days=30))
+    catalog("Retired", is_active=False)
+
+    assert _ids(_list(client, source=catalog.source)) == {job.id, course.id, closed.id, upcoming.id}
+    assert _ids(_list(client, source=catalog.source, resource_type="course")) == {course.id}
+    assert _ids(_list(client, source=catalog.source, location="Ludhiana")) == {job.id, closed.id, upcoming.id}
+    window = {"active_from": (NOW - timedelta(days=1)).isoformat(), "active_to": (NOW + timedelta(days=1)).isoformat()}
+    assert _ids(_list(client, source=catalog.source, **window)) == {job.id, course.id}
+    assert _list(client, source=f"{catalog.source}-other")["items"] == []
+
+
+def test_second_page_continues_the_first(client, catalog):
+    created = [catalog(f"Listing {n}") for n in range(5)]
+
+    first = _list(client, source=catalog.source, limit=3)
+    second = _list(client, source=catalog.source, limit=3, cursor=first["nextCursor"])
+
+    assert [item["id"] for item in first["items"] + second["items"]] == [r.id for r in reversed(created)]
+    assert first["facets"] is not None
+    assert second["facets"] is None
+    assert second["nextCursor"] is None
+
+
+def test_bad_cursor_is_a_client_error(client):
+    response = client.get("/api/v1/resources/", params={"cursor": "garbage!"})
+    assert response.status_code == 400
+
+
+def test_facets_ignore_only_their_own_filter(client, catalog):
+    catalog("A", location="Ludhiana")
+    catalog("B", location="Ludhiana", resource_type=ResourceType.COURSE)
+    catalog("C", location="Amritsar", resource_type=ResourceType.COURSE)
+
+    facets = _list(client, source=catalog.source, location="Ludhiana", resource_type="course")["facets"]
+
+    assert facets["resource_type"]["job"] == 1
+    assert facets["resource_type"]["course"] == 1
+    assert facets["resource_type"]["scholarship"] == 0
+    assert facets["location"] == {"Ludhiana": 1, "Amritsar": 1}
+    assert facets["source"] == {catalog.source: 1}
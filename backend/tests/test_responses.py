@@ -0,0 +1,125 @@
+import gzip
+
+import brotli
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.responses import CompressionMiddleware, ETagMiddleware, FastJSONResponse
+
+ROWS = [{"id": n, "title": f"Resource {n}"} for n in range(200)]
+
+
+def _rows(request):
+    return FastJSONResponse(ROWS)
+
+
+def _small(request):
+    return FastJSONResponse({"ok": True})
+
+
+def _streamed(request):
+    async def chunks():
+        for row in ROWS:
+            yield FastJSONResponse(row).body
+
+    return StreamingResponse(chunks(), media_type="application/json")
+
+
+def _text(request):
+    return PlainTextResponse("plain " * 500)
+
+
+@pytest.fixture(scope="module")
+def bare_client():
+    """The two middlewares, in the app's order, around a few plain routes."""
+    app = Starlette(
+        routes=[
+            Route("/rows", _rows, methods=["GET", "POST"]),
+            Route("/small", _small),
+            Route("/streamed", _streamed),
+            Route("/text", _text),
+        ]
+    )
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_json_get_gets_a_weak_etag_and_304_keeps_vary(bare_client):
+    first = bare_client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+
+    again = bare_client.get("/rows", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    assert again.headers["vary"] == "Accept-Encoding"
+    assert "content-type" not in again.headers
+    # A stale tag gets the full body
+    assert bare_client.get("/rows", headers={"If-None-Match": 'W/"stale"'}).json() == ROWS
+
+
+@pytest.mark.parametrize(
+    "method, path", [("POST", "/rows"), ("GET", "/streamed"), ("GET", "/text")]
+)
+def test_only_whole_json_gets_are_tagged(bare_client, method, path):
+    response = bare_client.request(method, path)
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+
+def test_the_live_stream_is_neither_tagged_nor_compressed(client, superuser_headers, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_ANALYTICS_MAX_STREAM_SECONDS", 0)
+
+    response = client.get(
+        "/api/v1/analytics/live", headers={**superuser_headers, "Accept-Encoding": "br, gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "etag" not in response.headers
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "accept, encoding",
+    [
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_encoding_negotiation(bare_client, accept, encoding):
+    with bare_client.stream("GET", "/rows", headers={"Accept-Encoding": accept}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers.get("content-encoding") == encoding
+    decoded = {"br": brotli.decompress, "gzip": gzip.decompress, None: bytes}[encoding](raw)
+    assert decoded == FastJSONResponse(ROWS).body
+    assert int(response.headers["content-length"]) == len(raw)
+
+
+def test_streamed_bodies_are_compressed_as_they_go(bare_client):
+    response = bare_client.get("/streamed", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"".join(FastJSONResponse(row).body for row in ROWS)
+
+
+def test_small_responses_are_left_alone(bare_client):
+    response = bare_client.get("/small", headers={"Accept-Encoding": "br, gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.json() == {"ok": True}
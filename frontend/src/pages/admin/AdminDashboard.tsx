@@ -15,24 +15,61 @@ const AdminDashboard = () => {
   ]);
 
   useEffect(() => {
-    (async () => {
-      try {
-        const res = await fetch(`${API_BASE_URL}/analytics/summary`, {
-          headers: { Authorization: `Bearer ${localStorage.getItem('token') || ''}` },
+    // Live figures: a snapshot, then deltas, over Server-Sent Events. fetch
+    // rather than EventSource so the bearer token can be sent.
+    const controller = new AbortController();
+    let totals: any = null;
+
+    const show = () => setStats([
+      { title: 'Total Users', value: String(totals.users.total_users), icon: <People />, color: 'primary' },
+      { title: 'Pending Documents', value: String(totals.documents.pending), icon: <Pending />, color: 'warning' },
+      { title: 'Employed', value: String(totals.users.employed), icon: <CheckCircle />, color: 'success' },
+      { title: 'Unemployed', value: String(totals.users.unemployed), icon: <RejectedIcon />, color: 'error' },
+    ]);
+
+    const apply = (message: any) => {
+      if (message.type === 'snapshot') {
+        totals = message;
+      } else if (totals) {
+        totals.users.total_users += message.users?.total_users ?? 0;
+        Object.entries(message.documents ?? {}).forEach(([status, n]) => {
+          totals.documents[status] = (totals.documents[status] ?? 0) + (n as number);
         });
-        if (res.ok) {
-          const data = await res.json();
-          setStats([
-            { title: 'Total Users', value: String(data.total_users ?? '—'), icon: <People />, color: 'primary' },
-            { title: 'Pending Documents', value: '—', icon: <Pending />, color: 'warning' },
-            { title: 'Employed', value: String(data.employed ?? '—'), icon: <CheckCircle />, color: 'success' },
-            { title: 'Unemployed', value: String(data.unemployed ?? '—'), icon: <RejectedIcon />, color: 'error' },
-          ]);
+      }
+      if (totals) show();
+    };
+
+    const listen = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const res = await fetch(`${API_BASE_URL}/analytics/live`, {
+            headers: { Authorization: `Bearer ${localStorage.getItem('token') || ''}` },
+            signal: controller.signal,
+          });
+          if (!res.ok || !res.body) return;
+          const reader = res.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          for (;;) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop() || '';
+            events.forEach((event) => {
+              const data = event.split('\n').find((line) => line.startsWith('data: '));
+              if (data) apply(JSON.parse(data.slice(6)));
+            });
+          }
+        } catch (e) {
+          if (controller.signal.aborted) return;
         }
-      } catch (e) {
-        // ignore for now
+        // The server ends streams now and then; reconnect
+        await new Promise((resolve) => setTimeout(resolve, 3000));
       }
-    })();
+    };
+    listen();
+    return () => controller.abort();
   }, []);
 
   const quickActions = [
@@ -40,6 +40,7 @@ const DocumentVerificationPage: React.FC = () => {
   // State
   const [activeTab, setActiveTab] = useState<DocumentStatus>('pending');
   const [documents, setDocuments] = useState<Document[]>([]);
+  const [statusCounts, setStatusCounts] = useState<Record<string, number>>({});
   const [selectedDoc, setSelectedDoc] = useState<Document | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [isViewerOpen, setIsViewerOpen] = useState(false);
@@ -63,12 +64,15 @@ const DocumentVerificationPage: React.FC = () => {
   const fetchDocuments = async (status: DocumentStatus) => {
     setIsLoading(true);
     try {
-      const res = await fetch(`${API_BASE_URL}/documents/admin${status ? `?status_filter=${status}` : ''}`, {
+      // The API calls approved documents "verified"
+      const statusFilter = status === 'approved' ? 'verified' : status;
+      const res = await fetch(`${API_BASE_URL}/documents/admin${statusFilter ? `?status_filter=${statusFilter}` : ''}`, {
         headers: { Authorization: `Bearer ${localStorage.getItem('token') || ''}` },
       });
       if (res.ok) {
         const data = await res.json();
-        setDocuments(data);
+        setDocuments(data.items);
+        setStatusCounts(data.facets.status);
       } else {
         throw new Error('Failed to load');
       }
@@ -256,9 +260,9 @@ const DocumentVerificationPage: React.FC = () => {
             label={
               <Box sx={{ display: 'flex', alignItems: 'center', gap: 1 }}>
                 <span>Pending Review</span>
-                {documents.length > 0 && (
+                {statusCounts.pending > 0 && (
                   <Chip 
-                    label={documents.length} 
+                    label={statusCounts.pending} 
                     size="small" 
                     color="warning"
                     sx={{ minWidth: 24, height: 24 }}